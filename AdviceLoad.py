@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+
+import numpy as np
+
+from AdviceService import HOST, PORT
+from Solver import Solver
+from Yahtzee import Calculator, Dice, Hands
+
+# 定数定義
+CLIENT_COUNT: int = 16  # 同時に接続するクライアント数
+REQUEST_COUNT: int = 50  # クライアントごとの要求数
+NUM_OF_POSITIONS: int = 200  # 要求に使用する局面の種類数(同じ局面の要求が重なるように要求数より少なくする)
+SEED: int = 0  # 局面とクライアントごとの要求順のシード
+REROLL_MODE: str = 'MaximumGain'  # 要求する振り直し時の役選択/評価モード
+CHOISE_MODE: str = 'Balance'  # 要求する役選択モード
+
+
+def makeRequests(seed: int, count: int) -> list[dict]:
+    """要求に使用する局面を作成する
+
+    割り当て済の役の点は、その役にランダムなサイコロを割り当てたときの点とする。
+
+    Args:
+        seed (int): シード
+        count (int): 局面の数
+
+    Returns:
+        list[dict]: 要求の一覧(id は未設定)
+    """
+    generator: np.random.Generator = np.random.default_rng(seed)
+    requests: list[dict] = []
+    for _ in range(count):
+        numOfAssigned: int = int(generator.integers(len(Hands)))
+        hands: list[Hands] = [list(Hands)[column] for column in generator.permutation(len(Hands))[:numOfAssigned]]
+        field: dict[str, int] = {hand.name: Calculator.calculatePointsByIndex(hand, int(generator.integers(Dice.NUM_OF_STATES))) for hand in hands}
+        requests.append({
+            'field': field,
+            'dice': generator.integers(1, 7, Dice.NUM_OF_DICE).tolist(),
+            'rerollCount': int(generator.integers(Solver.NUM_OF_REROLLS + 1)),
+            'rerollMode': REROLL_MODE,
+            'choiseMode': CHOISE_MODE,
+        })
+    return requests
+
+
+async def runClient(clientCount: int, requests: list[dict], requestCount: int, seed: int) -> list[tuple[float, dict]]:
+    """1つの接続で要求を1つずつ送り、応答までの時間を計測する
+
+    Args:
+        clientCount (int): クライアント番号
+        requests (list[dict]): 局面の一覧
+        requestCount (int): 要求数
+        seed (int): シード
+
+    Returns:
+        list[tuple[float, dict]]: 要求ごとの(応答までの時間[s], 応答)
+    """
+    generator: np.random.Generator = np.random.default_rng([seed, clientCount])
+    (reader, writer) = await asyncio.open_connection(HOST, PORT)
+    results: list[tuple[float, dict]] = []
+    try:
+        for requestCount in range(requestCount):
+            request: dict = dict(requests[int(generator.integers(len(requests)))], id=f'{clientCount}-{requestCount}')
+            startTime: float = time.perf_counter()
+            writer.write((json.dumps(request) + '\n').encode())
+            await writer.drain()
+            response: dict = json.loads(await reader.readline())
+            results.append((time.perf_counter() - startTime, response))
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return results
+
+
+async def runLoad(logger: logging.Logger) -> None:
+    """CLIENT_COUNT 個のクライアントで同時に要求を送り、応答時間を集計する
+
+    Args:
+        logger (logging.Logger): ロガー
+    """
+    requests: list[dict] = makeRequests(SEED, NUM_OF_POSITIONS)
+    startTime: float = time.perf_counter()
+    clientResults: list[list[tuple[float, dict]]] = await asyncio.gather(
+        *[runClient(clientCount, requests, REQUEST_COUNT, SEED) for clientCount in range(CLIENT_COUNT)])
+    elapsedTime: float = time.perf_counter() - startTime
+
+    results: list[tuple[float, dict]] = [result for results in clientResults for result in results]
+    errors: list[dict] = [response for (_, response) in results if 'error' in response]
+    latencies: np.ndarray = np.array([latency for (latency, _) in results]) * 1e3
+    computes: np.ndarray = np.array([response['latency']['compute'] for (_, response) in results if 'error' not in response]) * 1e3
+    merged: int = sum(1 for (_, response) in results if response.get('merged'))
+
+    logger.info(f'Clients: {CLIENT_COUNT} Requests: {len(results)} Errors: {len(errors)} Elapsed: {elapsedTime:.2f}s '
+                f'Throughput: {len(results) / elapsedTime:.1f} req/s')
+    logger.info(f'Latency[ms]: p50: {np.percentile(latencies, 50):.2f} p90: {np.percentile(latencies, 90):.2f} '
+                f'p99: {np.percentile(latencies, 99):.2f} max: {np.amax(latencies):.2f}')
+    if len(computes):
+        logger.info(f'Compute[ms] (server): mean: {np.mean(computes):.2f} p99: {np.percentile(computes, 99):.2f}')
+    logger.info(f'Merged: {merged} ({merged / len(results):.2%})')
+    for response in errors[:5]:
+        logger.warning(f'Error: {response}')
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    asyncio.run(runLoad(logging.getLogger(__name__)))
+
+
+if __name__ == '__main__':
+    main()
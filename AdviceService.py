@@ -0,0 +1,316 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import time
+
+from DiceTable import DiceTable
+from Solver import Solver
+from Yahtzee import Dice, EvaluationCache, Evaluator, FieldState, HandChoiseMode, Hands, Reroll
+
+# 定数定義
+HOST: str = '127.0.0.1'  # 待ち受けるアドレス(ローカルのみ)
+PORT: int = 8765  # 待ち受けるポート
+WORKER_COUNT: int = os.cpu_count() or 1  # 評価を実行するプロセス数
+BATCH_WINDOW: float = 0.005  # 最初の要求から、同じバッチにまとめる要求を待つ時間[s]
+MAX_BATCH_SIZE: int = 256  # 1バッチの最大局面数
+HAND_TO_POINTS: dict[Hands, set[int]] = {hand: set(DiceTable.POINTS[:, column].tolist()) for (column, hand) in enumerate(Hands)}  # 役ごとの取り得る点
+
+# プロセスごとの最適戦略と役選択結果のキャッシュ(initWorker で設定する)
+workerSolver: Solver | None = None
+workerCache: EvaluationCache | None = None
+
+# 局面のキー(未割り当ての役のビットマスク, 数字役の合計点, 合計点, サイコロのインデックス, 残りの振り直し回数, 振り直し時の役選択/評価モード, 役選択モード)
+PositionKey = tuple[int, int, int, int, int, HandChoiseMode, HandChoiseMode]
+
+
+def initWorker() -> None:
+    """プロセスごとにキャッシュを用意し、最適戦略があれば読み込む
+    """
+    global workerSolver, workerCache
+    workerCache = EvaluationCache()
+    if os.path.exists(Solver.TABLE_FILE_NAME):
+        workerSolver = Solver.load()
+
+
+def evaluatePositions(state: FieldState, positions: list[tuple[int, int, HandChoiseMode, HandChoiseMode]]) -> tuple[list[tuple[int, Hands | None, float | None]], float]:
+    """同じ場の状態の局面をまとめて評価する(プロセスで実行する)
+
+    同じ場の状態では役選択結果のキャッシュを共有するため、サイコロが異なる局面も評価の一部を共有する。
+
+    Args:
+        state (FieldState): 場の状態
+        positions (list[tuple[int, int, HandChoiseMode, HandChoiseMode]]): (サイコロのインデックス, 残りの振り直し回数(0 の場合は役を選択する), 振り直し時の役選択/評価モード, 役選択モード)の一覧
+
+    Returns:
+        list[tuple[int, Hands | None, float | None]]: 局面ごとの(振り直しのビット, 役(振り直し時は None), 役の評価値(振り直し時は None))
+        float: 計算時間[s]
+    """
+    assert workerCache is not None
+    startTime: float = time.perf_counter()
+    logger: logging.Logger = logging.getLogger(__name__)
+    evaluator: Evaluator = Evaluator(state, logger, HandChoiseMode.Balance, False, workerSolver, workerCache)
+    results: list[tuple[int, Hands | None, float | None]] = []
+    for (index, rerollCount, rerollMode, choiseMode) in positions:
+        dice: Dice = Dice(list(Dice.pipsOfIndex(index)))
+        if rerollCount == 0:
+            (hand, value) = evaluator.choiseHand(dice, choiseMode)
+            results.append((0, hand, value))
+        else:
+            reroll: Reroll = evaluator.choiseReroll(dice, rerollMode, choiseMode, rerollCount)
+            results.append((reroll.toBit(), None, None))
+    return (results, time.perf_counter() - startTime)
+
+
+def parseRequest(request: dict, isOptimal: bool) -> tuple[FieldState, PositionKey]:
+    """要求を場の状態と局面のキーに変換する
+
+    要求: {"id": 任意, "field": {役の名前: 点, ...(割り当て済の役)}, "dice": [目 * 5], "rerollCount": 残りの振り直し回数(0 の場合は役を選択する),
+          "rerollMode": HandChoiseMode の名前, "choiseMode": HandChoiseMode の名前}
+
+    Args:
+        request (dict): 要求
+        isOptimal (bool): HandChoiseMode.Optimal を使用できるか
+
+    Raises:
+        ValueError: 要求が不正な場合
+
+    Returns:
+        FieldState: 場の状態
+        PositionKey: 局面のキー
+    """
+    try:
+        state: FieldState = FieldState.INITIAL
+        for (name, points) in request.get('field', {}).items():
+            hand: Hands = Hands[name]
+            if not state.isOpen(hand):
+                raise ValueError(f'duplicated hand: {name}')
+            handPoints: int = int(points)
+            # 役で取り得ない点は、合計点(バッチのキー)や最適戦略の表の参照が不正になるため拒否する
+            if handPoints not in HAND_TO_POINTS[hand]:
+                raise ValueError(f'invalid points for {name}: {points}')
+            state = state.setHand(hand, handPoints)
+        pips: list[int] = [int(pip) for pip in request['dice']]
+        rerollCount: int = int(request.get('rerollCount', 0))
+        rerollMode: HandChoiseMode = HandChoiseMode[request.get('rerollMode', HandChoiseMode.MaximumGain.name)]
+        choiseMode: HandChoiseMode = HandChoiseMode[request.get('choiseMode', HandChoiseMode.Balance.name)]
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f'invalid request: {e!r}') from e
+
+    if len(pips) != Dice.NUM_OF_DICE or any(pip < 1 or 6 < pip for pip in pips):
+        raise ValueError(f'invalid dice: {pips}')
+    if rerollCount < 0 or Solver.NUM_OF_REROLLS < rerollCount:
+        raise ValueError(f'invalid rerollCount: {rerollCount}')
+    if state.getOpenMask() == 0:
+        raise ValueError('no open hand')
+    if not isOptimal and HandChoiseMode.Optimal in [rerollMode, choiseMode]:
+        raise ValueError(f'HandChoiseMode.Optimal requires {Solver.TABLE_FILE_NAME}')
+
+    index: int = Dice.indexOfPips(tuple(sorted(pips)))
+    return (state, (state.getOpenMask(), state.getSumOfNumHands(), state.sum(), index, rerollCount, rerollMode, choiseMode))
+
+
+class AdviceServer:
+    """役と振り直しの選択要求を受け付け、まとめて評価する
+
+    評価中または評価待ちの同じ局面の要求は1つの評価結果を共有する。
+    BATCH_WINDOW の間に受け付けた局面を場の状態ごとにまとめ、プロセスプールで評価する。
+    """
+
+    def __init__(self, executor: concurrent.futures.Executor, isOptimal: bool, logger: logging.Logger) -> None:
+        """コンストラクタ
+
+        Args:
+            executor (concurrent.futures.Executor): 評価を実行するプール
+            isOptimal (bool): HandChoiseMode.Optimal を使用できるか
+            logger (logging.Logger): ロガー
+        """
+        self.__executor__: concurrent.futures.Executor = executor
+        self.__isOptimal__: bool = isOptimal
+        self.__logger__: logging.Logger = logger
+        # 評価中または評価待ちの局面ごとの結果
+        self.__pending__: dict[PositionKey, asyncio.Future] = {}
+        # 評価待ちの局面
+        self.__queue__: asyncio.Queue[tuple[PositionKey, FieldState]] = asyncio.Queue()
+        # 評価中のタスク(完了まで参照を保持する)
+        self.__tasks__: set[asyncio.Task] = set()
+        # 統計(要求数, 評価を共有した要求数, バッチ数, 評価した局面数)
+        self.__statistics__: dict[str, int] = {'requests': 0, 'merged': 0, 'batches': 0, 'positions': 0}
+
+    def getStatistics(self) -> dict[str, int]:
+        """統計を取得する
+
+        Returns:
+            dict[str, int]: 要求数, 評価を共有した要求数, バッチ数, 評価した局面数
+        """
+        return self.__statistics__
+
+    async def advise(self, request: dict) -> dict:
+        """1つの要求に応答する
+
+        Args:
+            request (dict): 要求(parseRequest を参照)
+
+        Returns:
+            dict: 応答({"id", "reroll": 振り直しのビット(昇順に並べたサイコロに対する), "keep": 残す目, "hand": 役の名前, "value": 役の評価値,
+                  "latency": {"queue", "compute", "total"}[s], "batch": 同時に評価した局面数, "merged": 他の要求と評価を共有したか})
+        """
+        receivedTime: float = time.perf_counter()
+        self.__statistics__['requests'] += 1
+        try:
+            (state, key) = parseRequest(request, self.__isOptimal__)
+        except ValueError as e:
+            return {'id': request.get('id'), 'error': str(e)}
+
+        future: asyncio.Future | None = self.__pending__.get(key)
+        isMerged: bool = future is not None
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self.__pending__[key] = future
+            self.__queue__.put_nowait((key, state))
+        else:
+            self.__statistics__['merged'] += 1
+
+        try:
+            ((bit, hand, value), dispatchedTime, computeTime, batchSize) = await asyncio.shield(future)
+        except Exception as e:
+            return {'id': request.get('id'), 'error': repr(e)}
+
+        pips: tuple[int, ...] = Dice.pipsOfIndex(key[3])
+        return {
+            'id': request.get('id'),
+            'reroll': bit,
+            'keep': [pip for (idx, pip) in enumerate(pips) if not Reroll(bit).bitCheck(idx)],
+            'hand': hand.name if hand is not None else None,
+            'value': value,
+            'latency': {'queue': max(dispatchedTime - receivedTime, 0), 'compute': computeTime, 'total': time.perf_counter() - receivedTime},
+            'batch': batchSize,
+            'merged': isMerged,
+        }
+
+    async def runBatches(self) -> None:
+        """評価待ちの局面をバッチにまとめて評価する(終了しない)
+        """
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        while True:
+            batch: list[tuple[PositionKey, FieldState]] = [await self.__queue__.get()]
+            deadline: float = loop.time() + BATCH_WINDOW
+            while len(batch) < MAX_BATCH_SIZE:
+                timeout: float = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.__queue__.get(), timeout))
+                except asyncio.TimeoutError:  # Python 3.10 以前は組み込みの TimeoutError と別の例外
+                    break
+
+            # 場の状態ごとにまとめる(キーの先頭3つが場の状態)
+            groups: dict[tuple[int, int, int], tuple[FieldState, list[PositionKey]]] = {}
+            for (key, state) in batch:
+                groups.setdefault(key[:3], (state, []))[1].append(key)
+            self.__statistics__['batches'] += 1
+            self.__statistics__['positions'] += len(batch)
+            for (state, keys) in groups.values():
+                task: asyncio.Task = asyncio.create_task(self.__runGroup__(state, keys, len(batch)))
+                self.__tasks__.add(task)
+                task.add_done_callback(self.__tasks__.discard)
+
+    async def __runGroup__(self, state: FieldState, keys: list[PositionKey], batchSize: int) -> None:
+        """同じ場の状態の局面をプールで評価し、結果を設定する
+
+        Args:
+            state (FieldState): 場の状態
+            keys (list[PositionKey]): 局面のキーの一覧
+            batchSize (int): バッチの局面数
+        """
+        dispatchedTime: float = time.perf_counter()
+        positions: list[tuple[int, int, HandChoiseMode, HandChoiseMode]] = [key[3:] for key in keys]
+        try:
+            (results, computeTime) = await asyncio.get_running_loop().run_in_executor(self.__executor__, evaluatePositions, state, positions)
+        except Exception as e:
+            self.__logger__.exception('evaluation failed')
+            for key in keys:
+                self.__pending__.pop(key).set_exception(e)
+            return
+        for (key, result) in zip(keys, results):
+            self.__pending__.pop(key).set_result((result, dispatchedTime, computeTime, batchSize))
+
+    async def handleClient(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """接続ごとに要求(1行1つの JSON)を読み込み、応答が揃ったものから返す
+
+        Args:
+            reader (asyncio.StreamReader): 読み込み
+            writer (asyncio.StreamWriter): 書き込み
+        """
+        tasks: set[asyncio.Task] = set()
+        try:
+            while line := await reader.readline():
+                try:
+                    request: dict = json.loads(line)
+                except json.JSONDecodeError as e:
+                    writer.write((json.dumps({'id': None, 'error': f'invalid json: {e}'}) + '\n').encode())
+                    continue
+                if not isinstance(request, dict):
+                    writer.write((json.dumps({'id': None, 'error': 'request must be an object'}) + '\n').encode())
+                    continue
+                task: asyncio.Task = asyncio.create_task(self.__respond__(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def __respond__(self, request: dict, writer: asyncio.StreamWriter) -> None:
+        """1つの要求に応答を書き込む
+
+        Args:
+            request (dict): 要求
+            writer (asyncio.StreamWriter): 書き込み
+        """
+        response: dict = await self.advise(request)
+        if not writer.is_closing():
+            writer.write((json.dumps(response) + '\n').encode())
+            await writer.drain()
+
+
+async def serve(host: str, port: int, workerCount: int, logger: logging.Logger) -> None:
+    """サービスを開始する(終了しない)
+
+    Args:
+        host (str): 待ち受けるアドレス
+        port (int): 待ち受けるポート
+        workerCount (int): 評価を実行するプロセス数
+        logger (logging.Logger): ロガー
+    """
+    isOptimal: bool = os.path.exists(Solver.TABLE_FILE_NAME)
+    if isOptimal:
+        # 最適戦略は各プロセスで読み込むため、壊れていないことを事前に1回検証する
+        Solver.load(Solver.TABLE_FILE_NAME, True)
+    with concurrent.futures.ProcessPoolExecutor(workerCount, initializer=initWorker) as executor:
+        adviceServer: AdviceServer = AdviceServer(executor, isOptimal, logger)
+        batchTask: asyncio.Task = asyncio.create_task(adviceServer.runBatches())
+        server: asyncio.Server = await asyncio.start_server(adviceServer.handleClient, host, port)
+        logger.info(f'Serving on {host}:{port} (workers: {workerCount}, Optimal: {isOptimal})')
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batchTask.cancel()
+            logger.info(f'Statistics: {adviceServer.getStatistics()}')
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger: logging.Logger = logging.getLogger(__name__)
+    try:
+        asyncio.run(serve(HOST, PORT, WORKER_COUNT, logger))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
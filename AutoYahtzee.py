@@ -1,96 +1,402 @@
+import copy
 import datetime
+import functools
 import json
 import logging
 import logging.config
+import logging.handlers
+import multiprocessing
+import multiprocessing.queues
 import os
+import queue
+import random
+import time
 import numpy as np
 
 import Yahtzee
+from GameRecord import GameRecord, GameRecordWriter
+from Instrumentation import Instrumentation
+from ScoreStatistics import ScoreStatistics
+from Solver import Solver
 
 # 定数定義
 LOG_FOLDER_NAME: str = 'ay_logs'
 GAME_COUNT: int = 100
+IS_LOOKAHEAD: bool = False  # 振り直し選択時に残りの振り直しをすべて先読みするか
+MAX_ROLL_COUNT: int = 3  # 1ターンでサイコロを振る最大回数
+WORKER_COUNT: int = os.cpu_count() or 1  # ゲームを並列に実行するプロセス数(1の場合は並列化しない)
+SEED: int = 0  # 実行全体のシード(ゲームごとのシードはここから生成する)
+IS_QUEUE_LOGGING: bool = True  # ログを実行ごとのファイルにまとめ、書き込みを別スレッドで行うか(False の場合はゲームごとのファイルに出力する)
+STATISTICS_INTERVAL: int = 10  # 途中経過の統計を出力するゲーム数の間隔
+IS_INSTRUMENTED: bool = False  # 呼び出し回数と処理時間を集計し、ゲームごとのログとゲームの統計に出力するか
+REROLL_TIME_BUDGET: float | None = None  # 出目をサンプリングして振り直しを選択するときの1回あたりの時間予算[s](None の場合はすべての出目を評価する)
 
+# 役選択結果のキャッシュ(プロセスごとに1つ作成し、ターン・ゲームをまたいで使用する)
+evaluationCache: Yahtzee.EvaluationCache = Yahtzee.EvaluationCache()
+# プロセスで実行中のゲーム番号(IS_QUEUE_LOGGING 時にログの先頭に付与する)
+runningGameCount: int | None = None
 
-def main() -> None:
-    sumList: np.NDArray = np.array([])
 
-    rerollMode: Yahtzee.HandChoiseMode = Yahtzee.HandChoiseMode.MaximumGain
-    choiseMode: Yahtzee.HandChoiseMode = Yahtzee.HandChoiseMode.Balance
+def getGameSeed(seed: int, gameCount: int) -> int:
+    """ゲームごとのシードを生成する(プロセス数によらず同じ値になる)
 
-    # ロガー設定読み込み
-    with open(f'log_config.json', 'r') as f:
-        log_config: dict = json.load(f)
+    Args:
+        seed (int): 実行全体のシード
+        gameCount (int): ゲーム番号
 
-    # ログフォルダ作成
-    if not os.path.exists(f'./{LOG_FOLDER_NAME}'):
-        os.mkdir(f'./{LOG_FOLDER_NAME}')
+    Returns:
+        int: ゲームごとのシード
+    """
+    return int(np.random.SeedSequence(seed, spawn_key=(gameCount,)).generate_state(1)[0])
 
-    # ロガー設定
-    timestamp: str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_config["handlers"]["fileHandler3"]["filename"] = f'./{LOG_FOLDER_NAME}/{timestamp}_gs.log'
-
-    for gameCount in range(1, GAME_COUNT+1):
-        # ロガー設定
-        log_config["handlers"]["fileHandler1"]["filename"] = f'./{LOG_FOLDER_NAME}/{timestamp}_{gameCount:03}.log'
-        log_config["handlers"]["fileHandler2"]["filename"] = f'./{LOG_FOLDER_NAME}/{timestamp}_{gameCount:03}_gr.log'
-        # ロガー生成
-        logging.config.dictConfig(log_config)
+
+def configureLogging(log_config: dict, timestamp: str, gameCount: int | None, isConsole: bool) -> None:
+    """ロガーを設定する
+
+    Args:
+        log_config (dict): ロガー設定
+        timestamp (str): 実行開始時刻
+        gameCount (int | None): ゲーム番号(None の場合は親プロセスの設定)
+        isConsole (bool): ゲームのログをコンソールにも出力するか
+    """
+    config: dict = copy.deepcopy(log_config)
+    if gameCount is None:
+        # 親プロセス: 進捗とゲームの統計のみを出力する
+        config["handlers"]["fileHandler1"]["filename"] = f'./{LOG_FOLDER_NAME}/{timestamp}.log'
+        config["handlers"]["fileHandler3"]["filename"] = f'./{LOG_FOLDER_NAME}/{timestamp}_gs.log'
+    else:
+        # ゲーム: ゲームごとのファイルに出力する
+        config["handlers"]["fileHandler1"]["filename"] = f'./{LOG_FOLDER_NAME}/{timestamp}_{gameCount:03}.log'
+        del config["handlers"]["fileHandler3"]
+        del config["loggers"]["game_statistics"]
+        if not isConsole:
+            config["loggers"]["__main__"]["handlers"].remove("consoleHandler")
+    logging.config.dictConfig(config)
+
+
+class LogDispatcher(logging.Handler):
+    """キューから取り出したログを、ロガー名ごとの出力先に振り分ける
+    """
+
+    def __init__(self, handlers: dict[str, list[logging.Handler]]) -> None:
+        """コンストラクタ
+
+        Args:
+            handlers (dict[str, list[logging.Handler]]): ロガー名ごとの出力先
+        """
+        super().__init__()
+        self.__handlers__: dict[str, list[logging.Handler]] = handlers
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """ログをロガー名に対応する出力先に出力する
+
+        Args:
+            record (logging.LogRecord): ログ
+        """
+        for handler in self.__handlers__.get(record.name, []):
+            if handler.level <= record.levelno:
+                handler.handle(record)
+
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """同じプロセス内のキューにログを渡す(文字列化はリスナーのスレッドで行う)
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """プロセス間で受け渡さないため、文字列化もコピーもせずにそのまま渡す
+
+        Args:
+            record (logging.LogRecord): ログ
+
+        Returns:
+            logging.LogRecord: ログ
+        """
+        return record
+
+
+def addGameCount(record: logging.LogRecord) -> bool:
+    """ゲームの実行中であればログの先頭にゲーム番号を付与する(並列実行時に1つのファイルで区別するため)
+
+    Args:
+        record (logging.LogRecord): ログ
+
+    Returns:
+        bool: 常に True(ログを破棄しない)
+    """
+    if runningGameCount is not None:
+        record.msg = f'[{runningGameCount:03}] {record.msg}'
+    return True
+
+
+def isMainProcess(record: logging.LogRecord) -> bool:
+    """親プロセスのログか
+
+    Args:
+        record (logging.LogRecord): ログ
+
+    Returns:
+        bool: 親プロセスのログの場合 True
+    """
+    return record.processName == 'MainProcess'
+
+
+def configureQueueLogging(log_config: dict, logQueue: queue.SimpleQueue | multiprocessing.queues.Queue) -> None:
+    """ロガーの出力先をキューに設定する(ログの書き込みは startQueueLogging のリスナーが行う)
+
+    Args:
+        log_config (dict): ロガー設定
+        logQueue (queue.SimpleQueue | multiprocessing.queues.Queue): ログを受け渡すキュー
+    """
+    handler: logging.handlers.QueueHandler
+    if isinstance(logQueue, queue.SimpleQueue):
+        handler = LocalQueueHandler(logQueue)
+    else:
+        handler = logging.handlers.QueueHandler(logQueue)
+    handler.addFilter(addGameCount)
+    for (name, loggerConfig) in log_config["loggers"].items():
+        logger: logging.Logger = logging.getLogger(name)
+        for oldHandler in logger.handlers[:]:
+            logger.removeHandler(oldHandler)
+        logger.addHandler(handler)
+        logger.setLevel(loggerConfig["level"])
+        logger.propagate = False
+
+
+def startQueueLogging(log_config: dict, timestamp: str, logQueue: queue.SimpleQueue | multiprocessing.queues.Queue) -> logging.handlers.QueueListener:
+    """実行ごとのファイルに書き込むリスナーを開始し、ロガーの出力先をキューに設定する
+
+    Args:
+        log_config (dict): ロガー設定
+        timestamp (str): 実行開始時刻
+        logQueue (queue.SimpleQueue | multiprocessing.queues.Queue): ログを受け渡すキュー
+
+    Returns:
+        logging.handlers.QueueListener: リスナー(終了時に stop すること)
+    """
+    config: dict = copy.deepcopy(log_config)
+    config["handlers"]["fileHandler1"]["filename"] = f'./{LOG_FOLDER_NAME}/{timestamp}.log'
+    config["handlers"]["fileHandler3"]["filename"] = f'./{LOG_FOLDER_NAME}/{timestamp}_gs.log'
+    logging.config.dictConfig(config)
+
+    # 設定した出力先をロガーから取り外してリスナーで使用する
+    handlers: dict[str, list[logging.Handler]] = {name: logging.getLogger(name).handlers[:] for name in config["loggers"]}
+    if WORKER_COUNT != 1:
+        # 並列実行時はゲームのログをコンソールに出力しない
+        for handler in handlers["__main__"]:
+            if handler.get_name() == "consoleHandler":
+                handler.addFilter(isMainProcess)
+    configureQueueLogging(config, logQueue)
+
+    listener: logging.handlers.QueueListener = logging.handlers.QueueListener(logQueue, LogDispatcher(handlers))
+    listener.start()
+    return listener
+
+
+def playGame(gameCount: int, seed: int, log_config: dict, timestamp: str,
+             rerollMode: Yahtzee.HandChoiseMode, choiseMode: Yahtzee.HandChoiseMode, isConsole: bool) -> tuple[GameRecord, Instrumentation | None]:
+    """1ゲームを実行する
+
+    Args:
+        gameCount (int): ゲーム番号
+        seed (int): 実行全体のシード
+        log_config (dict): ロガー設定
+        timestamp (str): 実行開始時刻
+        rerollMode (Yahtzee.HandChoiseMode): 振り直し時の役選択/評価モード
+        choiseMode (Yahtzee.HandChoiseMode): 役選択モード
+        isConsole (bool): ゲームのログをコンソールにも出力するか
+
+    Returns:
+        GameRecord: ゲームの記録
+        Instrumentation | None: 呼び出し回数と処理時間(IS_INSTRUMENTED でない場合は None)
+    """
+    global runningGameCount
+
+    # ロガー生成
+    if IS_QUEUE_LOGGING:
+        runningGameCount = gameCount
+    else:
+        configureLogging(log_config, timestamp, gameCount, isConsole)
+    # 例外で終了した場合も、以降のログにゲーム番号が付かないよう戻す
+    try:
         logger: logging.Logger = logging.getLogger(__name__)
-        logger_gr: logging.Logger = logging.getLogger(f"game_record")
 
-        logger.info(f'== {gameCount:>2}/{GAME_COUNT}:')
+        # ゲームごとのサイコロの目の生成器(シードから同じ目の並びを再現できる)
+        gameSeed: int = getGameSeed(seed, gameCount)
+        roller: Yahtzee.DiceRoller = Yahtzee.DiceRoller(np.random.default_rng(gameSeed))
+        # 振り直し選択時に出目をサンプリングする乱数生成器(サイコロの目の並びに影響しないよう別にする)
+        sampler: random.Random = random.Random(gameSeed)
+
+        logger.info(f'== {gameCount:>2}/{GAME_COUNT}: (seed: {gameSeed})')
+        record: GameRecord = GameRecord(gameCount, gameSeed, MAX_ROLL_COUNT)
+        # 呼び出し回数と処理時間(役選択の呼び出し回数はゲーム開始時からのキャッシュの参照回数とする)
+        instrumentation: Instrumentation | None = Instrumentation() if IS_INSTRUMENTED else None
+        cacheStatistics: dict[str, int] = evaluationCache.getStatistics()
+
+        # 最適戦略(HandChoiseMode.Optimal 使用時のみ読み込む)
+        solver: Solver | None = None
+        if Yahtzee.HandChoiseMode.Optimal in [rerollMode, choiseMode]:
+            solver = Solver.load()
 
         field = Yahtzee.Field(logger)
         field.print()
 
         for choiseCount in range(len(Yahtzee.Hands)):
+            turnStartTime: float = time.perf_counter()
             logger.info(f'=== {choiseCount+1:>2}/{len(Yahtzee.Hands)}:')
             dice: Yahtzee.Dice = Yahtzee.Dice()
-            evaluator: Yahtzee.Evaluator = Yahtzee.Evaluator(field, logger, rerollMode)
+            evaluator: Yahtzee.Evaluator = Yahtzee.Evaluator(field, logger, rerollMode, IS_LOOKAHEAD, solver, evaluationCache, instrumentation)
 
             # 1投目
-            dice.rollAll()
+            dice.rollAll(roller)
             logger.info(f'{"Dice1":<15}: {dice}')
-            logger_gr.info(f'd:{dice}')
+            # 投げるごとのサイコロと振り直し(振らなかった回は直前のサイコロと振り直しなしを記録する)
+            indexes: list[int] = [dice.index()]
+            bits: list[int] = []
 
-            for rollCount in [2, 3]:
+            for rollCount in range(2, MAX_ROLL_COUNT+1):
                 # n投目のサイコロを決める
-                reroll: Yahtzee.Reroll = evaluator.choiseReroll(dice, rerollMode, choiseMode)
-                logger.info(f'{f"Reroll{rollCount}":<15}: {reroll}')
-                logger_gr.info(f'r:{reroll}')
-                # n投目のサイコロが存在しない場合は抜ける
+                rerollStartTime: float = time.perf_counter()
+                if REROLL_TIME_BUDGET is None:
+                    reroll: Yahtzee.Reroll = evaluator.choiseReroll(dice, rerollMode, choiseMode, MAX_ROLL_COUNT - rollCount + 1)
+                    logger.info(f'{f"Reroll{rollCount}":<15}: {reroll}')
+                else:
+                    (reroll, confidence) = evaluator.choiseRerollAnytime(dice, rerollMode, choiseMode, MAX_ROLL_COUNT - rollCount + 1,
+                                                                         REROLL_TIME_BUDGET, None, sampler)
+                    logger.info(f'{f"Reroll{rollCount}":<15}: {reroll} (confidence: {confidence:.2%})')
+                if instrumentation is not None:
+                    instrumentation.observe('choiseReroll', time.perf_counter() - rerollStartTime)
+                bits.append(reroll.toBit())
+                # n投目のサイコロが存在しない場合は振らない(残りの振り直し回数によって選択が変わる場合があるため抜けない)
                 if not reroll.exist():
-                    break
+                    indexes.append(dice.index())
+                    continue
 
                 # n投目
-                dice.reroll(reroll)
+                dice.reroll(reroll, roller)
                 logger.info(f'{f"Dice{rollCount}":<15}: {dice}')
-                logger_gr.info(f'd:{dice}')
+                indexes.append(dice.index())
 
             # 役を決定する
             (hand, _) = evaluator.choiseHand(dice, choiseMode)
             field.setDice(hand, dice)
 
             logger.info(f'{"Choise":<15}: {hand.name}')
-            logger_gr.info(f'c:{hand.name}')
+            record.addTurn(indexes, bits, hand)
             field.print()
+            if instrumentation is not None:
+                instrumentation.observe('turn', time.perf_counter() - turnStartTime)
+
+        logger.info(f'{"Cache":<15}: {evaluationCache}')
+        record.setPoints(field.sum())
+        if instrumentation is not None:
+            statistics: dict[str, int] = evaluationCache.getStatistics()
+            hits: int = statistics['hits'] - cacheStatistics['hits']
+            misses: int = statistics['misses'] - cacheStatistics['misses']
+            instrumentation.count('choiseHand', hits + misses)
+            instrumentation.count('cacheHits', hits)
+            instrumentation.count('cacheMisses', misses)
+            logger.info('\n'.join([f'{"Instrumentation":<15}:'] + instrumentation.toLines()))
+        return (record, instrumentation)
+    finally:
+        runningGameCount = None
+
 
-        sumList = np.append(sumList, field.sum())
+def main() -> None:
+    rerollMode: Yahtzee.HandChoiseMode = Yahtzee.HandChoiseMode.MaximumGain
+    choiseMode: Yahtzee.HandChoiseMode = Yahtzee.HandChoiseMode.Balance
+
+    # ロガー設定読み込み
+    with open(f'log_config.json', 'r') as f:
+        log_config: dict = json.load(f)
+
+    # ログフォルダ作成
+    if not os.path.exists(f'./{LOG_FOLDER_NAME}'):
+        os.mkdir(f'./{LOG_FOLDER_NAME}')
+
+    # ロガー設定
+    timestamp: str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    logQueue: queue.SimpleQueue | multiprocessing.queues.Queue | None = None
+    listener: logging.handlers.QueueListener | None = None
+    if IS_QUEUE_LOGGING:
+        # ログは1つの設定のまま、リスナーのスレッドで書き込む(並列実行時はプロセス間のキューを使用する)
+        logQueue = queue.SimpleQueue() if WORKER_COUNT == 1 else multiprocessing.Queue()
+        listener = startQueueLogging(log_config, timestamp, logQueue)
+    else:
+        configureLogging(log_config, timestamp, None, False)
+    logger: logging.Logger = logging.getLogger(__name__)
+
+    # 最適戦略は各プロセスで読み込むため、事前に作成して保存しておく
+    if Yahtzee.HandChoiseMode.Optimal in [rerollMode, choiseMode]:
+        Solver.loadOrBuild(logger)
+
+    # ゲームごとのログはゲームごとのファイルに出力し、並列実行時はコンソールに出力しない
+    game: functools.partial = functools.partial(playGame, seed=SEED, log_config=log_config, timestamp=timestamp,
+                                                rerollMode=rerollMode, choiseMode=choiseMode, isConsole=(WORKER_COUNT == 1))
+    results: dict[int, int] = {}
+    # 合計点の統計(終了したゲームから順に更新する)
+    statistics: ScoreStatistics = ScoreStatistics()
+    # 実行全体の呼び出し回数と処理時間
+    totalInstrumentation: Instrumentation = Instrumentation()
+    # ゲームの記録は終了したゲームから順に1つのファイルに追記する
+    with GameRecordWriter(f'./{LOG_FOLDER_NAME}/{timestamp}.yzgr', MAX_ROLL_COUNT, rerollMode, choiseMode, IS_LOOKAHEAD) as writer:
+        if WORKER_COUNT == 1:
+            for gameCount in range(1, GAME_COUNT+1):
+                (record, instrumentation) = game(gameCount)
+                writer.write(record)
+                if instrumentation is not None:
+                    totalInstrumentation.merge(instrumentation)
+                results[gameCount] = record.getPoints()
+                statistics.addRecord(record)
+                if statistics.count() % STATISTICS_INTERVAL == 0:
+                    logger.info(f'{"Statistics":<15}: {statistics}')
+                if not IS_QUEUE_LOGGING:
+                    configureLogging(log_config, timestamp, None, False)
+        else:
+            initializer: functools.partial | None = None
+            if IS_QUEUE_LOGGING:
+                initializer = functools.partial(configureQueueLogging, log_config, logQueue)
+            with multiprocessing.Pool(WORKER_COUNT, initializer) as pool:
+                for (record, instrumentation) in pool.imap_unordered(game, range(1, GAME_COUNT+1)):
+                    writer.write(record)
+                    if instrumentation is not None:
+                        totalInstrumentation.merge(instrumentation)
+                    results[record.getGameCount()] = record.getPoints()
+                    statistics.addRecord(record)
+                    logger.info(f'== {record.getGameCount():>2}/{GAME_COUNT}: {record.getPoints():>3} ({len(results)} done)')
+                    if statistics.count() % STATISTICS_INTERVAL == 0:
+                        logger.info(f'{"Statistics":<15}: {statistics}')
+                # 終了時の terminate でログのキューへの書き込み中のプロセスが停止しないよう、正常に終了させる
+                pool.close()
+                pool.join()
 
     # ロガー生成
     logger_gs: logging.Logger = logging.getLogger(f"game_statistics")
 
+    # ゲーム番号順に出力する
     logger_gs.info(f'Points:')
-    for sum in sumList:
-        logger_gs.info(f' {sum:3}')
+    for gameCount in sorted(results):
+        logger_gs.info(f' {results[gameCount]:3}')
     logger_gs.info(f'RerollMode: {rerollMode.name}')
     logger_gs.info(f'ChoiseMode: {choiseMode.name}')
-    logger_gs.info(f'Maximum: {np.amax(sumList): >3.3f}')
-    logger_gs.info(f'Minimum: {np.amin(sumList): >3.3f}')
-    logger_gs.info(f'Average: {np.mean(sumList): >3.3f}')
-    logger_gs.info(f'Median: {np.median(sumList): >3.3f}')
-    logger_gs.info(f'Std.dev: {np.std(sumList): >3.3f}')
+    logger_gs.info(f'Seed: {SEED}')
+    logger_gs.info(f'Maximum: {statistics.max(): >3.3f}')
+    logger_gs.info(f'Minimum: {statistics.min(): >3.3f}')
+    logger_gs.info(f'Average: {statistics.mean(): >3.3f}')
+    logger_gs.info(f'Median: {statistics.median(): >3.3f}')
+    logger_gs.info(f'Std.dev: {statistics.std(): >3.3f}')
+    logger_gs.info(f'Quantiles: 10%: {statistics.quantile(0.1): >3.3f} 25%: {statistics.quantile(0.25): >3.3f} '
+                   f'75%: {statistics.quantile(0.75): >3.3f} 90%: {statistics.quantile(0.9): >3.3f}')
+    logger_gs.info(f'Bonus: {statistics.getBonusRate(): >7.2%}')
+    logger_gs.info(f'Hands:')
+    for line in statistics.getHandLines():
+        logger_gs.info(f' {line}')
+    if IS_INSTRUMENTED:
+        logger_gs.info(f'Instrumentation:')
+        for line in totalInstrumentation.toLines():
+            logger_gs.info(f' {line}')
+
+    if listener is not None:
+        listener.stop()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import logging
+import time
+
+import numpy as np
+
+from BatchSimulator import ModeBatchPolicy
+from DiceTable import DiceTable
+from Solver import Solver
+from Yahtzee import Dice, EvaluationCache, Evaluator, Field, FieldState, HandChoiseMode, Hands
+
+# 定数定義
+POSITION_COUNT: int = 10000  # 計測に使用する局面数
+EVALUATOR_POSITION_COUNT: int = 200  # 比較のため Evaluator で評価する局面数
+SEED: int = 0  # 局面のシード
+MAX_ROLL_COUNT: int = Solver.NUM_OF_REROLLS + 1  # 1ターンでサイコロを振る最大回数
+
+
+class BatchAdvisor:
+    """多数の局面(場の状態, サイコロ, 投目)の振り直しと役をまとめて選択する
+
+    局面は場の状態(未割り当ての役のビットマスク, 数字役の合計点)ごとにまとめて評価し、
+    役ごとの評価表と残す目ごとの評価値は1回の呼び出しの中で共有する。
+    Evaluator(IS_LOOKAHEAD = False)と同じ選択をする。
+    """
+
+    def __init__(self, rerollMode: HandChoiseMode, choiseMode: HandChoiseMode, solver: Solver | None = None) -> None:
+        """コンストラクタ
+
+        Args:
+            rerollMode (HandChoiseMode): 振り直し時の役選択/評価モード
+            choiseMode (HandChoiseMode): 役選択モード
+            solver (Solver | None, optional): 最適戦略(HandChoiseMode.Optimal 使用時に必要). Defaults to None.
+        """
+        # 状態ごとの評価表(advise の呼び出しごとに破棄する)
+        self.__cache__: dict[tuple, np.ndarray] = {}
+        self.__policy__: ModeBatchPolicy = ModeBatchPolicy(rerollMode, choiseMode, solver, self.__cache__)
+
+    @classmethod
+    def toArrays(cls, positions: list[tuple[FieldState, Dice, int]]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """局面の一覧を advise の引数の配列に変換する
+
+        Args:
+            positions (list[tuple[FieldState, Dice, int]]): (場の状態, サイコロ, 投目)の一覧
+
+        Returns:
+            np.ndarray: 未割り当ての役のビットマスク(N)
+            np.ndarray: 数字役の合計点(N)
+            np.ndarray: サイコロのインデックス(N)
+            np.ndarray: 投目(N, 1 - MAX_ROLL_COUNT)
+        """
+        return (np.array([state.getOpenMask() for (state, _, _) in positions], dtype=np.int64),
+                np.array([state.getSumOfNumHands() for (state, _, _) in positions], dtype=np.int64),
+                np.array([dice.index() for (_, dice, _) in positions], dtype=np.int64),
+                np.array([rollCount for (_, _, rollCount) in positions], dtype=np.int64))
+
+    def advise(self, openMasks: np.ndarray, uppers: np.ndarray, indexes: np.ndarray, rollCounts: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """局面ごとに振り直しまたは役を選択する
+
+        投目が MAX_ROLL_COUNT 未満の局面は振り直しを、MAX_ROLL_COUNT の局面は役を選択する。
+
+        Args:
+            openMasks (np.ndarray): 未割り当ての役のビットマスク(N)
+            uppers (np.ndarray): 数字役の合計点(N)
+            indexes (np.ndarray): サイコロのインデックス(N)
+            rollCounts (np.ndarray): 投目(N, 1 - MAX_ROLL_COUNT)
+
+        Returns:
+            np.ndarray: 振り直しのビット(N, 役を選択した局面は 0)
+            np.ndarray: 役の列番号(N, Handsの定義順. 振り直しを選択した局面は -1)
+            np.ndarray: 評価値(N, 振り直しは Evaluator.evaluateReroll、役は Evaluator.choiseHand の戻り値と同じ.
+                        ただし最適戦略の場合は現在の点を含まない)
+        """
+        assert (0 < openMasks).all() and (1 <= rollCounts).all() and (rollCounts <= MAX_ROLL_COUNT).all()
+
+        bits: np.ndarray = np.zeros(len(indexes), dtype=np.int64)
+        columns: np.ndarray = np.full(len(indexes), -1, dtype=np.int64)
+        values: np.ndarray = np.zeros(len(indexes))
+        try:
+            for rollCount in np.unique(rollCounts).tolist():
+                positions: np.ndarray = np.nonzero(rollCounts == rollCount)[0]
+                if rollCount == MAX_ROLL_COUNT:
+                    (columns[positions], values[positions]) = self.__policy__.evaluateHands(indexes[positions], openMasks[positions], uppers[positions])
+                else:
+                    (bits[positions], values[positions]) = self.__policy__.evaluateRerolls(indexes[positions], openMasks[positions], uppers[positions],
+                                                                                           MAX_ROLL_COUNT - rollCount)
+        finally:
+            self.__cache__.clear()
+        return (bits, columns, values)
+
+
+def makePositions(seed: int, count: int) -> list[tuple[FieldState, Dice, int]]:
+    """計測に使用する局面を作成する(割り当て済の役の点はランダムなサイコロを割り当てたときの点とする)
+
+    Args:
+        seed (int): シード
+        count (int): 局面の数
+
+    Returns:
+        list[tuple[FieldState, Dice, int]]: (場の状態, サイコロ, 投目)の一覧
+    """
+    generator: np.random.Generator = np.random.default_rng(seed)
+    positions: list[tuple[FieldState, Dice, int]] = []
+    for _ in range(count):
+        state: FieldState = FieldState.INITIAL
+        for column in generator.permutation(len(Hands))[:int(generator.integers(len(Hands)))].tolist():
+            state = state.setHand(list(Hands)[column], int(DiceTable.POINTS[int(generator.integers(Dice.NUM_OF_STATES)), column]))
+        dice: Dice = Dice(generator.integers(1, 7, Dice.NUM_OF_DICE).tolist())
+        positions.append((state, dice, int(generator.integers(1, MAX_ROLL_COUNT + 1))))
+    return positions
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger: logging.Logger = logging.getLogger(__name__)
+
+    rerollMode: HandChoiseMode = HandChoiseMode.MaximumGain
+    choiseMode: HandChoiseMode = HandChoiseMode.Balance
+
+    positions: list[tuple[FieldState, Dice, int]] = makePositions(SEED, POSITION_COUNT)
+    (openMasks, uppers, indexes, rollCounts) = BatchAdvisor.toArrays(positions)
+    advisor: BatchAdvisor = BatchAdvisor(rerollMode, choiseMode)
+
+    startTime: float = time.perf_counter()
+    (bits, columns, _) = advisor.advise(openMasks, uppers, indexes, rollCounts)
+    batchTime: float = time.perf_counter() - startTime
+    numOfStates: int = len(np.unique(openMasks * Solver.NUM_OF_UPPERS + np.minimum(uppers, Field.BONUS_BORDER)))
+    logger.info(f'{"BatchAdvisor":<15}: {len(positions)} positions {batchTime:.3f}s ({len(positions) / batchTime:.1f} positions/s, '
+                f'{batchTime / len(positions) * 1e6:.1f}us/position, {numOfStates} field states)')
+
+    # 比較: Evaluator で1局面ずつ評価する(局面ごとに場の状態が異なるため、キャッシュは局面ごとに作成する)
+    sample: list[tuple[FieldState, Dice, int]] = positions[:EVALUATOR_POSITION_COUNT]
+    numOfDiffs: int = 0
+    startTime = time.perf_counter()
+    for (position, (state, dice, rollCount)) in enumerate(sample):
+        evaluator: Evaluator = Evaluator(state, logger, rerollMode, False, None, EvaluationCache())
+        if rollCount == MAX_ROLL_COUNT:
+            (hand, _) = evaluator.choiseHand(dice, choiseMode)
+            numOfDiffs += int(list(Hands).index(hand) != columns[position])
+        else:
+            bit: int = evaluator.choiseReroll(dice, rerollMode, choiseMode, MAX_ROLL_COUNT - rollCount).toBit()
+            numOfDiffs += int(bit != bits[position])
+    evaluatorTime: float = time.perf_counter() - startTime
+    logger.info(f'{"Evaluator":<15}: {len(sample)} positions {evaluatorTime:.3f}s ({len(sample) / evaluatorTime:.1f} positions/s, '
+                f'{evaluatorTime / len(sample) * 1e6:.1f}us/position, differences: {numOfDiffs})')
+
+
+if __name__ == '__main__':
+    main()
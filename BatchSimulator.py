@@ -0,0 +1,382 @@
+from __future__ import annotations
+
+import logging
+import time
+from typing import Callable
+
+import numpy as np
+
+from DiceTable import DiceTable
+from Solver import Solver
+from Yahtzee import Dice, Die, Field, HandChoiseMode
+
+
+class BatchPolicy:
+    """複数ゲーム分の振り直しと役をまとめて選択する戦略の基底クラス
+
+    サイコロはインデックス(Dice.index())、役は列番号(Handsの定義順)、振り直しはビット(Reroll)で表す。
+    """
+
+    def choiseRerolls(self, indexes: np.ndarray, openMasks: np.ndarray, uppers: np.ndarray, rerollCount: int) -> np.ndarray:
+        """振り直すサイコロを選択する
+
+        Args:
+            indexes (np.ndarray): 現在のサイコロのインデックス(N)
+            openMasks (np.ndarray): 未割り当ての役のビットマスク(N)
+            uppers (np.ndarray): 数字役の合計点(N)
+            rerollCount (int): 今回を含む残りの振り直し回数
+
+        Returns:
+            np.ndarray: 振り直しのビット(N)
+        """
+        raise NotImplementedError
+
+    def choiseHands(self, indexes: np.ndarray, openMasks: np.ndarray, uppers: np.ndarray) -> np.ndarray:
+        """役を選択する
+
+        Args:
+            indexes (np.ndarray): 現在のサイコロのインデックス(N)
+            openMasks (np.ndarray): 未割り当ての役のビットマスク(N)
+            uppers (np.ndarray): 数字役の合計点(N)
+
+        Returns:
+            np.ndarray: 役の列番号(N)
+        """
+        raise NotImplementedError
+
+
+class ModeBatchPolicy(BatchPolicy):
+    """HandChoiseMode の組み合わせで振り直しと役を選択する戦略
+
+    AutoYahtzee(IS_LOOKAHEAD = False)と同じ選択をする。
+    """
+
+    # 定数定義
+    CHUNK_SIZE: int = 512  # まとめて評価する状態数の上限
+
+    def __init__(self, rerollMode: HandChoiseMode, choiseMode: HandChoiseMode, solver: Solver | None = None,
+                 cache: dict[tuple, np.ndarray] | None = None) -> None:
+        """コンストラクタ
+
+        Args:
+            rerollMode (HandChoiseMode): 振り直し時の役選択/評価モード
+            choiseMode (HandChoiseMode): 役選択モード
+            solver (Solver | None, optional): 最適戦略(HandChoiseMode.Optimal 使用時に必要). Defaults to None.
+            cache (dict[tuple, np.ndarray] | None, optional): 状態ごとの評価表のキャッシュ(複数の戦略で共有できる). Defaults to None.
+        """
+        assert solver is not None or HandChoiseMode.Optimal not in [rerollMode, choiseMode]
+
+        self.__rerollMode__: HandChoiseMode = rerollMode
+        self.__choiseMode__: HandChoiseMode = choiseMode
+        self.__solver__: Solver | None = solver
+        self.__cache__: dict[tuple, np.ndarray] | None = cache
+
+    def __cached__(self, name: tuple, keys: np.ndarray, compute: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """状態ごとの評価表をキャッシュから取得する(未計算の状態のみ計算する)
+
+        Args:
+            name (tuple): 評価表の種類
+            keys (np.ndarray): 状態のキー(S, 未割り当ての役のビットマスク * NUM_OF_UPPERS + 数字役の合計点)
+            compute (Callable[[np.ndarray], np.ndarray]): 状態のキーから評価表(最後の軸が状態)を計算する関数
+
+        Returns:
+            np.ndarray: 評価表(最後の軸が状態)
+        """
+        if self.__cache__ is None:
+            return compute(keys)
+
+        missingKeys: list[int] = [key for key in keys.tolist() if (name, key) not in self.__cache__]
+        if len(missingKeys) != 0:
+            values: np.ndarray = compute(np.array(missingKeys))
+            for (column, key) in enumerate(missingKeys):
+                self.__cache__[(name, key)] = values[..., column]
+        return np.stack([self.__cache__[(name, key)] for key in keys.tolist()], axis=-1)
+
+    def __handValues__(self, points: np.ndarray, openMasks: np.ndarray, uppers: np.ndarray,
+                       modeAtHandChoise: HandChoiseMode, modeAtReturnPoint: HandChoiseMode) -> tuple[np.ndarray, np.ndarray]:
+        """役を選択する(Evaluator.choiseHand と同じ選択をする)
+
+        Args:
+            points (np.ndarray): 役ごとの点数(X x S x NUM_OF_HANDS)
+            openMasks (np.ndarray): 未割り当ての役のビットマスク(S)
+            uppers (np.ndarray): 数字役の合計点(S)
+            modeAtHandChoise (HandChoiseMode): 選択モード(役選択時)
+            modeAtReturnPoint (HandChoiseMode): 選択モード(戻り値)
+
+        Returns:
+            np.ndarray: 選択した役の列番号(X x S)
+            np.ndarray: 選択モード(戻り値)に応じた値(X x S)
+        """
+        columns: np.ndarray = np.arange(DiceTable.NUM_OF_HANDS)
+        isOpen: np.ndarray = (openMasks[:, np.newaxis] >> columns) & 1 == 1
+        # ボーナスが未取得で、役がボーナスの対象の場合(Field.getInfoToSet と同じ計算)
+        isTarget: np.ndarray = (uppers[:, np.newaxis] < Field.BONUS_BORDER) & DiceTable.IS_NUM_HAND
+        isReached: np.ndarray = Field.BONUS_BORDER <= uppers[:, np.newaxis] + points
+        openNumBest: np.ndarray = (isOpen & DiceTable.IS_NUM_HAND) @ DiceTable.BEST_POINTS
+        maxSumOfOtherNumHands: np.ndarray = uppers[:, np.newaxis] + openNumBest[:, np.newaxis] - DiceTable.BEST_POINTS
+        isLost: np.ndarray = ~isReached & (maxSumOfOtherNumHands + points < Field.BONUS_BORDER) & (Field.BONUS_BORDER <= maxSumOfOtherNumHands + DiceTable.BEST_POINTS)
+        bonusPoints: np.ndarray = np.where(isTarget & isReached, Field.POINT_BONUS, 0)
+        maxBonusPoints: np.ndarray = np.where(isTarget & (isReached | isLost), Field.POINT_BONUS, 0)
+        gainedPoints: np.ndarray = points + bonusPoints
+        lostPoints: np.ndarray = gainedPoints - (DiceTable.BEST_POINTS + maxBonusPoints)
+
+        def toValues(mode: HandChoiseMode) -> np.ndarray:
+            match mode:
+                case HandChoiseMode.MaximumGain:
+                    return gainedPoints
+                case HandChoiseMode.MinimumLost:
+                    return lostPoints
+                case HandChoiseMode.Balance:
+                    return gainedPoints + lostPoints
+                case HandChoiseMode.Optimal:
+                    assert self.__solver__ is not None
+                    nextMasks: np.ndarray = openMasks[:, np.newaxis] & ~(1 << columns)
+                    nextUppers: np.ndarray = np.where(DiceTable.IS_NUM_HAND, uppers[:, np.newaxis] + gainedPoints, uppers[:, np.newaxis])
+                    return gainedPoints + self.__solver__.getValues()[nextMasks, np.minimum(nextUppers, Field.BONUS_BORDER)]
+            assert False
+
+        comparedPoints: np.ndarray = np.where(isOpen, toValues(modeAtHandChoise), -np.inf)
+        retColumns: np.ndarray = np.argmax(comparedPoints, axis=-1)
+        retValues: np.ndarray = np.take_along_axis(toValues(modeAtReturnPoint), retColumns[..., np.newaxis], axis=-1)[..., 0]
+        return (retColumns, retValues)
+
+    def choiseHands(self, indexes: np.ndarray, openMasks: np.ndarray, uppers: np.ndarray) -> np.ndarray:
+        return self.evaluateHands(indexes, openMasks, uppers)[0]
+
+    def evaluateHands(self, indexes: np.ndarray, openMasks: np.ndarray, uppers: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """役を選択し、選択した役の評価値を求める
+
+        Args:
+            indexes (np.ndarray): 現在のサイコロのインデックス(N)
+            openMasks (np.ndarray): 未割り当ての役のビットマスク(N)
+            uppers (np.ndarray): 数字役の合計点(N)
+
+        Returns:
+            np.ndarray: 役の列番号(N)
+            np.ndarray: 役選択モードに応じた値(N, 最適戦略の場合は現在の点を除く最終ターンまでに得られる点の期待値)
+        """
+        (columns, values) = self.__handValues__(DiceTable.POINTS[indexes][np.newaxis], openMasks, uppers, self.__choiseMode__, self.__choiseMode__)
+        return (columns[0], values[0])
+
+    def __keepValues__(self, keys: np.ndarray, rerollCount: int) -> tuple[np.ndarray, np.ndarray | None]:
+        """状態ごとに残す目ごとの評価値を求める
+
+        Args:
+            keys (np.ndarray): 状態のキー(S, 未割り当ての役のビットマスク * NUM_OF_UPPERS + 数字役の合計点)
+            rerollCount (int): 今回を含む残りの振り直し回数
+
+        Returns:
+            np.ndarray: 残す目ごとの評価値(最適戦略の場合は期待値、それ以外は出目の出現数による重み付き合計)(残す目の個数 x S)
+            np.ndarray | None: 振り直しなし時の役選択による評価値の差分(NUM_OF_STATES x S, 最適戦略の場合は None)
+        """
+        if self.__rerollMode__ == HandChoiseMode.Optimal:
+            assert self.__solver__ is not None
+            solver: Solver = self.__solver__
+            return (self.__cached__(('turn', rerollCount), keys,
+                                    lambda k: solver.solveTurns(k // Solver.NUM_OF_UPPERS, k % Solver.NUM_OF_UPPERS)[rerollCount - 1]), None)
+
+        def handValues(modeAtHandChoise: HandChoiseMode, modeAtReturnPoint: HandChoiseMode) -> np.ndarray:
+            return self.__cached__(('hand', modeAtHandChoise, modeAtReturnPoint), keys,
+                                   lambda k: self.__handValues__(DiceTable.POINTS[:, np.newaxis, :], k // Solver.NUM_OF_UPPERS, k % Solver.NUM_OF_UPPERS,
+                                                                 modeAtHandChoise, modeAtReturnPoint)[1])
+
+        # Evaluator.evaluateReroll と同様に、振り直し後の目が現在の目と同じ場合のみ振り直しなし時の役選択モードで評価する
+        evaluatedPoints: np.ndarray = handValues(self.__rerollMode__, self.__rerollMode__)
+        selfPoints: np.ndarray = handValues(self.__choiseMode__, self.__rerollMode__)
+        # keys は昇順のため、未計算の状態の列は二分探索で求める
+        keepValues: np.ndarray = self.__cached__(('keep', self.__rerollMode__), keys,
+                                                 lambda k: DiceTable.COUNTS @ evaluatedPoints[:, np.searchsorted(keys, k)])
+        return (keepValues, selfPoints - evaluatedPoints)
+
+    def choiseRerolls(self, indexes: np.ndarray, openMasks: np.ndarray, uppers: np.ndarray, rerollCount: int) -> np.ndarray:
+        return self.evaluateRerolls(indexes, openMasks, uppers, rerollCount)[0]
+
+    def evaluateRerolls(self, indexes: np.ndarray, openMasks: np.ndarray, uppers: np.ndarray, rerollCount: int) -> tuple[np.ndarray, np.ndarray]:
+        """振り直すサイコロを選択し、選択した振り直しの評価値を求める
+
+        評価は状態(未割り当ての役のビットマスク, 数字役の合計点)ごとにまとめて行う。
+
+        Args:
+            indexes (np.ndarray): 現在のサイコロのインデックス(N)
+            openMasks (np.ndarray): 未割り当ての役のビットマスク(N)
+            uppers (np.ndarray): 数字役の合計点(N)
+            rerollCount (int): 今回を含む残りの振り直し回数
+
+        Returns:
+            np.ndarray: 振り直しのビット(N)
+            np.ndarray: 振り直し時の評価値の平均値(N, 最適戦略の場合は現在の点を除く最終ターンまでに得られる点の期待値)
+        """
+        uppers = np.minimum(uppers, Field.BONUS_BORDER)
+        (keys, inverse) = np.unique(openMasks * Solver.NUM_OF_UPPERS + uppers, return_inverse=True)
+        bits: np.ndarray = np.zeros(len(indexes), dtype=np.int64)
+        values: np.ndarray = np.zeros(len(indexes))
+        for start in range(0, len(keys), ModeBatchPolicy.CHUNK_SIZE):
+            chunkKeys: np.ndarray = keys[start:start + ModeBatchPolicy.CHUNK_SIZE]
+            (keepValues, selfDiffs) = self.__keepValues__(chunkKeys, rerollCount)
+
+            games: np.ndarray = np.nonzero((start <= inverse) & (inverse < start + len(chunkKeys)))[0]
+            gameIndexes: np.ndarray = indexes[games][:, np.newaxis]
+            states: np.ndarray = (inverse[games] - start)[:, np.newaxis]
+            keeps: np.ndarray = DiceTable.INDEX_TO_KEEP[gameIndexes[:, 0]]
+            expected: np.ndarray = keepValues[keeps, states]
+            if selfDiffs is not None:
+                # 整数のまま合計してから割ることで Evaluator.evaluateReroll と同じ値にする
+                expected = (expected + DiceTable.COUNTS[keeps, gameIndexes] * selfDiffs[gameIndexes, states]) / DiceTable.TOTALS[keeps]
+            columns: np.ndarray = np.argmax(expected, axis=1) if selfDiffs is not None else Solver.argmax(expected, axis=1)
+            bits[games] = DiceTable.INDEX_TO_BIT[gameIndexes[:, 0], columns]
+            values[games] = expected[np.arange(len(games)), columns]
+        return (bits, values)
+
+
+class BatchSimulator:
+    """複数ゲームを numpy の配列でまとめて進める
+    """
+
+    # 定数定義
+    MAX_ROLL_COUNT: int = 3  # 1ターンでサイコロを振る最大回数
+
+    def __init__(self, policy: BatchPolicy, numOfGames: int, rng: np.random.Generator) -> None:
+        """コンストラクタ
+
+        Args:
+            policy (BatchPolicy): 戦略
+            numOfGames (int): ゲーム数
+            rng (np.random.Generator): 乱数生成器
+        """
+        self.__policy__: BatchPolicy = policy
+        self.__rng__: np.random.Generator = rng
+        # サイコロの目(N x NUM_OF_DICE, 昇順)
+        self.__dice__: np.ndarray = np.zeros((numOfGames, Dice.NUM_OF_DICE), dtype=np.int64)
+        # 役ごとの点数(N x NUM_OF_HANDS)
+        self.__scores__: np.ndarray = np.zeros((numOfGames, DiceTable.NUM_OF_HANDS), dtype=np.int64)
+        # 未割り当ての役のビットマスク(N)
+        self.__openMasks__: np.ndarray = np.full(numOfGames, pow(2, DiceTable.NUM_OF_HANDS) - 1, dtype=np.int64)
+        # 数字役の合計点(N)
+        self.__uppers__: np.ndarray = np.zeros(numOfGames, dtype=np.int64)
+        # ボーナス点(N)
+        self.__bonus__: np.ndarray = np.zeros(numOfGames, dtype=np.int64)
+
+    def indexes(self) -> np.ndarray:
+        """サイコロのインデックスを取得する
+
+        Returns:
+            np.ndarray: サイコロのインデックス(N)
+        """
+        return DiceTable.indexOfPips(self.__dice__)
+
+    def rollAll(self) -> None:
+        """すべてのゲームのすべてのサイコロを振る
+        """
+        self.__dice__ = np.sort(self.__rng__.integers(Die.MIN_OF_PIP, Die.MAX_OF_PIP + 1, self.__dice__.shape), axis=1)
+
+    def reroll(self, bits: np.ndarray) -> None:
+        """ゲームごとに指定のサイコロを振り直す
+
+        Args:
+            bits (np.ndarray): 振り直しのビット(N)
+        """
+        isRerolled: np.ndarray = (bits[:, np.newaxis] >> np.arange(Dice.NUM_OF_DICE)) & 1 == 1
+        pips: np.ndarray = self.__rng__.integers(Die.MIN_OF_PIP, Die.MAX_OF_PIP + 1, self.__dice__.shape)
+        self.__dice__ = np.sort(np.where(isRerolled, pips, self.__dice__), axis=1)
+
+    def setHands(self, columns: np.ndarray) -> None:
+        """ゲームごとに役にサイコロを割り当てる
+
+        Args:
+            columns (np.ndarray): 役の列番号(N)
+        """
+        games: np.ndarray = np.arange(len(columns))
+        assert ((self.__openMasks__ >> columns) & 1 == 1).all()
+
+        points: np.ndarray = DiceTable.POINTS[self.indexes(), columns]
+        self.__scores__[games, columns] = points
+        self.__openMasks__ &= ~(1 << columns)
+
+        isNumHand: np.ndarray = DiceTable.IS_NUM_HAND[columns]
+        self.__uppers__ += np.where(isNumHand, points, 0)
+        isBonus: np.ndarray = isNumHand & (self.__bonus__ == 0) & (Field.BONUS_BORDER <= self.__uppers__)
+        self.__bonus__[isBonus] = Field.POINT_BONUS
+
+    def playTurn(self) -> None:
+        """すべてのゲームを1ターン進める
+        """
+        self.rollAll()
+        for rollCount in range(2, BatchSimulator.MAX_ROLL_COUNT + 1):
+            bits: np.ndarray = self.__policy__.choiseRerolls(self.indexes(), self.__openMasks__, self.__uppers__, BatchSimulator.MAX_ROLL_COUNT - rollCount + 1)
+            self.reroll(bits)
+        self.setHands(self.__policy__.choiseHands(self.indexes(), self.__openMasks__, self.__uppers__))
+
+    def play(self) -> np.ndarray:
+        """すべてのゲームを最後まで進める
+
+        Returns:
+            np.ndarray: ゲームごとの合計点(N)
+        """
+        for _ in range(DiceTable.NUM_OF_HANDS):
+            self.playTurn()
+        return self.sums()
+
+    def scores(self) -> np.ndarray:
+        """役ごとの点数を取得する
+
+        Returns:
+            np.ndarray: 役ごとの点数(N x NUM_OF_HANDS)
+        """
+        return self.__scores__
+
+    def bonus(self) -> np.ndarray:
+        """ボーナス点を取得する
+
+        Returns:
+            np.ndarray: ボーナス点(N)
+        """
+        return self.__bonus__
+
+    def sums(self) -> np.ndarray:
+        """合計点を取得する
+
+        Returns:
+            np.ndarray: ゲームごとの合計点(N)
+        """
+        return self.__scores__.sum(axis=1) + self.__bonus__
+
+
+# 定数定義
+GAME_COUNT: int = 100000
+BATCH_SIZE: int = 10000
+SEED: int = 0
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger: logging.Logger = logging.getLogger(__name__)
+
+    rerollMode: HandChoiseMode = HandChoiseMode.Optimal
+    choiseMode: HandChoiseMode = HandChoiseMode.Optimal
+
+    solver: Solver | None = None
+    if HandChoiseMode.Optimal in [rerollMode, choiseMode]:
+        solver = Solver.loadOrBuild(logger)
+    policy: ModeBatchPolicy = ModeBatchPolicy(rerollMode, choiseMode, solver)
+    rng: np.random.Generator = np.random.default_rng(SEED)
+
+    startTime: float = time.time()
+    sumList: list[np.ndarray] = []
+    for start in range(0, GAME_COUNT, BATCH_SIZE):
+        simulator: BatchSimulator = BatchSimulator(policy, min(BATCH_SIZE, GAME_COUNT - start), rng)
+        sumList.append(simulator.play())
+    sums: np.ndarray = np.concatenate(sumList)
+    elapsedTime: float = time.time() - startTime
+
+    logger.info(f'RerollMode: {rerollMode.name}')
+    logger.info(f'ChoiseMode: {choiseMode.name}')
+    logger.info(f'Games: {len(sums)} ({len(sums) / elapsedTime * 3600: >.0f} games/hour)')
+    logger.info(f'Maximum: {np.amax(sums): >3.3f}')
+    logger.info(f'Minimum: {np.amin(sums): >3.3f}')
+    logger.info(f'Average: {np.mean(sums): >3.3f}')
+    logger.info(f'Median: {np.median(sums): >3.3f}')
+    logger.info(f'Std.dev: {np.std(sums): >3.3f}')
+
+
+if __name__ == '__main__':
+    main()
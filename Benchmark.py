@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+import logging.config
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+
+import AutoYahtzee
+from Yahtzee import Calculator, Dice, DiceRoller, Evaluator, Field, HandChoiseMode, Hands, Reroll
+
+# 定数定義
+SEED: int = 0  # 局面とゲームのシード
+NUM_OF_POSITIONS: int = 24  # 計測に使用する局面の数(空き役の数が均等になるように作成する)
+GAME_COUNT: int = 10  # ゲームのスループットの計測に使用するゲーム数
+REPEAT: int = 5  # 計測の繰り返し回数(最小の時間を結果とする)
+REROLL_MODE: HandChoiseMode = HandChoiseMode.MaximumGain  # 計測に使用する振り直し時の役選択/評価モード
+CHOISE_MODE: HandChoiseMode = HandChoiseMode.Balance  # 計測に使用する役選択モード
+ANYTIME_SAMPLE_BUDGET: int = 2048  # サンプリングによる振り直し選択の計測に使用するサンプル数の予算(時間予算は使用しない)
+TOLERANCE: float = 1.2  # 基準より遅いとみなす時間の比率
+BASELINE_FILE_NAME: str = 'benchmark_baseline.json'  # 基準の結果の保存先
+OUTPUT_FILE_NAME: str = 'benchmark_{timestamp}.json'  # 計測結果の出力先
+LOG_CONFIG_FILE_NAME: str = 'log_config.json'  # ゲームのスループットの計測に使用するロガー設定
+LOG_TIMESTAMP: str = 'benchmark'  # ゲームのスループットの計測時のログファイル名(AutoYahtzee.IS_QUEUE_LOGGING が False の場合のみ出力する)
+CONSOLE_LOG_CONFIG: dict = {  # 計測結果をコンソールに出力するロガー設定
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {'simple': {'format': '%(message)s'}},
+    'handlers': {'consoleHandler': {'class': 'logging.StreamHandler', 'formatter': 'simple'}},
+    'loggers': {'__main__': {'level': 'INFO', 'handlers': [], 'propagate': True}},
+    'root': {'level': 'INFO', 'handlers': ['consoleHandler']},
+}
+
+
+def makePositions(seed: int, count: int, logger: logging.Logger) -> list[tuple[Field, Dice]]:
+    """計測に使用する局面(フィールドとサイコロ)を作成する
+
+    Args:
+        seed (int): シード
+        count (int): 局面の数
+        logger (logging.Logger): ロガー
+
+    Returns:
+        list[tuple[Field, Dice]]: 局面の一覧(positionCount * 役の数 / count 個の役を割り当てた場)
+    """
+    generator: np.random.Generator = np.random.default_rng(seed)
+    roller: DiceRoller = DiceRoller(generator)
+    positions: list[tuple[Field, Dice]] = []
+    for positionCount in range(count):
+        field: Field = Field(logger)
+        for _ in range(positionCount * len(Hands) // count):
+            dice: Dice = Dice()
+            dice.rollAll(roller)
+            hands: list[Hands] = field.getNoneHands()
+            field.setDice(hands[int(generator.integers(len(hands)))], dice)
+        dice = Dice()
+        dice.rollAll(roller)
+        positions.append((field, dice))
+    return positions
+
+
+def benchCalculatePoints(positions: list[tuple[Field, Dice]], logger: logging.Logger) -> int:
+    """Calculator.calculatePoints: 局面ごとに、すべてのサイコロと役の点数を計算する
+
+    Args:
+        positions (list[tuple[Field, Dice]]): 局面の一覧
+        logger (logging.Logger): ロガー
+
+    Returns:
+        int: 呼び出し回数
+    """
+    diceList: list[Dice] = [Dice(list(Dice.pipsOfIndex(index))) for index in range(Dice.NUM_OF_STATES)]
+    count: int = 0
+    for _ in positions:
+        for dice in diceList:
+            for hand in Hands:
+                Calculator.calculatePoints(hand, dice)
+                count += 1
+    return count
+
+
+def benchGetInfoToSet(positions: list[tuple[Field, Dice]], logger: logging.Logger) -> int:
+    """Field.getInfoToSet: 局面ごとに、すべてのサイコロと空き役の情報を取得する
+
+    Args:
+        positions (list[tuple[Field, Dice]]): 局面の一覧
+        logger (logging.Logger): ロガー
+
+    Returns:
+        int: 呼び出し回数
+    """
+    diceList: list[Dice] = [Dice(list(Dice.pipsOfIndex(index))) for index in range(Dice.NUM_OF_STATES)]
+    count: int = 0
+    for (field, _) in positions:
+        hands: list[Hands] = field.getNoneHands()
+        for dice in diceList:
+            for hand in hands:
+                field.getInfoToSet(hand, dice)
+                count += 1
+    return count
+
+
+def benchChoiseHand(positions: list[tuple[Field, Dice]], logger: logging.Logger) -> int:
+    """Evaluator.choiseHand: 局面ごとに、キャッシュ・初手の定石なしの状態からすべてのサイコロの役を選択する
+
+    Args:
+        positions (list[tuple[Field, Dice]]): 局面の一覧
+        logger (logging.Logger): ロガー
+
+    Returns:
+        int: 呼び出し回数
+    """
+    diceList: list[Dice] = [Dice(list(Dice.pipsOfIndex(index))) for index in range(Dice.NUM_OF_STATES)]
+    count: int = 0
+    for (field, _) in positions:
+        evaluator: Evaluator = Evaluator(field, logger, REROLL_MODE, isOpeningBook=False)
+        for dice in diceList:
+            evaluator.choiseHand(dice, CHOISE_MODE)
+            count += 1
+    return count
+
+
+def benchEvaluateReroll(positions: list[tuple[Field, Dice]], logger: logging.Logger) -> int:
+    """Evaluator.evaluateReroll: 局面ごとに、キャッシュ・初手の定石なしの状態から残す目が異なるすべての振り直しを評価する
+
+    Args:
+        positions (list[tuple[Field, Dice]]): 局面の一覧
+        logger (logging.Logger): ロガー
+
+    Returns:
+        int: 呼び出し回数
+    """
+    count: int = 0
+    for (field, dice) in positions:
+        evaluator: Evaluator = Evaluator(field, logger, REROLL_MODE, isOpeningBook=False)
+        for (bit, _) in Evaluator.getKeeps(dice.index()):
+            evaluator.evaluateReroll(dice, Reroll(bit), REROLL_MODE, CHOISE_MODE)
+            count += 1
+    return count
+
+
+def benchChoiseReroll(positions: list[tuple[Field, Dice]], logger: logging.Logger) -> int:
+    """Evaluator.choiseReroll: 局面ごとに、キャッシュ・初手の定石なしの状態から振り直しを選択する
+
+    Args:
+        positions (list[tuple[Field, Dice]]): 局面の一覧
+        logger (logging.Logger): ロガー
+
+    Returns:
+        int: 呼び出し回数
+    """
+    count: int = 0
+    for (field, dice) in positions:
+        evaluator: Evaluator = Evaluator(field, logger, REROLL_MODE, isOpeningBook=False)
+        evaluator.choiseReroll(dice, REROLL_MODE, CHOISE_MODE)
+        count += 1
+    return count
+
+
+def benchChoiseRerollAnytime(positions: list[tuple[Field, Dice]], logger: logging.Logger) -> int:
+    """Evaluator.choiseRerollAnytime: 局面ごとに、キャッシュ・初手の定石なしの状態から ANYTIME_SAMPLE_BUDGET 個の出目をサンプリングして振り直しを選択する
+
+    Args:
+        positions (list[tuple[Field, Dice]]): 局面の一覧
+        logger (logging.Logger): ロガー
+
+    Returns:
+        int: 呼び出し回数
+    """
+    count: int = 0
+    for (field, dice) in positions:
+        evaluator: Evaluator = Evaluator(field, logger, REROLL_MODE, isOpeningBook=False)
+        evaluator.choiseRerollAnytime(dice, REROLL_MODE, CHOISE_MODE, 1, None, ANYTIME_SAMPLE_BUDGET, random.Random(SEED))
+        count += 1
+    return count
+
+
+def benchGame(positions: list[tuple[Field, Dice]], logger: logging.Logger) -> int:
+    """AutoYahtzee.playGame: キャッシュなしの状態から GAME_COUNT ゲームを実行する(ログは出力しない)
+
+    Args:
+        positions (list[tuple[Field, Dice]]): 局面の一覧(使用しない)
+        logger (logging.Logger): ロガー(使用しない)
+
+    Returns:
+        int: ゲーム数
+    """
+    # AutoYahtzee.IS_QUEUE_LOGGING が False の場合はゲームごとにロガーを設定するため、実際の設定を渡す
+    with open(LOG_CONFIG_FILE_NAME, 'r') as f:
+        log_config: dict = json.load(f)
+    if not os.path.exists(f'./{AutoYahtzee.LOG_FOLDER_NAME}'):
+        os.mkdir(f'./{AutoYahtzee.LOG_FOLDER_NAME}')
+
+    AutoYahtzee.evaluationCache.clear()
+    try:
+        for gameCount in range(1, GAME_COUNT+1):
+            AutoYahtzee.playGame(gameCount, SEED, log_config, LOG_TIMESTAMP, REROLL_MODE, CHOISE_MODE, False)
+    finally:
+        # ゲームごとのロガー設定は __main__ とルートの出力先を置き換えるため、計測結果の出力先に戻す
+        logging.config.dictConfig(CONSOLE_LOG_CONFIG)
+    return GAME_COUNT
+
+
+# 計測対象の一覧(名前, 計測する処理)
+BENCHMARKS: list[tuple[str, Callable[[list[tuple[Field, Dice]], logging.Logger], int]]] = [
+    ('Calculator.calculatePoints', benchCalculatePoints),
+    ('Field.getInfoToSet', benchGetInfoToSet),
+    ('Evaluator.choiseHand', benchChoiseHand),
+    ('Evaluator.evaluateReroll', benchEvaluateReroll),
+    ('Evaluator.choiseReroll', benchChoiseReroll),
+    ('Evaluator.choiseRerollAnytime', benchChoiseRerollAnytime),
+    ('AutoYahtzee.playGame', benchGame),
+]
+
+
+def runBenchmarks(positions: list[tuple[Field, Dice]], repeat: int) -> dict[str, dict[str, float]]:
+    """すべての計測対象を repeat 回ずつ実行し、最小の時間を結果とする
+
+    時間は他のプロセスの影響を受けにくい CPU 時間とし、計測中はログを出力しない(ログの出力時間を含めない)。
+
+    Args:
+        positions (list[tuple[Field, Dice]]): 局面の一覧
+        repeat (int): 繰り返し回数
+
+    Returns:
+        dict[str, dict[str, float]]: 計測対象ごとの 呼び出し回数(calls), 時間(seconds), 1秒あたりの呼び出し回数(callsPerSecond)
+    """
+    logger: logging.Logger = logging.getLogger(__name__)
+    results: dict[str, dict[str, float]] = {}
+    logging.disable(logging.CRITICAL)
+    try:
+        for (name, bench) in BENCHMARKS:
+            bestTime: float = float('inf')
+            count: int = 0
+            for _ in range(repeat):
+                startTime: float = time.process_time()
+                count = bench(positions, logger)
+                bestTime = min(bestTime, time.process_time() - startTime)
+            results[name] = {'calls': count, 'seconds': bestTime, 'callsPerSecond': count / bestTime}
+    finally:
+        logging.disable(logging.NOTSET)
+    return results
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], tolerance: float) -> tuple[list[str], list[str]]:
+    """基準の結果と比較する
+
+    Args:
+        results (dict[str, dict[str, float]]): 計測結果
+        baseline (dict[str, dict[str, float]]): 基準の結果
+        tolerance (float): 基準より遅いとみなす時間の比率
+
+    Returns:
+        list[str]: 比較表(Markdown)の行
+        list[str]: 基準より遅い計測対象の一覧
+    """
+    lines: list[str] = [
+        '| Benchmark | Calls/s | Baseline calls/s | Ratio | Result |',
+        '|---|---|---|---|---|',
+    ]
+    regressions: list[str] = []
+    for (name, result) in results.items():
+        if name not in baseline:
+            lines.append(f'| {name:<26} | {result["callsPerSecond"]:>12.1f} | {"-":>12} | {"-":>5} | new |')
+            continue
+        ratio: float = result['callsPerSecond'] / baseline[name]['callsPerSecond']
+        isRegression: bool = ratio * tolerance < 1
+        if isRegression:
+            regressions.append(name)
+        lines.append(f'| {name:<26} | {result["callsPerSecond"]:>12.1f} | {baseline[name]["callsPerSecond"]:>12.1f} | {ratio:>5.2f} '
+                     f'| {"REGRESSION" if isRegression else "ok"} |')
+    return (lines, regressions)
+
+
+def main() -> None:
+    logging.config.dictConfig(CONSOLE_LOG_CONFIG)
+    logger: logging.Logger = logging.getLogger(__name__)
+
+    # --save-baseline: 計測結果を基準として保存する
+    isSaveBaseline: bool = '--save-baseline' in sys.argv[1:]
+
+    positions: list[tuple[Field, Dice]] = makePositions(SEED, NUM_OF_POSITIONS, logger)
+    results: dict[str, dict[str, float]] = runBenchmarks(positions, REPEAT)
+
+    timestamp: str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    report: dict = {
+        'timestamp': timestamp,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'seed': SEED,
+        'repeat': REPEAT,
+        'results': results,
+    }
+    with open(OUTPUT_FILE_NAME.format(timestamp=timestamp), 'w') as f:
+        json.dump(report, f, indent=2)
+    if isSaveBaseline:
+        with open(BASELINE_FILE_NAME, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f'Saved baseline: {BASELINE_FILE_NAME}')
+
+    # 基準は計測環境に依存するため、デプロイ先で --save-baseline を指定して作成する(基準がない場合は比較できないため異常終了する)
+    if not os.path.exists(BASELINE_FILE_NAME):
+        logger.error(f'Baseline not found: {BASELINE_FILE_NAME} (run with --save-baseline on this machine to create it)')
+        sys.exit(1)
+    with open(BASELINE_FILE_NAME, 'r') as f:
+        baseline: dict[str, dict[str, float]] = json.load(f)['results']
+    (lines, regressions) = compare(results, baseline, TOLERANCE)
+    for line in lines:
+        logger.info(line)
+
+    # 基準より遅い計測対象がある場合は異常終了する(デプロイ前の確認に使用する)
+    if regressions:
+        logger.error(f'Regression (slower than baseline x{TOLERANCE}): {", ".join(regressions)}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
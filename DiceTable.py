@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import numpy as np
+
+from Yahtzee import Calculator, Dice, Die, Evaluator, Hands
+
+
+class DiceTable:
+    """サイコロの状態に関する、場によらない numpy の表
+    """
+
+    # 定数定義
+    NUM_OF_HANDS: int = len(Hands)  # 役の個数
+    NUM_OF_REROLLS: int = pow(2, Dice.NUM_OF_DICE)  # 振り直しの種類数
+
+    # サイコロのインデックスごと、役ごとの点数表(NUM_OF_STATES x NUM_OF_HANDS)
+    POINTS: np.ndarray = np.zeros(0)
+    # 役ごとの最大点(NUM_OF_HANDS)
+    BEST_POINTS: np.ndarray = np.zeros(0)
+    # 役ごとの数字役かどうか(NUM_OF_HANDS)
+    IS_NUM_HAND: np.ndarray = np.zeros(0)
+    # 残す目ごとの、振り直し後のサイコロのインデックスの出現数(残す目の個数 x NUM_OF_STATES)
+    COUNTS: np.ndarray = np.zeros(0)
+    # 残す目ごとの、振り直し後の出目の総数(残す目の個数)
+    TOTALS: np.ndarray = np.zeros(0)
+    # 残す目ごとの、振り直し後のサイコロのインデックスの確率(残す目の個数 x NUM_OF_STATES)
+    TRANSITION: np.ndarray = np.zeros(0)
+    # サイコロのインデックスごと、振り直しごとの残す目の番号(NUM_OF_STATES x NUM_OF_REROLLS)
+    # 残す目が同じ振り直しは最小のビットのみとし、ビットの昇順に並べる(不足分は最後の振り直しで埋める)
+    INDEX_TO_KEEP: np.ndarray = np.zeros(0)
+    # INDEX_TO_KEEP に対応する振り直しのビット(NUM_OF_STATES x NUM_OF_REROLLS)
+    INDEX_TO_BIT: np.ndarray = np.zeros(0)
+    # 1投目のサイコロのインデックスの確率(NUM_OF_STATES)
+    FIRST_ROLL: np.ndarray = np.zeros(0)
+    # 昇順に並べたサイコロの目を6進数とみなした値からインデックスへの対応(6^NUM_OF_DICE)
+    CODE_TO_INDEX: np.ndarray = np.zeros(0)
+
+    @classmethod
+    def __build__(cls) -> None:
+        """表を作成する
+        """
+        cls.POINTS = np.array([Calculator.getPointsOfIndex(index) for index in range(Dice.NUM_OF_STATES)], dtype=np.int64)
+        cls.BEST_POINTS = np.array([Calculator.getBestPoints(hand) for hand in Hands], dtype=np.int64)
+        cls.IS_NUM_HAND = np.array([hand in Hands.getNumHands() for hand in Hands])
+
+        keepToNumber: dict[tuple[int, ...], int] = {}
+        cls.INDEX_TO_KEEP = np.zeros((Dice.NUM_OF_STATES, DiceTable.NUM_OF_REROLLS), dtype=np.int64)
+        cls.INDEX_TO_BIT = np.zeros((Dice.NUM_OF_STATES, DiceTable.NUM_OF_REROLLS), dtype=np.int64)
+        for index in range(Dice.NUM_OF_STATES):
+            keeps: list[tuple[int, tuple[int, ...]]] = Evaluator.getKeeps(index)
+            for (column, (bit, keptPips)) in enumerate(keeps):
+                keepToNumber.setdefault(keptPips, len(keepToNumber))
+                cls.INDEX_TO_KEEP[index, column] = keepToNumber[keptPips]
+                cls.INDEX_TO_BIT[index, column] = bit
+            cls.INDEX_TO_KEEP[index, len(keeps):] = cls.INDEX_TO_KEEP[index, len(keeps) - 1]
+            cls.INDEX_TO_BIT[index, len(keeps):] = cls.INDEX_TO_BIT[index, len(keeps) - 1]
+
+        cls.COUNTS = np.zeros((len(keepToNumber), Dice.NUM_OF_STATES), dtype=np.int64)
+        cls.TOTALS = np.zeros(len(keepToNumber), dtype=np.int64)
+        for (keptPips, number) in keepToNumber.items():
+            cls.TOTALS[number] = pow(Die.MAX_OF_PIP, Dice.NUM_OF_DICE - len(keptPips))
+            for (index, count) in Evaluator.getOutcomes(keptPips):
+                cls.COUNTS[number, index] = count
+        cls.TRANSITION = cls.COUNTS / cls.TOTALS[:, np.newaxis]
+        cls.FIRST_ROLL = cls.TRANSITION[keepToNumber[()]]
+
+        cls.CODE_TO_INDEX = np.full(pow(Die.MAX_OF_PIP, Dice.NUM_OF_DICE), -1, dtype=np.int64)
+        for index in range(Dice.NUM_OF_STATES):
+            cls.CODE_TO_INDEX[cls.__toCode__(np.array([Dice.pipsOfIndex(index)]))] = index
+
+    @classmethod
+    def __toCode__(cls, pips: np.ndarray) -> np.ndarray:
+        """サイコロの目を6進数とみなした値に変換する
+
+        Args:
+            pips (np.ndarray): サイコロの目(N x NUM_OF_DICE)
+
+        Returns:
+            np.ndarray: 6進数とみなした値(N)
+        """
+        weights: np.ndarray = Die.MAX_OF_PIP ** np.arange(Dice.NUM_OF_DICE - 1, -1, -1)
+        return (pips.astype(np.int64) - Die.MIN_OF_PIP) @ weights
+
+    @classmethod
+    def indexOfPips(cls, pips: np.ndarray) -> np.ndarray:
+        """昇順に並べたサイコロの目からインデックスを求める
+
+        Args:
+            pips (np.ndarray): 昇順に並べたサイコロの目(N x NUM_OF_DICE)
+
+        Returns:
+            np.ndarray: インデックス(N)
+        """
+        return cls.CODE_TO_INDEX[cls.__toCode__(pips)]
+
+
+DiceTable.__build__()
@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import os
+import struct
+import sys
+from typing import BinaryIO, Iterator
+
+from Yahtzee import Dice, HandChoiseMode, Hands, Reroll
+
+
+class GameRecord:
+    """1ゲーム分の記録(サイコロ、振り直し、選択した役)
+    """
+
+    def __init__(self, gameCount: int, seed: int, maxRollCount: int) -> None:
+        """コンストラクタ
+
+        Args:
+            gameCount (int): ゲーム番号
+            seed (int): ゲームごとのシード
+            maxRollCount (int): 1ターンでサイコロを振る最大回数
+        """
+        assert 1 <= maxRollCount
+
+        self.__gameCount__: int = gameCount
+        self.__seed__: int = seed
+        self.__maxRollCount__: int = maxRollCount
+        # 合計点
+        self.__points__: int = 0
+        # ターンごとの(投げるごとのサイコロのインデックス, 振り直しのビット, 選択した役)
+        self.__turns__: list[tuple[tuple[int, ...], tuple[int, ...], Hands]] = []
+
+    def getGameCount(self) -> int:
+        """ゲーム番号を取得する
+
+        Returns:
+            int: ゲーム番号
+        """
+        return self.__gameCount__
+
+    def getSeed(self) -> int:
+        """ゲームごとのシードを取得する
+
+        Returns:
+            int: シード
+        """
+        return self.__seed__
+
+    def getMaxRollCount(self) -> int:
+        """1ターンでサイコロを振る最大回数を取得する
+
+        Returns:
+            int: 最大回数
+        """
+        return self.__maxRollCount__
+
+    def getPoints(self) -> int:
+        """合計点を取得する
+
+        Returns:
+            int: 合計点
+        """
+        return self.__points__
+
+    def setPoints(self, points: int) -> None:
+        """合計点を設定する
+
+        Args:
+            points (int): 合計点
+        """
+        self.__points__ = points
+
+    def getTurns(self) -> list[tuple[tuple[int, ...], tuple[int, ...], Hands]]:
+        """ターンごとの記録を取得する
+
+        Returns:
+            list[tuple[tuple[int, ...], tuple[int, ...], Hands]]: ターンごとの(投げるごとのサイコロのインデックス, 振り直しのビット, 選択した役)
+        """
+        return self.__turns__
+
+    def addTurn(self, indexes: list[int], bits: list[int], hand: Hands) -> None:
+        """1ターン分の記録を追加する
+
+        振り直しなしで投げなかった回は、振り直しのビットを 0、サイコロを直前と同じインデックスとして記録する。
+
+        Args:
+            indexes (list[int]): 投げるごとのサイコロのインデックス(最大回数分)
+            bits (list[int]): 振り直しのビット(最大回数 - 1 個)
+            hand (Hands): 選択した役
+        """
+        assert len(indexes) == self.__maxRollCount__ and len(bits) == self.__maxRollCount__ - 1
+        self.__turns__.append((tuple(indexes), tuple(bits), hand))
+
+    def toLines(self) -> list[str]:
+        """テキスト形式(d: サイコロ, r: 振り直し, c: 役)に変換する
+
+        Returns:
+            list[str]: 行の一覧
+        """
+        lines: list[str] = []
+        for (indexes, bits, hand) in self.__turns__:
+            lines.append(f'd:{list(Dice.pipsOfIndex(indexes[0]))}')
+            for (rollCount, bit) in enumerate(bits, 1):
+                lines.append(f'r:{Reroll(bit)}')
+                if bit != 0:
+                    lines.append(f'd:{list(Dice.pipsOfIndex(indexes[rollCount]))}')
+            lines.append(f'c:{hand.name}')
+        return lines
+
+
+class GameRecordWriter:
+    """ゲームの記録を1つのファイルに追記する
+
+    ファイル形式(リトルエンディアン):
+        ヘッダ      : マジック(4s), バージョン(H), 1ターンでサイコロを振る最大回数(B), ターン数(B),
+                      振り直し時の役選択/評価モード(B), 役選択モード(B), 先読みするか(B)
+        ゲーム      : ゲーム番号(I), シード(Q), 合計点(H), ターンごとに 投げるごとのサイコロのインデックス(B * 最大回数),
+                      振り直しのビット(B * (最大回数 - 1)), 選択した役(B, Handsの定義順)
+        インデックス: ゲームごとに ゲーム番号(I), 位置(Q)
+        トレーラ    : インデックスの位置(Q), ゲーム数(I), マジック(4s)
+
+    インデックスとトレーラは close 時に書き込む。途中で終了したファイルも先頭から順に読むことができる。
+    """
+
+    # 定数定義
+    MAGIC: bytes = b'YZGR'  # ファイル識別子
+    INDEX_MAGIC: bytes = b'YZGI'  # インデックスの識別子
+    VERSION: int = 2  # ファイル形式のバージョン(2: 戦略を追加)
+
+    HEADER_FORMAT: str = '<4sHBBBBB'  # ヘッダ
+    GAME_FORMAT: str = '<IQH'  # ゲームの先頭
+    INDEX_FORMAT: str = '<IQ'  # インデックス
+    TRAILER_FORMAT: str = '<QI4s'  # トレーラ
+
+    # 役ごとの番号(Handsの定義順)
+    __HAND_TO_CODE__: dict[Hands, int] = {hand: code for (code, hand) in enumerate(Hands)}
+
+    def __init__(self, path: str, maxRollCount: int, rerollMode: HandChoiseMode, choiseMode: HandChoiseMode, isLookahead: bool) -> None:
+        """コンストラクタ(ファイルを作成する)
+
+        Args:
+            path (str): ファイルパス
+            maxRollCount (int): 1ターンでサイコロを振る最大回数
+            rerollMode (HandChoiseMode): 記録する戦略の振り直し時の役選択/評価モード
+            choiseMode (HandChoiseMode): 記録する戦略の役選択モード
+            isLookahead (bool): 記録する戦略が振り直しを先読みするか
+        """
+        self.__maxRollCount__: int = maxRollCount
+        # ゲームごとの(ゲーム番号, 位置)
+        self.__index__: list[tuple[int, int]] = []
+        self.__file__: BinaryIO = open(path, 'wb')
+        self.__file__.write(struct.pack(GameRecordWriter.HEADER_FORMAT, GameRecordWriter.MAGIC, GameRecordWriter.VERSION, maxRollCount, len(Hands),
+                                        rerollMode.value, choiseMode.value, isLookahead))
+
+    def __enter__(self) -> GameRecordWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @classmethod
+    def getGameSize(cls, maxRollCount: int) -> int:
+        """1ゲーム分の記録のバイト数を取得する
+
+        Args:
+            maxRollCount (int): 1ターンでサイコロを振る最大回数
+
+        Returns:
+            int: バイト数
+        """
+        return struct.calcsize(cls.GAME_FORMAT) + len(Hands) * 2 * maxRollCount
+
+    def write(self, record: GameRecord) -> None:
+        """1ゲーム分の記録を追記する
+
+        Args:
+            record (GameRecord): ゲームの記録
+        """
+        assert record.getMaxRollCount() == self.__maxRollCount__ and len(record.getTurns()) == len(Hands)
+
+        data: bytearray = bytearray(struct.pack(GameRecordWriter.GAME_FORMAT, record.getGameCount(), record.getSeed(), record.getPoints()))
+        for (indexes, bits, hand) in record.getTurns():
+            data += bytes(indexes)
+            data += bytes(bits)
+            data.append(GameRecordWriter.__HAND_TO_CODE__[hand])
+
+        self.__index__.append((record.getGameCount(), self.__file__.tell()))
+        self.__file__.write(data)
+
+    def close(self) -> None:
+        """インデックスとトレーラを書き込んでファイルを閉じる
+        """
+        if self.__file__.closed:
+            return
+        indexOffset: int = self.__file__.tell()
+        for (gameCount, offset) in self.__index__:
+            self.__file__.write(struct.pack(GameRecordWriter.INDEX_FORMAT, gameCount, offset))
+        self.__file__.write(struct.pack(GameRecordWriter.TRAILER_FORMAT, indexOffset, len(self.__index__), GameRecordWriter.INDEX_MAGIC))
+        self.__file__.close()
+
+
+class GameRecordReader:
+    """GameRecordWriter で書き込んだファイルからゲームの記録を読み込む
+    """
+
+    def __init__(self, path: str) -> None:
+        """コンストラクタ(ヘッダとトレーラを読み込む)
+
+        Args:
+            path (str): ファイルパス
+
+        Raises:
+            ValueError: ファイル形式が不正な場合
+        """
+        self.__path__: str = path
+
+        headerSize: int = struct.calcsize(GameRecordWriter.HEADER_FORMAT)
+        trailerSize: int = struct.calcsize(GameRecordWriter.TRAILER_FORMAT)
+        fileSize: int = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            header: bytes = f.read(headerSize)
+            if len(header) != headerSize:
+                raise ValueError(f'{path}: truncated header')
+            (magic, version, maxRollCount, numOfHands, rerollMode, choiseMode, isLookahead) = struct.unpack(GameRecordWriter.HEADER_FORMAT, header)
+            if magic != GameRecordWriter.MAGIC:
+                raise ValueError(f'{path}: not a game record')
+            if version != GameRecordWriter.VERSION:
+                raise ValueError(f'{path}: unsupported version {version}')
+            if numOfHands != len(Hands):
+                raise ValueError(f'{path}: unsupported number of hands {numOfHands}')
+
+            self.__maxRollCount__: int = maxRollCount
+            self.__rerollMode__: HandChoiseMode = HandChoiseMode(rerollMode)
+            self.__choiseMode__: HandChoiseMode = HandChoiseMode(choiseMode)
+            self.__isLookahead__: bool = bool(isLookahead)
+            self.__gameSize__: int = GameRecordWriter.getGameSize(maxRollCount)
+            # インデックスの位置(インデックスがない場合は None)
+            self.__indexOffset__: int | None = None
+            # ゲーム数
+            self.__numOfGames__: int = 0
+
+            if headerSize + trailerSize <= fileSize:
+                f.seek(fileSize - trailerSize)
+                (indexOffset, numOfGames, indexMagic) = struct.unpack(GameRecordWriter.TRAILER_FORMAT, f.read(trailerSize))
+                indexSize: int = struct.calcsize(GameRecordWriter.INDEX_FORMAT) * numOfGames
+                if indexMagic == GameRecordWriter.INDEX_MAGIC and indexOffset == headerSize + self.__gameSize__ * numOfGames \
+                        and indexOffset + indexSize + trailerSize == fileSize:
+                    self.__indexOffset__ = indexOffset
+                    self.__numOfGames__ = numOfGames
+
+            if self.__indexOffset__ is None:
+                # 途中で終了したファイルは、読み込める分のゲームのみを扱う
+                self.__numOfGames__ = (fileSize - headerSize) // self.__gameSize__
+
+    def __len__(self) -> int:
+        return self.__numOfGames__
+
+    def __iter__(self) -> Iterator[GameRecord]:
+        """ゲームの記録を書き込み順に1つずつ読み込む
+
+        Returns:
+            Iterator[GameRecord]: ゲームの記録
+        """
+        with open(self.__path__, 'rb') as f:
+            f.seek(struct.calcsize(GameRecordWriter.HEADER_FORMAT))
+            for _ in range(self.__numOfGames__):
+                yield self.__decode__(f.read(self.__gameSize__))
+
+    def getMaxRollCount(self) -> int:
+        """1ターンでサイコロを振る最大回数を取得する
+
+        Returns:
+            int: 最大回数
+        """
+        return self.__maxRollCount__
+
+    def getRerollMode(self) -> HandChoiseMode:
+        """記録した戦略の振り直し時の役選択/評価モードを取得する
+
+        Returns:
+            HandChoiseMode: 振り直し時の役選択/評価モード
+        """
+        return self.__rerollMode__
+
+    def getChoiseMode(self) -> HandChoiseMode:
+        """記録した戦略の役選択モードを取得する
+
+        Returns:
+            HandChoiseMode: 役選択モード
+        """
+        return self.__choiseMode__
+
+    def isLookahead(self) -> bool:
+        """記録した戦略が振り直しを先読みするか
+
+        Returns:
+            bool: 先読みする場合 True
+        """
+        return self.__isLookahead__
+
+    def getIndex(self) -> dict[int, int]:
+        """ゲーム番号ごとの記録の位置を取得する(インデックスがない場合は先頭から求める)
+
+        Returns:
+            dict[int, int]: ゲーム番号ごとの位置
+        """
+        index: dict[int, int] = {}
+        headerSize: int = struct.calcsize(GameRecordWriter.HEADER_FORMAT)
+        with open(self.__path__, 'rb') as f:
+            if self.__indexOffset__ is not None:
+                f.seek(self.__indexOffset__)
+                data: bytes = f.read(struct.calcsize(GameRecordWriter.INDEX_FORMAT) * self.__numOfGames__)
+                for (gameCount, offset) in struct.iter_unpack(GameRecordWriter.INDEX_FORMAT, data):
+                    index[gameCount] = offset
+            else:
+                for number in range(self.__numOfGames__):
+                    offset: int = headerSize + self.__gameSize__ * number
+                    f.seek(offset)
+                    (gameCount, _, _) = struct.unpack(GameRecordWriter.GAME_FORMAT, f.read(struct.calcsize(GameRecordWriter.GAME_FORMAT)))
+                    index[gameCount] = offset
+        return index
+
+    def getGame(self, gameCount: int, index: dict[int, int] | None = None) -> GameRecord:
+        """ゲーム番号を指定してゲームの記録を読み込む
+
+        Args:
+            gameCount (int): ゲーム番号
+            index (dict[int, int] | None, optional): getIndex で取得したインデックス. Defaults to None(その都度読み込む).
+
+        Returns:
+            GameRecord: ゲームの記録
+        """
+        if index is None:
+            index = self.getIndex()
+        with open(self.__path__, 'rb') as f:
+            f.seek(index[gameCount])
+            return self.__decode__(f.read(self.__gameSize__))
+
+    def __decode__(self, data: bytes) -> GameRecord:
+        """1ゲーム分のバイト列を変換する
+
+        Args:
+            data (bytes): バイト列
+
+        Returns:
+            GameRecord: ゲームの記録
+        """
+        allHands: list[Hands] = list(Hands)
+        (gameCount, seed, points) = struct.unpack_from(GameRecordWriter.GAME_FORMAT, data)
+        record: GameRecord = GameRecord(gameCount, seed, self.__maxRollCount__)
+        record.setPoints(points)
+
+        maxRollCount: int = self.__maxRollCount__
+        offset: int = struct.calcsize(GameRecordWriter.GAME_FORMAT)
+        for _ in range(len(Hands)):
+            indexes: list[int] = list(data[offset:offset + maxRollCount])
+            bits: list[int] = list(data[offset + maxRollCount:offset + 2 * maxRollCount - 1])
+            record.addTurn(indexes, bits, allHands[data[offset + 2 * maxRollCount - 1]])
+            offset += 2 * maxRollCount
+        return record
+
+
+def main() -> None:
+    # 記録をテキスト形式で出力する
+    for record in GameRecordReader(sys.argv[1]):
+        print(f'== {record.getGameCount()}: {record.getPoints()} (seed: {record.getSeed()})')
+        for line in record.toLines():
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import math
+
+
+class LatencyHistogram:
+    """処理時間のヒストグラム(マイクロ秒単位の2のべき乗ごとの区間)
+    """
+
+    # 定数定義
+    NUM_OF_BINS: int = 32  # 区間の数(区間 k: 2^(k-1) 以上 2^k 未満[us]、区間 0: 1us 未満)
+
+    def __init__(self) -> None:
+        """コンストラクタ
+        """
+        # 区間ごとの回数
+        self.__bins__: list[int] = [0] * LatencyHistogram.NUM_OF_BINS
+        # 回数
+        self.__count__: int = 0
+        # 合計時間[s]
+        self.__total__: float = 0
+        # 最大時間[s]
+        self.__max__: float = 0
+
+    def observe(self, seconds: float) -> None:
+        """処理時間を追加する
+
+        Args:
+            seconds (float): 処理時間[s]
+        """
+        micros: int = int(seconds * 1e6)
+        self.__bins__[min(micros.bit_length(), LatencyHistogram.NUM_OF_BINS - 1)] += 1
+        self.__count__ += 1
+        self.__total__ += seconds
+        self.__max__ = max(self.__max__, seconds)
+
+    def merge(self, other: LatencyHistogram) -> None:
+        """他のヒストグラムを合算する
+
+        Args:
+            other (LatencyHistogram): ヒストグラム
+        """
+        self.__bins__ = [count + otherCount for (count, otherCount) in zip(self.__bins__, other.__bins__)]
+        self.__count__ += other.__count__
+        self.__total__ += other.__total__
+        self.__max__ = max(self.__max__, other.__max__)
+
+    def count(self) -> int:
+        """回数を取得する
+
+        Returns:
+            int: 回数
+        """
+        return self.__count__
+
+    def total(self) -> float:
+        """合計時間を取得する
+
+        Returns:
+            float: 合計時間[s]
+        """
+        return self.__total__
+
+    def quantile(self, q: float) -> float:
+        """分位点を取得する(区間の上限で近似する)
+
+        Args:
+            q (float): 0 - 1
+
+        Returns:
+            float: 分位点[s](最大時間を超えない)
+        """
+        if self.__count__ == 0:
+            return 0
+        rank: int = max(math.ceil(q * self.__count__), 1)
+        cumulative: int = 0
+        for (bin, count) in enumerate(self.__bins__):
+            cumulative += count
+            if rank <= cumulative:
+                return min(pow(2, bin) * 1e-6, self.__max__)
+        return self.__max__
+
+    def __str__(self) -> str:
+        """文字列化する
+
+        Returns:
+            str: 文字列
+        """
+        mean: float = self.__total__ / self.__count__ if 0 < self.__count__ else 0
+        return (f'count: {self.__count__} total: {self.__total__: >8.3f}s mean: {mean * 1e3: >8.3f}ms '
+                f'p50: {self.quantile(0.5) * 1e3: >8.3f}ms p90: {self.quantile(0.9) * 1e3: >8.3f}ms '
+                f'p99: {self.quantile(0.99) * 1e3: >8.3f}ms max: {self.__max__ * 1e3: >8.3f}ms')
+
+
+class Instrumentation:
+    """ホットパスの呼び出し回数と処理時間を集計する(オプトイン)
+
+    計測する側は Instrumentation を指定されたときのみ集計する(None の場合は判定1回分のコストのみとする)。
+    ゲームごとに作成し、merge で実行全体に合算する。
+    """
+
+    def __init__(self) -> None:
+        """コンストラクタ
+        """
+        # 名前ごとの回数
+        self.__counters__: dict[str, int] = {}
+        # 名前ごとの処理時間のヒストグラム
+        self.__histograms__: dict[str, LatencyHistogram] = {}
+
+    def count(self, name: str, value: int = 1) -> None:
+        """回数を加算する
+
+        Args:
+            name (str): 名前
+            value (int, optional): 加算する回数. Defaults to 1.
+        """
+        self.__counters__[name] = self.__counters__.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """処理時間を追加する
+
+        Args:
+            name (str): 名前
+            seconds (float): 処理時間[s]
+        """
+        if name not in self.__histograms__:
+            self.__histograms__[name] = LatencyHistogram()
+        self.__histograms__[name].observe(seconds)
+
+    def merge(self, other: Instrumentation) -> None:
+        """他の集計結果を合算する
+
+        Args:
+            other (Instrumentation): 集計結果
+        """
+        for (name, value) in other.__counters__.items():
+            self.count(name, value)
+        for (name, histogram) in other.__histograms__.items():
+            if name not in self.__histograms__:
+                self.__histograms__[name] = LatencyHistogram()
+            self.__histograms__[name].merge(histogram)
+
+    def getCounters(self) -> dict[str, int]:
+        """回数を取得する
+
+        Returns:
+            dict[str, int]: 名前ごとの回数
+        """
+        return self.__counters__
+
+    def getHistograms(self) -> dict[str, LatencyHistogram]:
+        """処理時間のヒストグラムを取得する
+
+        Returns:
+            dict[str, LatencyHistogram]: 名前ごとのヒストグラム
+        """
+        return self.__histograms__
+
+    def toLines(self) -> list[str]:
+        """ログ出力用の行に変換する
+
+        Returns:
+            list[str]: 回数、処理時間の行
+        """
+        lines: list[str] = [f'{name:<15}: {value}' for (name, value) in self.__counters__.items()]
+        lines += [f'{name:<15}: {histogram}' for (name, histogram) in self.__histograms__.items()]
+        return lines
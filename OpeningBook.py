@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+
+import numpy as np
+
+from Solver import Solver
+from StrategyTable import StrategyTable
+from Yahtzee import Calculator, Dice, EvaluationCache, Evaluator, Field, FieldState, HandChoiseMode, Hands
+
+
+class OpeningBook:
+    """初手(空の場)の振り直しと役の選択結果の表(定石)
+
+    残りの振り直し回数ごと、役選択モードの組み合わせごとに、すべてのサイコロの選択結果を持つ。
+    python OpeningBook.py で作成し、Evaluator は場が空のときに計算の前に参照する。
+    作成時の点数表と設定の指紋を保存し、読み込み時に現在の指紋と一致しない定石は使用しない。
+    """
+
+    # 定数定義
+    FILE_NAME: str = 'opening_book.yzt'  # 定石の保存先
+    NUM_OF_MODES: int = len(HandChoiseMode)  # 役選択モードの数
+    NO_REROLL: int = 255  # 振り直しの選択結果がないことを表す値(最適戦略なしで作成した場合の HandChoiseMode.Optimal)
+    NO_HAND: int = -1  # 役の選択結果がないことを表す値
+    VERSION: int = 1  # 作成方法の版(Evaluator の選択方法を変更した場合は上げて、作成済の定石を無効にする)
+
+    def __init__(self, rerolls: np.ndarray, hands: np.ndarray, handValues: np.ndarray) -> None:
+        """コンストラクタ
+
+        Args:
+            rerolls (np.ndarray): 振り直しのビット(先読みするか x 役選択/評価モード x 役選択モード(振り直しなし時) x 残りの振り直し回数 - 1 x サイコロのインデックス)
+            hands (np.ndarray): 役の列番号(役選択モード x サイコロのインデックス. Handsの定義順)
+            handValues (np.ndarray): 役選択時の評価値(役選択モード x サイコロのインデックス)
+        """
+        assert rerolls.shape == (2, OpeningBook.NUM_OF_MODES, OpeningBook.NUM_OF_MODES, Solver.NUM_OF_REROLLS, Dice.NUM_OF_STATES)
+        assert hands.shape == handValues.shape == (OpeningBook.NUM_OF_MODES, Dice.NUM_OF_STATES)
+
+        # 振り直しのビット
+        self.__rerolls__: np.ndarray = rerolls
+        # 役の列番号
+        self.__hands__: np.ndarray = hands
+        # 役選択時の評価値
+        self.__handValues__: np.ndarray = handValues
+
+    @classmethod
+    def build(cls, logger: logging.Logger, solver: Solver | None = None) -> OpeningBook:
+        """すべてのサイコロについて、Evaluator で選択結果を求める
+
+        Args:
+            logger (logging.Logger): ロガー
+            solver (Solver | None, optional): 最適戦略(None の場合は HandChoiseMode.Optimal を含む組み合わせを作成しない). Defaults to None.
+
+        Returns:
+            OpeningBook: 定石
+        """
+        modes: list[HandChoiseMode] = [mode for mode in HandChoiseMode if solver is not None or mode != HandChoiseMode.Optimal]
+        rerolls: np.ndarray = np.full((2, OpeningBook.NUM_OF_MODES, OpeningBook.NUM_OF_MODES, Solver.NUM_OF_REROLLS, Dice.NUM_OF_STATES),
+                                      OpeningBook.NO_REROLL, dtype=np.uint8)
+        hands: np.ndarray = np.full((OpeningBook.NUM_OF_MODES, Dice.NUM_OF_STATES), OpeningBook.NO_HAND, dtype=np.int8)
+        handValues: np.ndarray = np.zeros((OpeningBook.NUM_OF_MODES, Dice.NUM_OF_STATES))
+        allDice: list[Dice] = [Dice(list(Dice.pipsOfIndex(index))) for index in range(Dice.NUM_OF_STATES)]
+        # 役選択結果は場の状態が同じため、すべての組み合わせで共有する
+        cache: EvaluationCache = EvaluationCache()
+
+        for mode in modes:
+            evaluator: Evaluator = Evaluator(FieldState.INITIAL, logger, mode, False, solver, cache, None, False)
+            for (index, dice) in enumerate(allDice):
+                (hand, value) = evaluator.choiseHand(dice, mode)
+                hands[mode.value, index] = list(Hands).index(hand)
+                handValues[mode.value, index] = value
+
+        for isLookahead in [False, True]:
+            for mode in modes:
+                for modeBySelf in modes:
+                    startTime: float = time.perf_counter()
+                    # 先読み時のターン内の評価表は残りの振り直し回数・サイコロをまたいで共有する
+                    evaluator = Evaluator(FieldState.INITIAL, logger, mode, isLookahead, solver, cache, None, False)
+                    for rerollCount in range(1, Solver.NUM_OF_REROLLS + 1):
+                        for (index, dice) in enumerate(allDice):
+                            rerolls[int(isLookahead), mode.value, modeBySelf.value, rerollCount - 1, index] = evaluator.choiseReroll(dice, mode, modeBySelf, rerollCount).toBit()
+                    logger.info(f'Lookahead: {isLookahead!s:<5} {mode.name:<11} / {modeBySelf.name:<11}: {time.perf_counter() - startTime: >7.3f}s')
+
+        return OpeningBook(rerolls, hands, handValues)
+
+    @classmethod
+    def makeFingerprint(cls) -> np.ndarray:
+        """定石の選択結果に影響する点数表と設定の指紋を求める
+
+        Returns:
+            np.ndarray: 指紋(SHA-256 のバイト列)
+        """
+        points: list[int] = [Calculator.calculatePointsByIndex(hand, index) for hand in Hands for index in range(Dice.NUM_OF_STATES)]
+        settings: list[object] = [OpeningBook.VERSION, Field.BONUS_BORDER, Field.POINT_BONUS, [mode.name for mode in HandChoiseMode],
+                                  Solver.NUM_OF_REROLLS, Solver.TIE_TOLERANCE]
+        digest: bytes = hashlib.sha256(repr((points, settings)).encode()).digest()
+        return np.frombuffer(digest, dtype=np.uint8)
+
+    def save(self, path: str = FILE_NAME) -> None:
+        """定石を保存する
+
+        Args:
+            path (str, optional): ファイルパス. Defaults to FILE_NAME.
+        """
+        # StrategyTable の配列は4次元までのため、振り直しは先読みするかで分けて保存する
+        StrategyTable.write(path, {'rerolls': self.__rerolls__[0], 'lookaheadRerolls': self.__rerolls__[1],
+                                   'hands': self.__hands__, 'handValues': self.__handValues__, 'fingerprint': OpeningBook.makeFingerprint()})
+
+    @classmethod
+    def load(cls, path: str = FILE_NAME) -> OpeningBook:
+        """保存した定石を読み込む
+
+        Args:
+            path (str, optional): ファイルパス. Defaults to FILE_NAME.
+
+        Returns:
+            OpeningBook: 定石
+
+        Raises:
+            ValueError: 指紋がない、または現在の点数表と設定の指紋と一致しない場合
+        """
+        table: StrategyTable = StrategyTable(path, True)
+        if 'fingerprint' not in table.names() or not np.array_equal(table.get('fingerprint'), OpeningBook.makeFingerprint()):
+            raise ValueError(f'{path}: fingerprint mismatch (rebuild with python OpeningBook.py)')
+        # 参照は1要素ずつのため、メモリマップではなく配列として保持する
+        return OpeningBook(np.stack([table.get('rerolls'), table.get('lookaheadRerolls')]), np.array(table.get('hands')), np.array(table.get('handValues')))
+
+    def getReroll(self, isLookahead: bool, mode: HandChoiseMode, modeBySelf: HandChoiseMode, rerollCount: int, index: int) -> int | None:
+        """振り直しの選択結果を取得する
+
+        Args:
+            isLookahead (bool): 先読みするか
+            mode (HandChoiseMode): 役選択/評価モード
+            modeBySelf (HandChoiseMode): 役選択モード(振り直しなし時)
+            rerollCount (int): 今回を含む残りの振り直し回数
+            index (int): サイコロのインデックス
+
+        Returns:
+            int | None: 振り直しのビット(選択結果がない場合は None)
+        """
+        if rerollCount < 1 or Solver.NUM_OF_REROLLS < rerollCount:
+            return None
+        bit: int = int(self.__rerolls__[int(isLookahead), mode.value, modeBySelf.value, rerollCount - 1, index])
+        return None if bit == OpeningBook.NO_REROLL else bit
+
+    def getHand(self, mode: HandChoiseMode, index: int) -> tuple[Hands, float] | None:
+        """役の選択結果を取得する
+
+        Args:
+            mode (HandChoiseMode): 役選択モード
+            index (int): サイコロのインデックス
+
+        Returns:
+            tuple[Hands, float] | None: 役と評価値(Evaluator.choiseHand の戻り値と同じ. 選択結果がない場合は None)
+        """
+        column: int = int(self.__hands__[mode.value, index])
+        if column == OpeningBook.NO_HAND:
+            return None
+        return (list(Hands)[column], float(self.__handValues__[mode.value, index]))
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger: logging.Logger = logging.getLogger(__name__)
+
+    startTime: float = time.perf_counter()
+    # ログは作成時間のみを出力する(Evaluator のデバッグログは出力しない)
+    book: OpeningBook = OpeningBook.build(logger, Solver.loadOrBuild(logger))
+    book.save()
+    logger.info(f'Saved {OpeningBook.FILE_NAME}: {time.perf_counter() - startTime:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
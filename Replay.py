@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import datetime
+import itertools
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from typing import Iterator
+
+import numpy as np
+
+from GameRecord import GameRecord, GameRecordReader
+from Solver import Solver
+from Yahtzee import Dice, DiceRoller, EvaluationCache, Evaluator, Field, HandChoiseMode, Hands, Reroll
+
+# 定数定義
+WORKER_COUNT: int = os.cpu_count() or 1  # ゲームを並列に再生するプロセス数(1の場合は並列化しない)
+CHUNK_SIZE: int = 4  # プロセスにまとめて渡すゲーム数
+Z_95: float = 1.959964  # 95%信頼区間の標準正規分布の分位点
+OUTPUT_FILE_NAME: str = 'replay_{timestamp}.md'  # 比較表の出力先
+
+# 再生する戦略(振り直し時の役選択/評価モード, 役選択モード)の一覧
+MODE_PAIRS: list[tuple[HandChoiseMode, HandChoiseMode]] = list(itertools.product(HandChoiseMode, repeat=2))
+
+# プロセスごとの最適戦略と役選択結果のキャッシュ(initWorker で設定する)
+workerSolver: Solver | None = None
+workerCache: EvaluationCache | None = None
+
+
+class ReplayResult:
+    """1ゲーム・1戦略分の再生結果
+    """
+
+    def __init__(self, numOfDecisions: int, numOfDiffs: int, regret: float, points: int) -> None:
+        """コンストラクタ
+
+        Args:
+            numOfDecisions (int): 記録した選択の数(振り直し + 役)
+            numOfDiffs (int): 記録と異なる選択の数
+            regret (float): 記録した選択の後悔の合計
+            points (int): 戦略に従って再生したときの合計点
+        """
+        self.numOfDecisions: int = numOfDecisions
+        self.numOfDiffs: int = numOfDiffs
+        self.regret: float = regret
+        self.points: int = points
+
+
+def initWorker() -> None:
+    """プロセスごとに最適戦略とキャッシュを用意する
+    """
+    global workerSolver, workerCache
+    workerSolver = Solver.load()
+    workerCache = EvaluationCache()
+
+
+def evaluateRegret(record: GameRecord, rerollMode: HandChoiseMode, choiseMode: HandChoiseMode,
+                   solver: Solver, cache: EvaluationCache, logger: logging.Logger) -> tuple[int, int, float]:
+    """記録したサイコロと選択をたどり、選択ごとに戦略の選択との後悔を求める
+
+    後悔は「戦略の選択の値 - 記録した選択の値」であり、値は以降を最適に選択したときの合計点の期待値(Solver)とする。
+    振り直しは残す目が同じであれば同じ選択とみなす。
+
+    Args:
+        record (GameRecord): ゲームの記録
+        rerollMode (HandChoiseMode): 振り直し時の役選択/評価モード
+        choiseMode (HandChoiseMode): 役選択モード
+        solver (Solver): 最適戦略
+        cache (EvaluationCache): 役選択結果のキャッシュ
+        logger (logging.Logger): ロガー
+
+    Returns:
+        int: 記録した選択の数
+        int: 記録と異なる選択の数
+        float: 後悔の合計
+    """
+    numOfDecisions: int = 0
+    numOfDiffs: int = 0
+    regret: float = 0
+    field: Field = Field(logger)
+    for (indexes, bits, hand) in record.getTurns():
+        evaluator: Evaluator = Evaluator(field, logger, rerollMode, False, solver, cache)
+        openMask: int = field.getOpenMask()
+        upperSum: int = field.getSumOfNumHands()
+
+        for (rollCount, bit) in enumerate(bits, 1):
+            dice: Dice = Dice(list(Dice.pipsOfIndex(indexes[rollCount - 1])))
+            rerollCount: int = record.getMaxRollCount() - rollCount
+            reroll: Reroll = evaluator.choiseReroll(dice, rerollMode, choiseMode, rerollCount)
+            numOfDecisions += 1
+            if dice.getKeptPips(reroll) != dice.getKeptPips(Reroll(bit)):
+                numOfDiffs += 1
+                regret += solver.getRerollValue(openMask, upperSum, dice.index(), rerollCount, reroll.toBit()) \
+                    - solver.getRerollValue(openMask, upperSum, dice.index(), rerollCount, bit)
+
+        dice = Dice(list(Dice.pipsOfIndex(indexes[-1])))
+        (choisedHand, _) = evaluator.choiseHand(dice, choiseMode)
+        numOfDecisions += 1
+        if choisedHand != hand:
+            numOfDiffs += 1
+            regret += getHandValue(field, solver, choisedHand, dice.index()) - getHandValue(field, solver, hand, dice.index())
+
+        # 記録した役を選択して次のターンへ進む
+        field.setDice(hand, dice)
+
+    return (numOfDecisions, numOfDiffs, regret)
+
+
+def getHandValue(field: Field, solver: Solver, hand: Hands, index: int) -> float:
+    """役を選択したときの値(取得点 + 選択後の状態の値)を取得する
+
+    Args:
+        field (Field): フィールド(選択前)
+        solver (Solver): 最適戦略
+        hand (Hands): 選択する役
+        index (int): サイコロのインデックス
+
+    Returns:
+        float: 以降を最適に選択したときの、最終ターンまでに得られる点の期待値
+    """
+    (_, gainedPoints, _) = field.getInfoToSetByIndex(hand, index)
+    return gainedPoints + solver.getValueAfter(field.getOpenMask(), field.getSumOfNumHands(), hand, gainedPoints)
+
+
+def playCounterfactual(record: GameRecord, rerollMode: HandChoiseMode, choiseMode: HandChoiseMode,
+                       solver: Solver, cache: EvaluationCache, logger: logging.Logger) -> GameRecord:
+    """記録したゲームのシードのサイコロで、戦略に従って1ゲームを再生する
+
+    サイコロは記録した乱数列(ゲームごとのシード)から振るため、選択が記録と同じ間は記録と同じ出目となり、
+    異なる選択をした後は同じ乱数列の続きから振る。
+
+    Args:
+        record (GameRecord): ゲームの記録
+        rerollMode (HandChoiseMode): 振り直し時の役選択/評価モード
+        choiseMode (HandChoiseMode): 役選択モード
+        solver (Solver): 最適戦略
+        cache (EvaluationCache): 役選択結果のキャッシュ
+        logger (logging.Logger): ロガー
+
+    Returns:
+        GameRecord: 再生したゲームの記録
+    """
+    maxRollCount: int = record.getMaxRollCount()
+    roller: DiceRoller = DiceRoller(np.random.default_rng(record.getSeed()))
+    replayed: GameRecord = GameRecord(record.getGameCount(), record.getSeed(), maxRollCount)
+
+    field: Field = Field(logger)
+    for _ in range(len(Hands)):
+        dice: Dice = Dice()
+        evaluator: Evaluator = Evaluator(field, logger, rerollMode, False, solver, cache)
+
+        dice.rollAll(roller)
+        indexes: list[int] = [dice.index()]
+        bits: list[int] = []
+        for rollCount in range(2, maxRollCount + 1):
+            reroll: Reroll = evaluator.choiseReroll(dice, rerollMode, choiseMode, maxRollCount - rollCount + 1)
+            bits.append(reroll.toBit())
+            if reroll.exist():
+                dice.reroll(reroll, roller)
+            indexes.append(dice.index())
+
+        (hand, _) = evaluator.choiseHand(dice, choiseMode)
+        field.setDice(hand, dice)
+        replayed.addTurn(indexes, bits, hand)
+
+    replayed.setPoints(field.sum())
+    return replayed
+
+
+def replayGame(task: tuple[int, GameRecord]) -> tuple[int, int, dict[tuple[HandChoiseMode, HandChoiseMode], ReplayResult]]:
+    """1ゲームをすべての戦略で再生する(プロセスで実行する)
+
+    Args:
+        task (tuple[int, GameRecord]): (ファイル番号, ゲームの記録)
+
+    Returns:
+        int: ファイル番号
+        int: 記録した合計点
+        dict[tuple[HandChoiseMode, HandChoiseMode], ReplayResult]: 戦略ごとの再生結果
+    """
+    (fileCount, record) = task
+    assert workerSolver is not None and workerCache is not None
+    logger: logging.Logger = logging.getLogger(__name__)
+
+    results: dict[tuple[HandChoiseMode, HandChoiseMode], ReplayResult] = {}
+    for (rerollMode, choiseMode) in MODE_PAIRS:
+        (numOfDecisions, numOfDiffs, regret) = evaluateRegret(record, rerollMode, choiseMode, workerSolver, workerCache, logger)
+        replayed: GameRecord = playCounterfactual(record, rerollMode, choiseMode, workerSolver, workerCache, logger)
+        results[(rerollMode, choiseMode)] = ReplayResult(numOfDecisions, numOfDiffs, regret, replayed.getPoints())
+    return (fileCount, record.getPoints(), results)
+
+
+def iterateTasks(readers: list[GameRecordReader]) -> Iterator[tuple[int, GameRecord]]:
+    """すべてのファイルのゲームの記録を順に読み込む
+
+    Args:
+        readers (list[GameRecordReader]): ファイルごとの読み込み
+
+    Yields:
+        tuple[int, GameRecord]: (ファイル番号, ゲームの記録)
+    """
+    for (fileCount, reader) in enumerate(readers):
+        for record in reader:
+            yield (fileCount, record)
+
+
+def toTable(readers: list[GameRecordReader], paths: list[str], recordedPoints: list[list[int]],
+            results: list[dict[tuple[HandChoiseMode, HandChoiseMode], list[ReplayResult]]]) -> list[str]:
+    """比較表(Markdown)を作成する
+
+    後悔は記録した選択ごとの「戦略の選択の値 - 記録した選択の値」の合計であり、正の場合は戦略の選択の方が期待値が高い。
+    差分は同じシードで再生した合計点と記録した合計点のゲームごとの差の平均である。
+
+    Args:
+        readers (list[GameRecordReader]): ファイルごとの読み込み
+        paths (list[str]): ファイルパスの一覧
+        recordedPoints (list[list[int]]): ファイルごとのゲームごとの記録した合計点
+        results (list[dict[tuple[HandChoiseMode, HandChoiseMode], list[ReplayResult]]]): ファイルごとの戦略ごとのゲームごとの再生結果
+
+    Returns:
+        list[str]: 比較表の行
+    """
+    lines: list[str] = []
+    for (reader, path, points, fileResults) in zip(readers, paths, recordedPoints, results):
+        recorded: np.ndarray = np.array(points)
+        lines += [
+            f'### {os.path.basename(path)}',
+            '',
+            f'Recorded: {reader.getRerollMode().name} / {reader.getChoiseMode().name}{" (lookahead)" if reader.isLookahead() else ""}'
+            f', {len(recorded)} games, Ave. {np.mean(recorded) if len(recorded) else 0:.2f}',
+            '',
+            '| RerollMode | ChoiseMode | Decisions | Differ | Regret/decision | Regret/game (95% CI) | Replay Ave. | Diff. from recorded (95% CI) |',
+            '|---|---|---|---|---|---|---|---|',
+        ]
+        for ((rerollMode, choiseMode), gameResults) in fileResults.items():
+            numOfDecisions: int = sum(result.numOfDecisions for result in gameResults)
+            numOfDiffs: int = sum(result.numOfDiffs for result in gameResults)
+            regrets: np.ndarray = np.array([result.regret for result in gameResults])
+            diffs: np.ndarray = np.array([result.points for result in gameResults]) - recorded
+            regretHalfWidth: float = Z_95 * np.std(regrets, ddof=1) / np.sqrt(len(regrets)) if 1 < len(regrets) else np.nan
+            diffHalfWidth: float = Z_95 * np.std(diffs, ddof=1) / np.sqrt(len(diffs)) if 1 < len(diffs) else np.nan
+            lines.append(f'| {rerollMode.name:<11} | {choiseMode.name:<11} | {numOfDecisions:>9} | {numOfDiffs:>6} '
+                         f'| {np.sum(regrets) / max(numOfDecisions, 1):>+8.4f} | {np.mean(regrets):>+7.2f} (±{regretHalfWidth:.2f}) '
+                         f'| {np.mean(recorded + diffs):>6.2f} | {np.mean(diffs):>+7.2f} (±{diffHalfWidth:.2f}) |')
+        lines.append('')
+    return lines
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger: logging.Logger = logging.getLogger(__name__)
+
+    paths: list[str] = sys.argv[1:]
+    if not paths:
+        logger.error(f'usage: python {os.path.basename(__file__)} <game record file(.yzgr)> ...')
+        return
+    readers: list[GameRecordReader] = [GameRecordReader(path) for path in paths]
+    Solver.loadOrBuild(logger)
+
+    recordedPoints: list[list[int]] = [[] for _ in readers]
+    results: list[dict[tuple[HandChoiseMode, HandChoiseMode], list[ReplayResult]]] = [{modePair: [] for modePair in MODE_PAIRS} for _ in readers]
+    numOfGames: int = sum(len(reader) for reader in readers)
+
+    startTime: float = time.time()
+    if WORKER_COUNT <= 1:
+        initWorker()
+        for (count, (fileCount, points, gameResults)) in enumerate(map(replayGame, iterateTasks(readers)), 1):
+            recordedPoints[fileCount].append(points)
+            for (modePair, result) in gameResults.items():
+                results[fileCount][modePair].append(result)
+            logger.info(f'{count:>5}/{numOfGames} replayed')
+    else:
+        with multiprocessing.Pool(WORKER_COUNT, initializer=initWorker) as pool:
+            for (count, (fileCount, points, gameResults)) in enumerate(pool.imap(replayGame, iterateTasks(readers), chunksize=CHUNK_SIZE), 1):
+                recordedPoints[fileCount].append(points)
+                for (modePair, result) in gameResults.items():
+                    results[fileCount][modePair].append(result)
+                logger.info(f'{count:>5}/{numOfGames} replayed')
+            pool.close()
+            pool.join()
+    elapsedTime: float = time.time() - startTime
+
+    lines: list[str] = [f'Replayed: {numOfGames} games ({elapsedTime:.1f}s)', ''] + toTable(readers, paths, recordedPoints, results)
+    timestamp: str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    with open(OUTPUT_FILE_NAME.format(timestamp=timestamp), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    for line in lines:
+        logger.info(line)
+
+
+if __name__ == '__main__':
+    main()
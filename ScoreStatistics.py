@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import math
+
+from GameRecord import GameRecord
+from Yahtzee import Calculator, Field, Hands
+
+
+class ScoreStatistics:
+    """ゲームの合計点の統計を1ゲームずつ更新する
+
+    平均と分散は Welford 法で更新し、中央値と分位点は点数ごとの度数(合計点は整数のため固定の区間)から正確に求める。
+    保持するデータ量はゲーム数によらない。別のプロセスで集計した統計は merge で合算できる。
+    """
+
+    # 定数定義
+    MAX_POINTS: int = sum(Calculator.getBestPoints(hand) for hand in Hands) + Field.POINT_BONUS  # 合計点の最大値
+
+    def __init__(self) -> None:
+        """コンストラクタ
+        """
+        # ゲーム数
+        self.__count__: int = 0
+        # 平均
+        self.__mean__: float = 0
+        # 平均との差の2乗和
+        self.__m2__: float = 0
+        # 最大点
+        self.__max__: int = 0
+        # 最小点
+        self.__min__: int = ScoreStatistics.MAX_POINTS
+        # 合計点ごとのゲーム数
+        self.__histogram__: list[int] = [0] * (ScoreStatistics.MAX_POINTS + 1)
+        # 役ごとの取得点の合計
+        self.__handPoints__: dict[Hands, int] = {hand: 0 for hand in Hands}
+        # 役ごとの 0 点だったゲーム数
+        self.__handZeros__: dict[Hands, int] = {hand: 0 for hand in Hands}
+        # ボーナス点を得たゲーム数
+        self.__bonusCount__: int = 0
+
+    def add(self, points: int) -> None:
+        """1ゲームの合計点を追加する
+
+        Args:
+            points (int): 合計点
+        """
+        assert 0 <= points and points <= ScoreStatistics.MAX_POINTS
+
+        self.__count__ += 1
+        delta: float = points - self.__mean__
+        self.__mean__ += delta / self.__count__
+        self.__m2__ += delta * (points - self.__mean__)
+        self.__max__ = max(self.__max__, points)
+        self.__min__ = min(self.__min__, points)
+        self.__histogram__[points] += 1
+
+    def addRecord(self, record: GameRecord) -> None:
+        """1ゲームの記録を追加する(役ごとの取得点とボーナス点を含む)
+
+        Args:
+            record (GameRecord): ゲームの記録
+        """
+        self.add(record.getPoints())
+
+        sumOfNumHands: int = 0
+        for (indexes, _, hand) in record.getTurns():
+            points: int = Calculator.calculatePointsByIndex(hand, indexes[-1])
+            self.__handPoints__[hand] += points
+            if points == 0:
+                self.__handZeros__[hand] += 1
+            if hand in Hands.getNumHands():
+                sumOfNumHands += points
+        if Field.BONUS_BORDER <= sumOfNumHands:
+            self.__bonusCount__ += 1
+
+    def merge(self, other: ScoreStatistics) -> None:
+        """他の統計を合算する
+
+        Args:
+            other (ScoreStatistics): 統計
+        """
+        if other.__count__ == 0:
+            return
+        count: int = self.__count__ + other.__count__
+        delta: float = other.__mean__ - self.__mean__
+        self.__mean__ += delta * other.__count__ / count
+        self.__m2__ += other.__m2__ + delta * delta * self.__count__ * other.__count__ / count
+        self.__count__ = count
+        self.__max__ = max(self.__max__, other.__max__)
+        self.__min__ = min(self.__min__, other.__min__)
+        self.__histogram__ = [frequency + otherFrequency for (frequency, otherFrequency) in zip(self.__histogram__, other.__histogram__)]
+        for hand in Hands:
+            self.__handPoints__[hand] += other.__handPoints__[hand]
+            self.__handZeros__[hand] += other.__handZeros__[hand]
+        self.__bonusCount__ += other.__bonusCount__
+
+    def count(self) -> int:
+        """ゲーム数を取得する
+
+        Returns:
+            int: ゲーム数
+        """
+        return self.__count__
+
+    def mean(self) -> float:
+        """平均を取得する
+
+        Returns:
+            float: 平均
+        """
+        return self.__mean__
+
+    def std(self) -> float:
+        """標準偏差(母集団)を取得する
+
+        Returns:
+            float: 標準偏差
+        """
+        return math.sqrt(self.__m2__ / self.__count__) if 0 < self.__count__ else 0
+
+    def max(self) -> int:
+        """最大点を取得する
+
+        Returns:
+            int: 最大点
+        """
+        return self.__max__
+
+    def min(self) -> int:
+        """最小点を取得する
+
+        Returns:
+            int: 最小点
+        """
+        return self.__min__
+
+    def __valueAt__(self, rank: int) -> int:
+        """昇順に並べたときの rank 番目(0始まり)の合計点を取得する
+
+        Args:
+            rank (int): 順位
+
+        Returns:
+            int: 合計点
+        """
+        cumulative: int = 0
+        for (points, frequency) in enumerate(self.__histogram__):
+            cumulative += frequency
+            if rank < cumulative:
+                return points
+        return self.__max__
+
+    def quantile(self, q: float) -> float:
+        """分位点を取得する(numpy.quantile の既定と同じく線形補間する)
+
+        Args:
+            q (float): 0 - 1
+
+        Returns:
+            float: 分位点
+        """
+        if self.__count__ == 0:
+            return 0
+        position: float = q * (self.__count__ - 1)
+        lower: int = math.floor(position)
+        lowerValue: int = self.__valueAt__(lower)
+        if lower == position:
+            return lowerValue
+        return lowerValue + (self.__valueAt__(lower + 1) - lowerValue) * (position - lower)
+
+    def median(self) -> float:
+        """中央値を取得する
+
+        Returns:
+            float: 中央値
+        """
+        return self.quantile(0.5)
+
+    def getBonusRate(self) -> float:
+        """ボーナス点を得たゲームの割合を取得する
+
+        Returns:
+            float: 割合
+        """
+        return self.__bonusCount__ / self.__count__ if 0 < self.__count__ else 0
+
+    def getHandLines(self) -> list[str]:
+        """役ごとの平均点と 0 点の割合の行を取得する(addRecord で追加したゲームのみ)
+
+        Returns:
+            list[str]: 役ごとの行
+        """
+        games: int = max(self.__count__, 1)
+        return [f'{hand.name:<15}: Ave. {self.__handPoints__[hand] / games: >6.3f} Zero: {self.__handZeros__[hand] / games: >7.2%}' for hand in Hands]
+
+    def __str__(self) -> str:
+        """文字列化する
+
+        Returns:
+            str: 文字列
+        """
+        return (f'games: {self.__count__} ave.: {self.__mean__: >7.3f} std.dev: {self.std(): >7.3f} '
+                f'median: {self.median(): >5.1f} min: {self.__min__} max: {self.__max__} bonus: {self.getBonusRate(): >7.2%}')
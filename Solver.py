@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from DiceTable import DiceTable
+from StrategyTable import StrategyTable
+from Yahtzee import Dice, Evaluator, Field, Hands, Reroll
+
+
+class Solver:
+    """合計点の期待値を最大化する最適戦略を後ろ向き帰納法で求める
+
+    状態は(未割り当ての役のビットマスク, 数字役の合計点(BONUS_BORDERで打ち切り))で表し、
+    状態ごとの値は「その状態から最終ターンまでに得られる点(ボーナスを含む)の期待値」とする。
+    """
+
+    # 定数定義
+    NUM_OF_MASKS: int = pow(2, len(Hands))  # 未割り当ての役のビットマスクの個数
+    NUM_OF_UPPERS: int = Field.BONUS_BORDER + 1  # 数字役の合計点の状態数(0 - BONUS_BORDER)
+    NUM_OF_REROLLS: int = 2  # 1ターンでの振り直し回数
+    TABLE_FILE_NAME: str = 'solver_table.yzt'  # 状態ごとの値の保存先
+    TIE_TOLERANCE: float = 1e-9  # 同点とみなす期待値の差(計算順序による丸め誤差を吸収する)
+
+    def __init__(self, values: np.ndarray | None = None) -> None:
+        """コンストラクタ
+
+        Args:
+            values (np.ndarray | None, optional): 状態ごとの値(NUM_OF_MASKS x NUM_OF_UPPERS). Defaults to None(未計算).
+        """
+        if values is None:
+            values = np.zeros((Solver.NUM_OF_MASKS, Solver.NUM_OF_UPPERS))
+        assert values.shape == (Solver.NUM_OF_MASKS, Solver.NUM_OF_UPPERS)
+
+        # 状態ごとの値
+        self.__values__: np.ndarray = values
+        # 直近に計算したターン内の評価表
+        self.__turnKey__: tuple[int, int] | None = None
+        self.__turn__: list[np.ndarray] = []
+
+    def solveTurns(self, openMasks: np.ndarray, uppers: np.ndarray) -> list[np.ndarray]:
+        """状態ごとに1ターン分のサイコロの評価表を求める
+
+        Args:
+            openMasks (np.ndarray): 未割り当ての役のビットマスクの配列(S)
+            uppers (np.ndarray): 数字役の合計点の配列(S, 0 - BONUS_BORDER)
+
+        Returns:
+            list[np.ndarray]: [r-1]: 残りの振り直し回数が r のときの残す目ごとの評価表(残す目の個数 x S)
+                              [-1]: 1投目のサイコロの評価表(NUM_OF_STATES x S)
+        """
+        # 振り直しなし: 役を選択したときの 取得点 + 選択後の状態の値 の最大値
+        values: np.ndarray = np.full((Dice.NUM_OF_STATES, len(uppers)), -np.inf)
+        for column in range(DiceTable.NUM_OF_HANDS):
+            isOpen: np.ndarray = (openMasks >> column) & 1 == 1
+            if not isOpen.any():
+                continue
+            points: np.ndarray = DiceTable.POINTS[:, column][:, np.newaxis]
+            nextMasks: np.ndarray = openMasks & ~(1 << column)
+            if DiceTable.IS_NUM_HAND[column]:
+                sums: np.ndarray = uppers[np.newaxis, :] + points
+                bonus: np.ndarray = np.where((uppers[np.newaxis, :] < Field.BONUS_BORDER) & (Field.BONUS_BORDER <= sums), Field.POINT_BONUS, 0)
+                handValues: np.ndarray = points + bonus + self.__values__[nextMasks[np.newaxis, :], np.minimum(sums, Field.BONUS_BORDER)]
+            else:
+                handValues = points + self.__values__[nextMasks, uppers][np.newaxis, :]
+            np.maximum(values, np.where(isOpen[np.newaxis, :], handValues, -np.inf), out=values)
+
+        # 振り直しあり: 残す目ごとの期待値の最大値
+        turn: list[np.ndarray] = [values]
+        for _ in range(Solver.NUM_OF_REROLLS):
+            keepValues: np.ndarray = DiceTable.TRANSITION @ values
+            values = keepValues[DiceTable.INDEX_TO_KEEP].max(axis=1)
+            turn[-1:] = [keepValues, values]
+        return turn
+
+    @classmethod
+    def build(cls, logger: logging.Logger) -> Solver:
+        """全状態の値を後ろ向き帰納法で求める
+
+        Args:
+            logger (logging.Logger): ロガー
+
+        Returns:
+            Solver: 最適戦略
+        """
+        startTime: float = time.time()
+        tracemalloc.start()
+
+        solver: Solver = Solver()
+        uppers: np.ndarray = np.arange(Solver.NUM_OF_UPPERS)
+        # 役を1つ割り当てると未割り当ての役のビットマスクは小さくなるので、昇順に求めれば遷移先は計算済となる
+        for openMask in range(1, Solver.NUM_OF_MASKS):
+            turn: list[np.ndarray] = solver.solveTurns(np.full(Solver.NUM_OF_UPPERS, openMask), uppers)
+            solver.__values__[openMask] = DiceTable.FIRST_ROLL @ turn[-1]
+
+        (_, peakMemory) = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        endTime: float = time.time()
+
+        logger.info(f'{"Solver":<15}: Expected: {solver.getValue(Solver.NUM_OF_MASKS - 1, 0): >7.4f}')
+        logger.info(f'{"Solver":<15}: Build time: {endTime - startTime: >7.3f}s Peak memory: {peakMemory / 1024 / 1024: >7.3f}MiB')
+        return solver
+
+    @classmethod
+    def argmax(cls, values: np.ndarray, axis: int = -1) -> np.ndarray:
+        """最大値となる位置を取得する(TIE_TOLERANCE 以内の差は同点とみなし、最初の位置を選ぶ)
+
+        Args:
+            values (np.ndarray): 値
+            axis (int, optional): 対象の軸. Defaults to -1.
+
+        Returns:
+            np.ndarray: 最大値となる位置
+        """
+        return np.argmax(values >= values.max(axis=axis, keepdims=True) - Solver.TIE_TOLERANCE, axis=axis)
+
+    def save(self, path: str = TABLE_FILE_NAME) -> None:
+        """状態ごとの値を保存する
+
+        Args:
+            path (str, optional): ファイルパス. Defaults to TABLE_FILE_NAME.
+        """
+        StrategyTable.write(path, {'values': self.__values__})
+
+    @classmethod
+    def load(cls, path: str = TABLE_FILE_NAME, isVerify: bool = False) -> Solver:
+        """保存した状態ごとの値を読み込む(メモリマップで参照する)
+
+        Args:
+            path (str, optional): ファイルパス. Defaults to TABLE_FILE_NAME.
+            isVerify (bool, optional): データのチェックサムを検証するか(プロセスごとに読み込む場合は、親プロセスで1回検証する). Defaults to False.
+
+        Returns:
+            Solver: 最適戦略
+
+        Raises:
+            ValueError: ファイルが壊れている場合
+        """
+        return Solver(StrategyTable(path, isVerify).get('values'))
+
+    @classmethod
+    def loadOrBuild(cls, logger: logging.Logger, path: str = TABLE_FILE_NAME) -> Solver:
+        """保存した状態ごとの値を読み込む(存在しない場合は求めて保存する)
+
+        読み込む場合はデータのチェックサムを検証する。
+
+        Args:
+            logger (logging.Logger): ロガー
+            path (str, optional): ファイルパス. Defaults to TABLE_FILE_NAME.
+
+        Returns:
+            Solver: 最適戦略
+
+        Raises:
+            ValueError: ファイルが壊れている場合
+        """
+        if os.path.exists(path):
+            return Solver.load(path, True)
+
+        solver: Solver = Solver.build(logger)
+        solver.save(path)
+        return solver
+
+    def getValues(self) -> np.ndarray:
+        """状態ごとの値を取得する
+
+        Returns:
+            np.ndarray: 状態ごとの値(NUM_OF_MASKS x NUM_OF_UPPERS)
+        """
+        return self.__values__
+
+    def getValue(self, openMask: int, sumOfNumHands: int) -> float:
+        """状態の値を取得する
+
+        Args:
+            openMask (int): 未割り当ての役のビットマスク
+            sumOfNumHands (int): 数字役の合計点
+
+        Returns:
+            float: 最終ターンまでに得られる点の期待値
+        """
+        return float(self.__values__[openMask, min(sumOfNumHands, Field.BONUS_BORDER)])
+
+    def getValueAfter(self, openMask: int, sumOfNumHands: int, hand: Hands, gainedPoints: int) -> float:
+        """役を選択した後の状態の値を取得する
+
+        Args:
+            openMask (int): 未割り当ての役のビットマスク(選択前)
+            sumOfNumHands (int): 数字役の合計点(選択前)
+            hand (Hands): 選択する役
+            gainedPoints (int): 役を選択したときの取得点(ボーナスを含む)
+
+        Returns:
+            float: 選択後の状態から最終ターンまでに得られる点の期待値
+        """
+        column: int = list(Hands).index(hand)
+        assert (openMask >> column) & 1
+        if DiceTable.IS_NUM_HAND[column]:
+            # ボーナスを含む場合も BONUS_BORDER 以上となるため、打ち切り後の値は同じになる
+            sumOfNumHands += gainedPoints
+        return self.getValue(openMask & ~(1 << column), sumOfNumHands)
+
+    def choiseReroll(self, openMask: int, sumOfNumHands: int, index: int, rerollCount: int) -> tuple[int, float]:
+        """最適な振り直しを選択する
+
+        Args:
+            openMask (int): 未割り当ての役のビットマスク
+            sumOfNumHands (int): 数字役の合計点
+            index (int): 現在のサイコロのインデックス
+            rerollCount (int): 今回を含む残りの振り直し回数
+
+        Returns:
+            int: 振り直しのビット
+            float: 最終ターンまでに得られる点の期待値
+        """
+        assert 1 <= rerollCount and rerollCount <= Solver.NUM_OF_REROLLS
+
+        keepValues: np.ndarray = self.__getTurn__(openMask, sumOfNumHands)[rerollCount - 1][DiceTable.INDEX_TO_KEEP[index], 0]
+        column: int = int(Solver.argmax(keepValues))
+        return (int(DiceTable.INDEX_TO_BIT[index, column]), float(keepValues[column]))
+
+    def getRerollValue(self, openMask: int, sumOfNumHands: int, index: int, rerollCount: int, bit: int) -> float:
+        """振り直しを選択したときの値を取得する
+
+        Args:
+            openMask (int): 未割り当ての役のビットマスク
+            sumOfNumHands (int): 数字役の合計点
+            index (int): 現在のサイコロのインデックス
+            rerollCount (int): 今回を含む残りの振り直し回数
+            bit (int): 振り直しのビット(0 の場合はすべて残す)
+
+        Returns:
+            float: 以降を最適に選択したときの、最終ターンまでに得られる点の期待値
+        """
+        assert 1 <= rerollCount and rerollCount <= Solver.NUM_OF_REROLLS
+
+        # 残す目が同じ振り直しは同じ列となる
+        pips: tuple[int, ...] = Dice.pipsOfIndex(index)
+        keptPips: tuple[int, ...] = tuple(pips[idx] for idx in range(Dice.NUM_OF_DICE) if not Reroll.__bitCheck__(bit, idx))
+        column: int = [kept for (_, kept) in Evaluator.getKeeps(index)].index(keptPips)
+        return float(self.__getTurn__(openMask, sumOfNumHands)[rerollCount - 1][DiceTable.INDEX_TO_KEEP[index, column], 0])
+
+    def __getTurn__(self, openMask: int, sumOfNumHands: int) -> list[np.ndarray]:
+        """状態の1ターン分のサイコロの評価表を取得する(直近の状態のみ保持する)
+
+        Args:
+            openMask (int): 未割り当ての役のビットマスク
+            sumOfNumHands (int): 数字役の合計点
+
+        Returns:
+            list[np.ndarray]: solveTurns の結果(S = 1)
+        """
+        key: tuple[int, int] = (openMask, min(sumOfNumHands, Field.BONUS_BORDER))
+        if self.__turnKey__ != key:
+            self.__turn__ = self.solveTurns(np.array([key[0]]), np.array([key[1]]))
+            self.__turnKey__ = key
+        return self.__turn__
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    Solver.build(logging.getLogger(__name__)).save()
+
+
+if __name__ == '__main__':
+    main()
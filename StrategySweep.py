@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import datetime
+import itertools
+import logging
+import time
+
+import numpy as np
+
+from BatchSimulator import BatchSimulator, ModeBatchPolicy
+from DiceTable import DiceTable
+from Solver import Solver
+from Yahtzee import HandChoiseMode
+
+# 定数定義
+GAME_COUNT: int = 10000
+BATCH_SIZE: int = 2000
+SEED: int = 0
+Z_95: float = 1.959964  # 95%信頼区間の標準正規分布の分位点
+OUTPUT_FILE_NAME: str = 'sweep_{timestamp}.md'  # 比較表の出力先
+
+
+def sweep(modePairs: list[tuple[HandChoiseMode, HandChoiseMode]], gameCount: int, batchSize: int, seed: int,
+          solver: Solver | None) -> dict[tuple[HandChoiseMode, HandChoiseMode], np.ndarray]:
+    """すべての戦略を同じサイコロの出目で並行して実行する
+
+    BatchSimulator は振り直しの有無によらずすべてのサイコロ分の乱数を消費するため、
+    同じシードの乱数生成器を使えば戦略によらずゲーム・ターン・投目ごとに同じ出目となる。
+    また、同じターンの評価表は戦略間で共有する(ターンごとに破棄する)。
+
+    Args:
+        modePairs (list[tuple[HandChoiseMode, HandChoiseMode]]): (振り直し時の役選択/評価モード, 役選択モード)の一覧
+        gameCount (int): ゲーム数
+        batchSize (int): まとめて実行するゲーム数
+        seed (int): シード
+        solver (Solver | None): 最適戦略(HandChoiseMode.Optimal 使用時に必要)
+
+    Returns:
+        dict[tuple[HandChoiseMode, HandChoiseMode], np.ndarray]: 戦略ごとのゲームごとの合計点
+    """
+    cache: dict[tuple, np.ndarray] = {}
+    policies: dict[tuple[HandChoiseMode, HandChoiseMode], ModeBatchPolicy] = {
+        modePair: ModeBatchPolicy(modePair[0], modePair[1], solver, cache) for modePair in modePairs
+    }
+
+    sumLists: dict[tuple[HandChoiseMode, HandChoiseMode], list[np.ndarray]] = {modePair: [] for modePair in modePairs}
+    for (batchCount, start) in enumerate(range(0, gameCount, batchSize)):
+        numOfGames: int = min(batchSize, gameCount - start)
+        batchSeed: np.random.SeedSequence = np.random.SeedSequence(seed, spawn_key=(batchCount,))
+        simulators: dict[tuple[HandChoiseMode, HandChoiseMode], BatchSimulator] = {
+            modePair: BatchSimulator(policy, numOfGames, np.random.default_rng(batchSeed)) for (modePair, policy) in policies.items()
+        }
+        for _ in range(DiceTable.NUM_OF_HANDS):
+            for simulator in simulators.values():
+                simulator.playTurn()
+            cache.clear()
+        for (modePair, simulator) in simulators.items():
+            sumLists[modePair].append(simulator.sums())
+
+    return {modePair: np.concatenate(sumList) for (modePair, sumList) in sumLists.items()}
+
+
+def toTable(results: dict[tuple[HandChoiseMode, HandChoiseMode], np.ndarray]) -> list[str]:
+    """比較表(Markdown)を作成する
+
+    差分は最も平均点の高い戦略との、同じサイコロの出目でのゲームごとの差の平均である。
+
+    Args:
+        results (dict[tuple[HandChoiseMode, HandChoiseMode], np.ndarray]): 戦略ごとのゲームごとの合計点
+
+    Returns:
+        list[str]: 比較表の行
+    """
+    best: np.ndarray = max(results.values(), key=np.mean)
+    lines: list[str] = [
+        '| RerollMode | ChoiseMode | Max. | Ave.   | Std.dev. | Ave. 95% CI | Diff. from best (95% CI) |',
+        '|---|---|---|---|---|---|---|',
+    ]
+    for ((rerollMode, choiseMode), sums) in results.items():
+        halfWidth: float = Z_95 * np.std(sums, ddof=1) / np.sqrt(len(sums))
+        diffs: np.ndarray = sums - best
+        diffHalfWidth: float = Z_95 * np.std(diffs, ddof=1) / np.sqrt(len(diffs))
+        lines.append(f'| {rerollMode.name:<11} | {choiseMode.name:<11} | {np.amax(sums):>4} | {np.mean(sums):>6.2f} | {np.std(sums):>8.3f} '
+                     f'| ±{halfWidth:.2f} | {np.mean(diffs):>+7.2f} (±{diffHalfWidth:.2f}) |')
+    return lines
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger: logging.Logger = logging.getLogger(__name__)
+
+    modePairs: list[tuple[HandChoiseMode, HandChoiseMode]] = list(itertools.product(HandChoiseMode, repeat=2))
+    solver: Solver = Solver.loadOrBuild(logger)
+
+    startTime: float = time.time()
+    results: dict[tuple[HandChoiseMode, HandChoiseMode], np.ndarray] = sweep(modePairs, GAME_COUNT, BATCH_SIZE, SEED, solver)
+    elapsedTime: float = time.time() - startTime
+
+    lines: list[str] = [f'Calculation amount: {GAME_COUNT} (seed: {SEED}, {elapsedTime:.1f}s)', ''] + toTable(results)
+    timestamp: str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    with open(OUTPUT_FILE_NAME.format(timestamp=timestamp), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    for line in lines:
+        logger.info(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+
+import numpy as np
+
+
+class StrategyTable:
+    """状態ごとの値や選択結果を保存するバイナリ形式の表
+
+    ファイル形式(リトルエンディアン):
+        ヘッダ      : マジック(4s), バージョン(H), 項目数(H), 項目一覧のCRC32(I)
+        項目一覧    : 項目ごとに 名前(32s), dtype(8s), 次元数(B), 形状(4Q), 位置(Q), バイト数(Q), CRC32(I)
+        データ      : 項目ごとのデータ(ALIGNMENT バイト境界に配置)
+
+    読み込み時はヘッダと項目一覧だけを解釈し、データは numpy.memmap で参照する。
+    """
+
+    # 定数定義
+    MAGIC: bytes = b'YZST'  # ファイル識別子
+    VERSION: int = 1  # ファイル形式のバージョン
+    ALIGNMENT: int = 64  # データの配置境界[byte]
+    MAX_OF_DIMENSIONS: int = 4  # 配列の最大次元数
+
+    HEADER_FORMAT: str = '<4sHHI'  # ヘッダ
+    ENTRY_FORMAT: str = '<32s8sB4QQQI'  # 項目
+
+    def __init__(self, path: str, isVerify: bool = False) -> None:
+        """コンストラクタ(表を開く)
+
+        Args:
+            path (str): ファイルパス
+            isVerify (bool, optional): データのチェックサムを検証するか. Defaults to False.
+
+        Raises:
+            ValueError: ファイル形式が不正な場合
+        """
+        self.__path__: str = path
+        # 項目名ごとの(dtype, 形状, 位置, バイト数, CRC32)
+        self.__entries__: dict[str, tuple[np.dtype, tuple[int, ...], int, int, int]] = {}
+        # 項目名ごとの配列(読み込み済のもの)
+        self.__arrays__: dict[str, np.ndarray] = {}
+
+        headerSize: int = struct.calcsize(StrategyTable.HEADER_FORMAT)
+        entrySize: int = struct.calcsize(StrategyTable.ENTRY_FORMAT)
+        with open(path, 'rb') as f:
+            header: bytes = f.read(headerSize)
+            if len(header) != headerSize:
+                raise ValueError(f'{path}: truncated header')
+            (magic, version, count, entriesCrc) = struct.unpack(StrategyTable.HEADER_FORMAT, header)
+            if magic != StrategyTable.MAGIC:
+                raise ValueError(f'{path}: not a strategy table')
+            if version != StrategyTable.VERSION:
+                raise ValueError(f'{path}: unsupported version {version}')
+
+            entries: bytes = f.read(entrySize * count)
+            if len(entries) != entrySize * count or zlib.crc32(entries) != entriesCrc:
+                raise ValueError(f'{path}: corrupted entries')
+
+        fileSize: int = os.path.getsize(path)
+        for number in range(count):
+            (name, dtype, ndim, *shape, offset, nbytes, crc) = struct.unpack_from(StrategyTable.ENTRY_FORMAT, entries, entrySize * number)
+            if fileSize < offset + nbytes:
+                raise ValueError(f'{path}: truncated data')
+            self.__entries__[name.rstrip(b'\0').decode()] = (np.dtype(dtype.rstrip(b'\0').decode()), tuple(shape[:ndim]), offset, nbytes, crc)
+
+        if isVerify:
+            self.verify()
+
+    @classmethod
+    def write(cls, path: str, arrays: dict[str, np.ndarray]) -> None:
+        """表を書き込む(一時ファイルに書き込んでから置き換える)
+
+        Args:
+            path (str): ファイルパス
+            arrays (dict[str, np.ndarray]): 項目名ごとの配列
+        """
+        headerSize: int = struct.calcsize(StrategyTable.HEADER_FORMAT)
+        entrySize: int = struct.calcsize(StrategyTable.ENTRY_FORMAT)
+
+        entries: bytes = b''
+        offset: int = headerSize + entrySize * len(arrays)
+        datas: list[tuple[int, bytes]] = []
+        for (name, array) in arrays.items():
+            assert len(name.encode()) <= 32 and array.ndim <= StrategyTable.MAX_OF_DIMENSIONS
+            data: bytes = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<')).tobytes()
+            offset = -(-offset // StrategyTable.ALIGNMENT) * StrategyTable.ALIGNMENT
+            shape: list[int] = list(array.shape) + [0] * (StrategyTable.MAX_OF_DIMENSIONS - array.ndim)
+            entries += struct.pack(StrategyTable.ENTRY_FORMAT, name.encode(), array.dtype.newbyteorder('<').str.encode(), array.ndim, *shape, offset, len(data), zlib.crc32(data))
+            datas.append((offset, data))
+            offset += len(data)
+
+        tmpPath: str = f'{path}.{os.getpid()}.tmp'
+        with open(tmpPath, 'wb') as f:
+            f.write(struct.pack(StrategyTable.HEADER_FORMAT, StrategyTable.MAGIC, StrategyTable.VERSION, len(arrays), zlib.crc32(entries)))
+            f.write(entries)
+            for (offset, data) in datas:
+                f.write(b'\0' * (offset - f.tell()))
+                f.write(data)
+        os.replace(tmpPath, path)
+
+    def names(self) -> list[str]:
+        """項目名の一覧を取得する
+
+        Returns:
+            list[str]: 項目名の一覧
+        """
+        return list(self.__entries__.keys())
+
+    def get(self, name: str) -> np.ndarray:
+        """項目の配列を取得する(読み取り専用のメモリマップ)
+
+        Args:
+            name (str): 項目名
+
+        Returns:
+            np.ndarray: 配列
+        """
+        if name not in self.__arrays__:
+            (dtype, shape, offset, _, _) = self.__entries__[name]
+            self.__arrays__[name] = np.memmap(self.__path__, dtype=dtype, mode='r', offset=offset, shape=shape)
+        return self.__arrays__[name]
+
+    def verify(self) -> None:
+        """データのチェックサムを検証する
+
+        Raises:
+            ValueError: チェックサムが一致しない場合
+        """
+        with open(self.__path__, 'rb') as f:
+            for (name, (_, _, offset, nbytes, crc)) in self.__entries__.items():
+                f.seek(offset)
+                if zlib.crc32(f.read(nbytes)) != crc:
+                    raise ValueError(f'{self.__path__}: checksum mismatch in {name}')
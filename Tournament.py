@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import datetime
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import time
+from typing import Iterator
+
+import numpy as np
+
+from Solver import Solver
+from Yahtzee import Dice, DiceRoller, EvaluationCache, Evaluator, Field, HandChoiseMode, Hands, Reroll
+
+# 定数定義
+ROUND_COUNT: int = 50  # ラウンド数(1ラウンドは同じ席のシードで席を入れ替えた、プレイヤー数分の対戦)
+WORKER_COUNT: int = os.cpu_count() or 1  # ラウンドを並列に実行するプロセス数(1の場合は並列化しない)
+SEED: int = 0  # 実行全体のシード(ラウンド・席ごとのシードはここから生成する)
+MAX_ROLL_COUNT: int = Solver.NUM_OF_REROLLS + 1  # 1ターンでサイコロを振る最大回数
+Z_95: float = 1.959964  # 95%信頼区間の標準正規分布の分位点
+INITIAL_RATING: float = 1500  # レーティングの平均
+RATING_SCALE: float = 400  # レーティング差とオッズの換算(Elo と同じく、差 RATING_SCALE で勝率 10:1)
+PRIOR_GAMES: float = 1  # レーティングの推定で組ごとに加える仮想の対戦数(勝敗は半分ずつ. 全勝・全敗でも有限にする)
+RATING_ITERATIONS: int = 1000  # レーティングの推定の最大反復回数
+RATING_TOLERANCE: float = 1e-9  # レーティングの推定を終了する変化量
+OUTPUT_FILE_NAME: str = 'tournament_{timestamp}.md'  # 結果の出力先
+
+# プレイヤー(振り直し時の役選択/評価モード, 役選択モード)
+Player = tuple[HandChoiseMode, HandChoiseMode]
+
+# 参加するプレイヤーの一覧(コマンドライン引数 <RerollMode>/<ChoiseMode> ... で置き換える)
+PLAYERS: list[Player] = [
+    (HandChoiseMode.Balance, HandChoiseMode.Balance),
+    (HandChoiseMode.MaximumGain, HandChoiseMode.Balance),
+]
+
+# プロセスごとの最適戦略と役選択結果のキャッシュ(initWorker で設定する)
+workerSolver: Solver | None = None
+workerCache: EvaluationCache | None = None
+
+
+def initWorker(isOptimal: bool) -> None:
+    """プロセスごとにキャッシュを用意し、必要な場合は最適戦略を読み込む
+
+    Args:
+        isOptimal (bool): HandChoiseMode.Optimal を使用するプレイヤーがいるか
+    """
+    global workerSolver, workerCache
+    workerCache = EvaluationCache()
+    if isOptimal:
+        workerSolver = Solver.load()
+
+
+def getSeatSeed(seed: int, roundCount: int, seat: int) -> int:
+    """ラウンド・席ごとのサイコロのシードを生成する(プロセス数によらず同じ値になる)
+
+    Args:
+        seed (int): 実行全体のシード
+        roundCount (int): ラウンド番号
+        seat (int): 席番号
+
+    Returns:
+        int: ラウンド・席ごとのシード
+    """
+    return int(np.random.SeedSequence(seed, spawn_key=(roundCount, seat)).generate_state(1)[0])
+
+
+def playSeat(player: Player, seatSeed: int, solver: Solver | None, cache: EvaluationCache, logger: logging.Logger) -> int:
+    """1人のプレイヤーが自分の場で1ゲームを実行する
+
+    Args:
+        player (Player): プレイヤー
+        seatSeed (int): 席のサイコロのシード
+        solver (Solver | None): 最適戦略(HandChoiseMode.Optimal 使用時に必要)
+        cache (EvaluationCache): 役選択結果のキャッシュ
+        logger (logging.Logger): ロガー
+
+    Returns:
+        int: 合計点
+    """
+    (rerollMode, choiseMode) = player
+    roller: DiceRoller = DiceRoller(np.random.default_rng(seatSeed))
+
+    field: Field = Field(logger)
+    for _ in range(len(Hands)):
+        dice: Dice = Dice()
+        evaluator: Evaluator = Evaluator(field, logger, rerollMode, False, solver, cache)
+
+        dice.rollAll(roller)
+        for rollCount in range(2, MAX_ROLL_COUNT + 1):
+            reroll: Reroll = evaluator.choiseReroll(dice, rerollMode, choiseMode, MAX_ROLL_COUNT - rollCount + 1)
+            if reroll.exist():
+                dice.reroll(reroll, roller)
+
+        (hand, _) = evaluator.choiseHand(dice, choiseMode)
+        field.setDice(hand, dice)
+
+    return field.sum()
+
+
+def playRound(task: tuple[int, int, list[Player]]) -> tuple[int, list[list[int]]]:
+    """1ラウンド分のゲームを実行する(プロセスで実行する)
+
+    プレイヤーのゲームは他のプレイヤーの選択に影響されないため、各プレイヤーがすべての席のシードで1ゲームずつ実行し、
+    席を入れ替えた対戦は集計時に組み立てる(toMatches)。
+
+    Args:
+        task (tuple[int, int, list[Player]]): (シード, ラウンド番号, プレイヤーの一覧)
+
+    Returns:
+        int: ラウンド番号
+        list[list[int]]: プレイヤー・席ごとの合計点
+    """
+    (seed, roundCount, players) = task
+    assert workerCache is not None
+    logger: logging.Logger = logging.getLogger(__name__)
+
+    seatSeeds: list[int] = [getSeatSeed(seed, roundCount, seat) for seat in range(len(players))]
+    return (roundCount, [[playSeat(player, seatSeed, workerSolver, workerCache, logger) for seatSeed in seatSeeds] for player in players])
+
+
+def iterateTasks(seed: int, roundCount: int, players: list[Player]) -> Iterator[tuple[int, int, list[Player]]]:
+    """ラウンドごとのタスクを作成する
+
+    Args:
+        seed (int): 実行全体のシード
+        roundCount (int): ラウンド数
+        players (list[Player]): プレイヤーの一覧
+
+    Yields:
+        Iterator[tuple[int, int, list[Player]]]: (シード, ラウンド番号, プレイヤーの一覧)
+    """
+    for count in range(roundCount):
+        yield (seed, count, players)
+
+
+def toMatches(seatPoints: np.ndarray) -> np.ndarray:
+    """プレイヤー・席ごとの合計点から、席を入れ替えた対戦ごとの合計点を組み立てる
+
+    入れ替え r の対戦では、プレイヤー p は席 (p + r) % プレイヤー数 に座る。
+    ラウンド内でどのプレイヤーもすべての席(同じサイコロのシード)を1回ずつ使用する。
+
+    Args:
+        seatPoints (np.ndarray): ラウンド・プレイヤー・席ごとの合計点(R x P x P)
+
+    Returns:
+        np.ndarray: ラウンド・入れ替え・プレイヤーごとの合計点(R x P x P)
+    """
+    numOfPlayers: int = seatPoints.shape[1]
+    rotations: np.ndarray = np.arange(numOfPlayers)[:, np.newaxis]
+    playerIndexes: np.ndarray = np.arange(numOfPlayers)[np.newaxis, :]
+    return seatPoints[:, playerIndexes, (playerIndexes + rotations) % numOfPlayers]
+
+
+def computeRatings(wins: np.ndarray) -> np.ndarray:
+    """対戦成績から Bradley-Terry モデルの強さを推定し、レーティングに換算する(MM 法)
+
+    Args:
+        wins (np.ndarray): 行のプレイヤーが列のプレイヤーに勝った回数(P x P. 引き分けは 0.5 回とする)
+
+    Returns:
+        np.ndarray: プレイヤーごとのレーティング(平均 INITIAL_RATING)
+    """
+    numOfPlayers: int = len(wins)
+    # 組ごとに仮想の対戦を加える(自分自身との対戦は除く)
+    priorWins: np.ndarray = wins + (PRIOR_GAMES / 2) * (1 - np.eye(numOfPlayers))
+    games: np.ndarray = priorWins + priorWins.T
+    totalWins: np.ndarray = priorWins.sum(axis=1)
+
+    strengths: np.ndarray = np.ones(numOfPlayers)
+    for _ in range(RATING_ITERATIONS):
+        updated: np.ndarray = totalWins / (games / (strengths[:, np.newaxis] + strengths[np.newaxis, :])).sum(axis=1)
+        updated /= np.exp(np.mean(np.log(updated)))
+        isConverged: bool = bool(np.amax(np.abs(updated - strengths)) < RATING_TOLERANCE)
+        strengths = updated
+        if isConverged:
+            break
+    return INITIAL_RATING + RATING_SCALE * np.log10(strengths)
+
+
+def toTable(players: list[Player], matches: np.ndarray) -> list[str]:
+    """結果の表(Markdown)を作成する
+
+    同じラウンドの対戦はサイコロのシードを共有するため、信頼区間はラウンドごとの平均を独立な標本として求める。
+
+    Args:
+        players (list[Player]): プレイヤーの一覧
+        matches (np.ndarray): ラウンド・入れ替え・プレイヤーごとの合計点(R x P x P)
+
+    Returns:
+        list[str]: 表の行
+    """
+    def halfWidth(samples: np.ndarray) -> float:
+        # ラウンドごとの平均の95%信頼区間の半幅
+        return Z_95 * float(np.std(samples, ddof=1)) / math.sqrt(len(samples)) if 1 < len(samples) else math.nan
+
+    names: list[str] = [f'{rerollMode.name}/{choiseMode.name}' for (rerollMode, choiseMode) in players]
+    numOfPlayers: int = len(players)
+
+    # 対戦ごとの勝ち点(最高点のプレイヤーで等分する)
+    isTop: np.ndarray = matches == matches.max(axis=2, keepdims=True)
+    shares: np.ndarray = isTop / isTop.sum(axis=2, keepdims=True)
+    # 組ごとの点差と勝ち(1)・引き分け(0.5)・負け(0)(R x P x P x P: ラウンド, 入れ替え, 行, 列)
+    margins: np.ndarray = matches[:, :, :, np.newaxis] - matches[:, :, np.newaxis, :]
+    outcomes: np.ndarray = (np.sign(margins) + 1) / 2
+    ratings: np.ndarray = computeRatings(outcomes.sum(axis=(0, 1)) * (1 - np.eye(numOfPlayers)))
+
+    lines: list[str] = [
+        '| Player | Rating | Ave. | Std.dev. | Win rate (95% CI) |',
+        '|---|---|---|---|---|',
+    ]
+    for player in np.argsort(-ratings).tolist():
+        points: np.ndarray = matches[:, :, player]
+        winRates: np.ndarray = shares[:, :, player].mean(axis=1)
+        lines.append(f'| {names[player]:<23} | {ratings[player]:>7.1f} | {np.mean(points):>6.2f} | {np.std(points):>8.3f} '
+                     f'| {np.mean(winRates):>7.2%} (±{halfWidth(winRates):.2%}) |')
+
+    lines += [
+        '',
+        '| Player | Opponent | Win | Draw | Loss | Win rate (95% CI) | Margin (95% CI) |',
+        '|---|---|---|---|---|---|---|',
+    ]
+    for (row, column) in [(row, column) for row in range(numOfPlayers) for column in range(numOfPlayers) if row != column]:
+        pairOutcomes: np.ndarray = outcomes[:, :, row, column]
+        pairMargins: np.ndarray = margins[:, :, row, column]
+        winRates = pairOutcomes.mean(axis=1)
+        roundMargins: np.ndarray = pairMargins.mean(axis=1)
+        lines.append(f'| {names[row]:<23} | {names[column]:<23} | {int(np.sum(pairOutcomes == 1)):>4} | {int(np.sum(pairOutcomes == 0.5)):>4} '
+                     f'| {int(np.sum(pairOutcomes == 0)):>4} | {np.mean(winRates):>7.2%} (±{halfWidth(winRates):.2%}) '
+                     f'| {np.mean(roundMargins):>+7.2f} (±{halfWidth(roundMargins):.2f}) |')
+    return lines
+
+
+def parsePlayers(args: list[str]) -> list[Player]:
+    """コマンドライン引数 <RerollMode>/<ChoiseMode> をプレイヤーの一覧に変換する
+
+    Args:
+        args (list[str]): コマンドライン引数
+
+    Raises:
+        ValueError: 引数が不正な場合
+
+    Returns:
+        list[Player]: プレイヤーの一覧
+    """
+    players: list[Player] = []
+    for arg in args:
+        try:
+            (rerollMode, choiseMode) = arg.split('/')
+            players.append((HandChoiseMode[rerollMode], HandChoiseMode[choiseMode]))
+        except (KeyError, ValueError) as e:
+            raise ValueError(f'invalid player: {arg} (expected <RerollMode>/<ChoiseMode>, modes: {", ".join(mode.name for mode in HandChoiseMode)})') from e
+    return players
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger: logging.Logger = logging.getLogger(__name__)
+
+    try:
+        players: list[Player] = parsePlayers(sys.argv[1:]) if sys.argv[1:] else PLAYERS
+    except ValueError as e:
+        logger.error(str(e))
+        return
+    if len(players) < 2:
+        logger.error(f'usage: python {os.path.basename(__file__)} <RerollMode>/<ChoiseMode> <RerollMode>/<ChoiseMode> ...')
+        return
+    isOptimal: bool = any(HandChoiseMode.Optimal in player for player in players)
+    if isOptimal:
+        Solver.loadOrBuild(logger)
+
+    seatPoints: np.ndarray = np.zeros((ROUND_COUNT, len(players), len(players)), dtype=np.int64)
+    startTime: float = time.time()
+    if WORKER_COUNT <= 1:
+        initWorker(isOptimal)
+        for (count, (roundCount, points)) in enumerate(map(playRound, iterateTasks(SEED, ROUND_COUNT, players)), 1):
+            seatPoints[roundCount] = points
+            logger.info(f'{count:>5}/{ROUND_COUNT} rounds')
+    else:
+        with multiprocessing.Pool(WORKER_COUNT, initializer=initWorker, initargs=(isOptimal,)) as pool:
+            for (count, (roundCount, points)) in enumerate(pool.imap_unordered(playRound, iterateTasks(SEED, ROUND_COUNT, players)), 1):
+                seatPoints[roundCount] = points
+                logger.info(f'{count:>5}/{ROUND_COUNT} rounds')
+            pool.close()
+            pool.join()
+    elapsedTime: float = time.time() - startTime
+
+    numOfMatches: int = ROUND_COUNT * len(players)
+    lines: list[str] = [
+        f'Matches: {numOfMatches} ({ROUND_COUNT} rounds x {len(players)} seat rotations, {len(players)} players, seed: {SEED}, workers: {WORKER_COUNT})',
+        f'Elapsed: {elapsedTime:.1f}s ({numOfMatches / elapsedTime:.2f} matches/s, {numOfMatches * len(players) / elapsedTime:.2f} games/s)',
+        '',
+    ] + toTable(players, toMatches(seatPoints))
+    timestamp: str = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    with open(OUTPUT_FILE_NAME.format(timestamp=timestamp), 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    for line in lines:
+        logger.info(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
-import copy
+import itertools
 import logging
 import logging.config
+import math
+import os
 import random
 import time
+from collections import OrderedDict
 from enum import Enum
-from typing import Iterator
+from typing import TYPE_CHECKING, Any, Iterator
+
+if TYPE_CHECKING:
+    from Instrumentation import Instrumentation
+    from OpeningBook import OpeningBook
+    from Solver import Solver
 
 
 class Die:
@@ -87,10 +95,99 @@ class Die:
         assert 1 <= pip and pip <= Die.MAX_OF_PIP
         self.__pip__ = pip
 
-    def roll(self) -> None:
+    @classmethod
+    def rollPip(cls, roller: DiceRoller | None = None) -> int:
+        """サイコロの目を1つ生成する
+
+        Args:
+            roller (DiceRoller | None, optional): サイコロの目の生成器. Defaults to None(random モジュールを使用する).
+
+        Returns:
+            int: サイコロの目
+        """
+        if roller is None:
+            return random.randint(Die.MIN_OF_PIP, Die.MAX_OF_PIP)
+        return roller.nextPip()
+
+    def roll(self, roller: DiceRoller | None = None) -> None:
         """サイコロを振る
+
+        Args:
+            roller (DiceRoller | None, optional): サイコロの目の生成器. Defaults to None(random モジュールを使用する).
+        """
+        self.setPip(Die.rollPip(roller))
+
+
+class DiceRoller:
+    """サイコロの目を生成する
+
+    乱数生成器(random.Random または numpy.random.Generator)から BLOCK_SIZE 個ずつまとめて目を生成しておき、順に返す。
+    """
+
+    # 定数定義
+    BLOCK_SIZE: int = 1024  # まとめて生成する目の個数
+
+    def __init__(self, generator: Any) -> None:
+        """コンストラクタ
+
+        Args:
+            generator (Any): 乱数生成器(random.Random または numpy.random.Generator)
+        """
+        # 乱数生成器
+        self.__generator__: Any = generator
+        # 生成済の目
+        self.__block__: list[int] = []
+        # 次に返す目の位置
+        self.__position__: int = 0
+
+    def __fill__(self) -> None:
+        """目をまとめて生成する
+        """
+        if hasattr(self.__generator__, 'integers'):
+            # numpy.random.Generator
+            self.__block__ = self.__generator__.integers(Die.MIN_OF_PIP, Die.MAX_OF_PIP+1, DiceRoller.BLOCK_SIZE).tolist()
+        else:
+            # random.Random
+            self.__block__ = self.__generator__.choices(range(Die.MIN_OF_PIP, Die.MAX_OF_PIP+1), k=DiceRoller.BLOCK_SIZE)
+        self.__position__ = 0
+
+    def nextPip(self) -> int:
+        """次の目を取得する
+
+        Returns:
+            int: サイコロの目
         """
-        self.setPip(random.randint(Die.MIN_OF_PIP, Die.MAX_OF_PIP))
+        if self.__position__ == len(self.__block__):
+            self.__fill__()
+        pip: int = self.__block__[self.__position__]
+        self.__position__ += 1
+        return pip
+
+    def getState(self) -> tuple[Any, list[int], int]:
+        """状態を取得する(setState で同じ目の並びを再現できる)
+
+        Returns:
+            tuple[Any, list[int], int]: 乱数生成器の状態, 生成済の目, 次に返す目の位置
+        """
+        if hasattr(self.__generator__, 'bit_generator'):
+            generatorState: Any = self.__generator__.bit_generator.state
+        else:
+            generatorState = self.__generator__.getstate()
+        return (generatorState, list(self.__block__), self.__position__)
+
+    def setState(self, state: tuple[Any, list[int], int]) -> None:
+        """状態を復元する
+
+        Args:
+            state (tuple[Any, list[int], int]): getState で取得した状態
+        """
+        (generatorState, block, position) = state
+        if hasattr(self.__generator__, 'bit_generator'):
+            self.__generator__.bit_generator.state = generatorState
+        else:
+            self.__generator__.setstate(generatorState)
+        self.__block__ = list(block)
+        self.__position__ = position
 
 
 class Reroll:
@@ -200,6 +297,14 @@ class Reroll:
         """
         return self.__bitCheck__(self.__toBit__(self.__indexList__), index)
 
+    def toBit(self) -> int:
+        """振り直し対象をビットで取得する
+
+        Returns:
+            int: 振り直し対象のビット
+        """
+        return self.__toBit__(self.__indexList__)
+
     def toList(self) -> list[int]:
         """リストに変換する
 
@@ -215,6 +320,12 @@ class Dice:
 
     # 定数定義
     NUM_OF_DICE: int = 5  # サイコロの個数
+    NUM_OF_STATES: int = 252  # 昇順に並べたサイコロの目の組み合わせ数
+
+    # インデックスごとのサイコロの目(昇順)
+    __ALL_PIPS__: list[tuple[int, ...]] = []
+    # サイコロの目(昇順)からインデックスへの対応
+    __PIPS_TO_INDEX__: dict[tuple[int, ...], int] = {}
 
     def __init__(self, pips: list[int] = [-1, -1, -1, -1, -1]) -> None:
         """コンストラクタ
@@ -224,8 +335,7 @@ class Dice:
         """
         assert Dice.NUM_OF_DICE == len(pips)
 
-        self.__dice__: list[Die] = [Die(pip) for pip in pips]  # サイコロリスト
-        self.sort()
+        self.__state__: DiceState = DiceState.ofPips([Die(pip).pip() for pip in pips])  # サイコロの目(昇順)
 
     def __iter__(self) -> Iterator[Die]:
         """イテレータを取得する
@@ -233,7 +343,7 @@ class Dice:
         Returns:
             Iterator[Die]: イテレータ
         """
-        return self.__dice__.__iter__()
+        return iter([Die(pip) for pip in self.__state__.pips()])
 
     def __str__(self) -> str:
         """文字列化する
@@ -261,7 +371,7 @@ class Dice:
             bool: 比較結果
         """
         if type(other) == Dice:
-            return self.__dice__ == other.__dice__
+            return self.__state__ == other.__state__
         assert False
 
     def __ne__(self, other) -> bool:
@@ -276,12 +386,61 @@ class Dice:
         return not self.__eq__(other)
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return hash(self.__state__)
+
+    @classmethod
+    def __buildIndexTable__(cls) -> None:
+        """サイコロの目の組み合わせとインデックスの対応表を作成する
+        """
+        pipRange: range = range(Die.MIN_OF_PIP, Die.MAX_OF_PIP+1)
+        cls.__ALL_PIPS__ = list(itertools.combinations_with_replacement(pipRange, Dice.NUM_OF_DICE))
+        cls.__PIPS_TO_INDEX__ = {pips: index for index, pips in enumerate(cls.__ALL_PIPS__)}
+        assert len(cls.__ALL_PIPS__) == Dice.NUM_OF_STATES
+
+    @classmethod
+    def pipsOfIndex(cls, index: int) -> tuple[int, ...]:
+        """インデックスに対応するサイコロの目を取得する
+
+        Args:
+            index (int): インデックス
+
+        Returns:
+            tuple[int, ...]: サイコロの目(昇順)
+        """
+        return cls.__ALL_PIPS__[index]
+
+    @classmethod
+    def indexOfPips(cls, pips: tuple[int, ...]) -> int:
+        """サイコロの目に対応するインデックスを取得する
+
+        Args:
+            pips (tuple[int, ...]): サイコロの目(昇順)
+
+        Returns:
+            int: インデックス
+        """
+        return cls.__PIPS_TO_INDEX__[pips]
+
+    def index(self) -> int:
+        """サイコロの目の組み合わせのインデックスを取得する
+
+        Returns:
+            int: インデックス(0 - NUM_OF_STATES-1)
+        """
+        return self.__state__.index()
+
+    def state(self) -> DiceState:
+        """サイコロの目を不変の値で取得する
+
+        Returns:
+            DiceState: サイコロの目(昇順)
+        """
+        return self.__state__
 
     def sort(self) -> None:
-        """サイコロの目の昇順に並び替える
+        """サイコロの目の昇順に並び替える(常に昇順で保持しているため何もしない)
         """
-        self.__dice__.sort(key=Die.pip)
+        pass
 
     def pips(self) -> list[int]:
         """サイコロの目をリストで取得する
@@ -289,8 +448,7 @@ class Dice:
         Returns:
             list[int]: サイコロの目のリスト
         """
-        pips: list[int] = [die.pip() for die in self.__dice__]
-        return pips
+        return list(self.__state__.pips())
 
     def setPips(self, pips: list[int]) -> None:
         """サイコロの目をリストで指定する
@@ -327,24 +485,168 @@ class Dice:
                 index += 1
         return reroll
 
-    def rollAll(self) -> None:
+    def getKeptPips(self, reroll: Reroll) -> tuple[int, ...]:
+        """振り直し対象外のサイコロの目を取得する
+
+        Args:
+            reroll (Reroll): 振り直し対象
+
+        Returns:
+            tuple[int, ...]: 振り直し対象外のサイコロの目(昇順)
+        """
+        pips: tuple[int, ...] = self.__state__.pips()
+        return tuple(pips[idx] for idx in range(Dice.NUM_OF_DICE) if not reroll.bitCheck(idx))
+
+    def rollAll(self, roller: DiceRoller | None = None) -> None:
         """すべてのサイコロを振る
+
+        Args:
+            roller (DiceRoller | None, optional): サイコロの目の生成器. Defaults to None(random モジュールを使用する).
         """
-        for die in self.__dice__:
-            die.roll()
-        self.sort()
+        self.__state__ = DiceState.ofPips([Die.rollPip(roller) for _ in range(Dice.NUM_OF_DICE)])
 
-    def reroll(self, reroll: Reroll) -> None:
+    def reroll(self, reroll: Reroll, roller: DiceRoller | None = None) -> None:
         """指定のサイコロを振り直す
 
         Args:
             reroll (Reroll): 振り直し対象
+            roller (DiceRoller | None, optional): サイコロの目の生成器. Defaults to None(random モジュールを使用する).
         """
+        pips: list[int] = self.pips()
         indexes: list[int] = reroll.toList()
         for index in indexes:
-            assert 0 <= index and index <= len(self.__dice__) - 1
-            self.__dice__[index].roll()
-        self.sort()
+            assert 0 <= index and index <= len(pips) - 1
+            pips[index] = Die.rollPip(roller)
+        self.__state__ = DiceState.ofPips(pips)
+
+
+Dice.__buildIndexTable__()
+
+
+class DiceState:
+    """昇順に並べたサイコロ5個の目を表す不変の値
+
+    目の組み合わせのインデックスのみを保持し、インデックスごとに1つのインスタンスを共有する。
+    ハッシュ値はインデックスそのもので、比較もインデックスで行う。
+    """
+
+    __slots__ = ('__stateIndex__',)
+
+    # インデックスごとのインスタンス
+    __ALL_STATES__: list[DiceState] = []
+
+    def __init__(self, index: int) -> None:
+        """コンストラクタ(DiceState.of を使用すること)
+
+        Args:
+            index (int): サイコロの目の組み合わせのインデックス
+        """
+        assert 0 <= index and index < Dice.NUM_OF_STATES
+        object.__setattr__(self, '__stateIndex__', index)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __str__(self) -> str:
+        """文字列化する
+
+        Returns:
+            str: 文字列
+        """
+        return str(list(self.pips()))
+
+    def __repr__(self) -> str:
+        """文字列表現化する
+
+        Returns:
+            str: 文字列
+        """
+        return f'{ self.__class__.__name__ }({ repr(list(self.pips())) })'
+
+    def __eq__(self, other) -> bool:
+        """equal operator
+
+        Args:
+            other (Any): 比較対象
+
+        Returns:
+            bool: 比較結果
+        """
+        if type(other) == DiceState:
+            return self.__stateIndex__ == other.__stateIndex__
+        assert False
+
+    def __ne__(self, other) -> bool:
+        """not equal operator
+
+        Args:
+            other (Any): 比較対象
+
+        Returns:
+            bool: 比較結果
+        """
+        return not self.__eq__(other)
+
+    def __hash__(self) -> int:
+        return self.__stateIndex__
+
+    def __copy__(self) -> DiceState:
+        return self
+
+    def __deepcopy__(self, memo: dict) -> DiceState:
+        return self
+
+    def __reduce__(self) -> tuple:
+        return (DiceState.of, (self.__stateIndex__,))
+
+    @classmethod
+    def __buildAllStates__(cls) -> None:
+        """インデックスごとのインスタンスを作成する
+        """
+        cls.__ALL_STATES__ = [DiceState(index) for index in range(Dice.NUM_OF_STATES)]
+
+    @classmethod
+    def of(cls, index: int) -> DiceState:
+        """インデックスに対応するインスタンスを取得する
+
+        Args:
+            index (int): サイコロの目の組み合わせのインデックス
+
+        Returns:
+            DiceState: サイコロの目
+        """
+        return cls.__ALL_STATES__[index]
+
+    @classmethod
+    def ofPips(cls, pips: list[int]) -> DiceState:
+        """サイコロの目に対応するインスタンスを取得する
+
+        Args:
+            pips (list[int]): サイコロの目(順不同)
+
+        Returns:
+            DiceState: サイコロの目
+        """
+        return cls.__ALL_STATES__[Dice.indexOfPips(tuple(sorted(pips)))]
+
+    def index(self) -> int:
+        """サイコロの目の組み合わせのインデックスを取得する
+
+        Returns:
+            int: インデックス(0 - Dice.NUM_OF_STATES-1)
+        """
+        return self.__stateIndex__
+
+    def pips(self) -> tuple[int, ...]:
+        """サイコロの目を取得する
+
+        Returns:
+            tuple[int, ...]: サイコロの目(昇順)
+        """
+        return Dice.pipsOfIndex(self.__stateIndex__)
+
+
+DiceState.__buildAllStates__()
 
 
 class Hands(Enum):
@@ -390,6 +692,11 @@ class Calculator:
     POINT_BSTRAIGHT: int = 30  # B.Straightの点数
     POINT_YAHTZEE: int = 50  # Yahtzeeの点数
 
+    # 役ごとの点数表の列
+    __HAND_TO_COLUMN__: dict[Hands, int] = {}
+    # サイコロのインデックスごと、役ごとの点数表
+    __POINTS_TABLE__: list[list[int]] = []
+
     def __init__(self) -> None:
         """コンストラクタ
         """
@@ -535,8 +842,8 @@ class Calculator:
         return True
 
     @classmethod
-    def calculatePoints(cls, hand: Hands, dice: Dice) -> int:
-        """指定された役での点数を計算する
+    def __scanPoints__(cls, hand: Hands, dice: Dice) -> int:
+        """指定された役での点数をサイコロを走査して計算する
 
         Args:
             hand (Hands): 役
@@ -575,6 +882,54 @@ class Calculator:
 
         return points
 
+    @classmethod
+    def __buildPointsTable__(cls) -> None:
+        """サイコロのインデックスごと、役ごとの点数表を作成する
+        """
+        cls.__HAND_TO_COLUMN__ = {hand: column for column, hand in enumerate(Hands)}
+        cls.__POINTS_TABLE__ = []
+        for index in range(Dice.NUM_OF_STATES):
+            dice: Dice = Dice(list(Dice.pipsOfIndex(index)))
+            cls.__POINTS_TABLE__.append([cls.__scanPoints__(hand, dice) for hand in Hands])
+
+    @classmethod
+    def calculatePoints(cls, hand: Hands, dice: Dice) -> int:
+        """指定された役での点数を計算する
+
+        Args:
+            hand (Hands): 役
+            dice (Dice): サイコロ
+
+        Returns:
+            int: 点数
+        """
+        return cls.__POINTS_TABLE__[dice.index()][cls.__HAND_TO_COLUMN__[hand]]
+
+    @classmethod
+    def calculatePointsByIndex(cls, hand: Hands, index: int) -> int:
+        """指定された役での点数をサイコロのインデックスから取得する
+
+        Args:
+            hand (Hands): 役
+            index (int): サイコロのインデックス
+
+        Returns:
+            int: 点数
+        """
+        return cls.__POINTS_TABLE__[index][cls.__HAND_TO_COLUMN__[hand]]
+
+    @classmethod
+    def getPointsOfIndex(cls, index: int) -> list[int]:
+        """サイコロのインデックスに対する全役の点数を取得する
+
+        Args:
+            index (int): サイコロのインデックス
+
+        Returns:
+            list[int]: 役(Handsの定義順)ごとの点数
+        """
+        return cls.__POINTS_TABLE__[index]
+
     @classmethod
     def getBestPoints(cls, hand: Hands) -> int:
         """指定された役での最大点数を取得する
@@ -624,6 +979,9 @@ class Calculator:
         return points
 
 
+Calculator.__buildPointsTable__()
+
+
 class Field:
     """場
     """
@@ -641,22 +999,41 @@ class Field:
 
         self.__logger__: logging.Logger = logger
         # 役ごとに割り当てたサイコロ
-        self.__field_dice__: dict[Hands, Dice | None] = {
+        self.__field_dice__: dict[Hands, DiceState | None] = {
             Hands.Ace: None, Hands.Duce: None, Hands.Tri: None, Hands.Four: None, Hands.Five: None, Hands.Six: None,
             Hands.Choise: None, Hands.FourDice: None, Hands.FullHouse: None, Hands.SStraight: None, Hands.BStraight: None, Hands.Yahtzee: None
         }
-        # サイコロが割り当てられていない役
-        self.__none_hands__: list[Hands] = [
-            Hands.Ace, Hands.Duce, Hands.Tri, Hands.Four, Hands.Five, Hands.Six,
-            Hands.Choise, Hands.FourDice, Hands.FullHouse, Hands.SStraight, Hands.BStraight, Hands.Yahtzee
-        ]
         # 役ごとの点数
         self.__field_points__: dict[Hands, int] = {
             Hands.Ace: 0, Hands.Duce: 0, Hands.Tri: 0, Hands.Four: 0, Hands.Five: 0, Hands.Six: 0,
             Hands.Choise: 0, Hands.FourDice: 0, Hands.FullHouse: 0, Hands.SStraight: 0, Hands.BStraight: 0, Hands.Yahtzee: 0
         }
-        # ボーナス点
-        self.__bonus__: int = 0
+        # 役の選択に必要な場の状態(未割り当ての役、数字役の合計点、合計点、ボーナス点)
+        self.__state__: FieldState = FieldState.INITIAL
+
+    def snapshot(self) -> FieldState:
+        """現在の場の状態を取得する(不変のためコピーせずに保持してよい)
+
+        Returns:
+            FieldState: 場の状態
+        """
+        return self.__state__
+
+    def getOpenMask(self) -> int:
+        """未割り当ての役をビットマスク(Handsの定義順)で取得する
+
+        Returns:
+            int: 未割り当ての役のビットマスク
+        """
+        return self.__state__.getOpenMask()
+
+    def getSumOfNumHands(self) -> int:
+        """数字役の合計点を取得する
+
+        Returns:
+            int: 数字役の合計点
+        """
+        return self.__state__.getSumOfNumHands()
 
     def getNoneHands(self) -> list[Hands]:
         """未割り当ての役一覧を取得する
@@ -664,7 +1041,7 @@ class Field:
         Returns:
             list[Hands]: 未割り当ての役
         """
-        return self.__none_hands__
+        return self.__state__.getNoneHands()
 
     def setDice(self, hand: Hands, dice: Dice, isForce: bool = False) -> None:
         """役にサイコロを割り当てる
@@ -674,23 +1051,262 @@ class Field:
             dice (Dice): サイコロ
             isForce (bool, optional): 既に役が割り当てられていても上書きするか. Defaults to False.
         """
-        assert isForce or hand in self.__none_hands__
+        assert isForce or self.__state__.isOpen(hand)
+
+        points: int = Calculator.calculatePoints(hand, dice)
+        self.__state__ = self.__state__.setHand(hand, points, self.__field_points__[hand])
+        self.__field_dice__[hand] = dice.state()
+        self.__field_points__[hand] = points
+
+    def sum(self) -> int:
+        """合計点を取得する
+
+        Returns:
+            int: 合計点
+        """
+        return self.__state__.sum()
+
+    def getInfoToSet(self, hand: Hands, dice: Dice) -> tuple[int, int, int]:
+        """役にサイコロを設定したときの情報を取得する
+
+        Args:
+            hand (Hands): 役
+            dice (Dice): サイコロ
+
+        Returns:
+            int: 役にサイコロを設定したときの合計点
+            int: 役にサイコロを設定したときの取得点
+            int: 役にサイコロを設定したときの取得点 - 役の選択によって得られる最高点(損失点)
+        """
+        return self.__state__.getInfoToSetByIndex(hand, dice.index())
 
-        self.__field_dice__[hand] = copy.deepcopy(dice)
-        self.__field_points__[hand] = Calculator.calculatePoints(hand, dice)
-        self.__none_hands__.remove(hand)
+    def getInfoToSetByIndex(self, hand: Hands, index: int) -> tuple[int, int, int]:
+        """役にサイコロ(インデックス)を設定したときの情報を取得する
 
-        if self.__bonus__ == 0 and hand in Hands.getNumHands():
-            self.__bonus__ = Field.POINT_BONUS if Field.BONUS_BORDER <= self.__sumOfNumHands__() else 0
+        Args:
+            hand (Hands): 役
+            index (int): サイコロのインデックス
+
+        Returns:
+            int: 役にサイコロを設定したときの合計点
+            int: 役にサイコロを設定したときの取得点
+            int: 役にサイコロを設定したときの取得点 - 役の選択によって得られる最高点(損失点)
+        """
+        return self.__state__.getInfoToSetByIndex(hand, index)
+
+    def print(self) -> None:
+        """フィールドの状態をログ出力する
+        """
+        # ログを出力しない場合は文字列を作成しない
+        if not self.__logger__.isEnabledFor(logging.INFO):
+            return
+
+        # 1回のログとして出力する
+        lines: list[str] = [f'[Field]']
+        for hand in Hands.getNumHands():
+            value1: int = self.__field_points__[hand]
+            max1: int = Calculator.getBestPoints(hand)
+            lines.append(f'{hand.name:<15}: {value1:>3}/{max1:>3} <- {self.__field_dice__[hand]}')
 
-    def __sumOfNumHands__(self) -> int:
+        lines.append(f'{f"(SmallSum":<15}: {self.__state__.getSumOfNumHands():>3})')
+        value2: int = self.__state__.getBonus()
+        lines.append(f'{f"Bonus({Field.BONUS_BORDER}<=SS)":<15}: {value2:>3}/{Field.POINT_BONUS:>3}')
+
+        for hand in Hands.getUnNumHands():
+            value3: int = self.__field_points__[hand]
+            max3: int = Calculator.getBestPoints(hand)
+            lines.append(f'{hand.name:<15}: {value3:>3}/{max3:>3} <- {self.__field_dice__[hand]}')
+        lines.append(f'{"Sum":<15}: {self.sum():>3}')
+        self.__logger__.info('\n'.join(lines))
+
+
+class FieldState:
+    """役の選択に必要な場の状態を表す不変の値
+
+    未割り当ての役のビットマスク(Handsの定義順)、数字役の合計点、合計点、ボーナス点のみを保持する。
+    役を割り当てると新しいインスタンスを返すため、評価中の場をコピーせずに保持できる。
+    """
+
+    __slots__ = ('__openMask__', '__upperSum__', '__sum__', '__bonus__', '__bonusOffset__')
+
+    # 初期状態(すべての役が未割り当て)
+    INITIAL: FieldState
+    # 役ごとのビット
+    __HAND_TO_BIT__: dict[Hands, int] = {}
+    # 数字役のビットマスク
+    __NUM_HANDS_MASK__: int = 0
+    # 役ごとの最高点
+    __HAND_TO_BEST_POINTS__: dict[Hands, int] = {}
+    # ビットマスクごとの未割り当ての役一覧(Handsの定義順)
+    __MASK_TO_HANDS__: list[list[Hands]] = []
+    # ビットマスクごとの未割り当ての数字役の最高点の合計
+    __MASK_TO_MAX_SUM_OF_NUM_HANDS__: list[int] = []
+    # ボーナスが未取得の場合の、役を選択したときのボーナスの判定結果
+    # ((未割り当ての数字役のビットマスク, 数字役の合計点, 数字役の列番号, 役の目の個数) -> BONUS_*)
+    __BONUS_TABLE__: bytes = b''
+    # 数字役ごとの、サイコロのインデックスに対応する判定表内の位置((数字役の列番号, 役の目の個数) の部分)
+    __NUM_HAND_TO_BONUS_OFFSETS__: dict[Hands, list[int]] = {}
+
+    BONUS_NONE: int = 0  # ボーナスに影響しない
+    BONUS_REACHED: int = 1  # ボーナス点を得る
+    BONUS_LOST: int = 2  # ボーナス点を得られなくなる
+    NUM_OF_BONUS_JUDGES_PER_STATE: int = len(Hands.getNumHands()) * (Dice.NUM_OF_DICE + 1)  # 場の状態ごとの判定結果の数(数字役の数 * 役の目の個数)
+
+    def __init__(self, openMask: int, upperSum: int, sum: int, bonus: int) -> None:
+        """コンストラクタ
+
+        Args:
+            openMask (int): 未割り当ての役のビットマスク
+            upperSum (int): 数字役の合計点
+            sum (int): 合計点(ボーナス点を含む)
+            bonus (int): ボーナス点
+        """
+        object.__setattr__(self, '__openMask__', openMask)
+        object.__setattr__(self, '__upperSum__', upperSum)
+        object.__setattr__(self, '__sum__', sum)
+        object.__setattr__(self, '__bonus__', bonus)
+        # 判定表内の位置((未割り当ての数字役のビットマスク, 数字役の合計点) の部分. ボーナス取得済の場合は -1)
+        bonusOffset: int = -1
+        if bonus == 0:
+            assert upperSum < Field.BONUS_BORDER
+            bonusOffset = ((openMask & FieldState.__NUM_HANDS_MASK__) * Field.BONUS_BORDER + upperSum) * FieldState.NUM_OF_BONUS_JUDGES_PER_STATE
+        object.__setattr__(self, '__bonusOffset__', bonusOffset)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
+
+    def __repr__(self) -> str:
+        """文字列表現化する
+
+        Returns:
+            str: 文字列
+        """
+        return f'{ self.__class__.__name__ }({self.__openMask__:#05x}, {self.__upperSum__}, {self.__sum__}, {self.__bonus__})'
+
+    def __copy__(self) -> FieldState:
+        return self
+
+    def __deepcopy__(self, memo: dict) -> FieldState:
+        return self
+
+    def __reduce__(self) -> tuple:
+        return (FieldState, (self.__openMask__, self.__upperSum__, self.__sum__, self.__bonus__))
+
+    @classmethod
+    def __buildTables__(cls) -> None:
+        """役のビットとビットマスクごとの一覧を作成する
+        """
+        cls.__HAND_TO_BIT__ = {hand: 1 << column for (column, hand) in enumerate(Hands)}
+        cls.__NUM_HANDS_MASK__ = sum(cls.__HAND_TO_BIT__[hand] for hand in Hands.getNumHands())
+        cls.__HAND_TO_BEST_POINTS__ = {hand: Calculator.getBestPoints(hand) for hand in Hands}
+        cls.__MASK_TO_HANDS__ = [[hand for hand in Hands if mask & cls.__HAND_TO_BIT__[hand]] for mask in range(pow(2, len(Hands)))]
+        cls.__MASK_TO_MAX_SUM_OF_NUM_HANDS__ = [
+            sum(Calculator.getBestPoints(hand) for hand in Hands.getNumHands() if mask & cls.__HAND_TO_BIT__[hand]) for mask in range(pow(2, len(Hands)))
+        ]
+
+        # ボーナスの判定表を作成する
+        numHands: list[Hands] = Hands.getNumHands()
+        cls.__NUM_HAND_TO_BONUS_OFFSETS__ = {
+            hand: [column * (Dice.NUM_OF_DICE + 1) + Dice.pipsOfIndex(index).count(hand.value) for index in range(Dice.NUM_OF_STATES)]
+            for (column, hand) in enumerate(numHands)
+        }
+        table: bytearray = bytearray()
+        for numMask in range(pow(2, len(numHands))):
+            for upperSum in range(Field.BONUS_BORDER):
+                for (column, hand) in enumerate(numHands):
+                    # その役以外の未割当ての数字役の最大点の合計(数字役のビットは Hands の定義順の下位6ビット)
+                    maxSumOfOtherNumHands: int = cls.__MASK_TO_MAX_SUM_OF_NUM_HANDS__[numMask & ~cls.__HAND_TO_BIT__[hand]]
+                    for count in range(Dice.NUM_OF_DICE + 1):
+                        table.append(FieldState.__judgeBonus__(upperSum, maxSumOfOtherNumHands, hand, count * hand.value))
+        cls.__BONUS_TABLE__ = bytes(table)
+
+        cls.INITIAL = FieldState(pow(2, len(Hands)) - 1, 0, 0, 0)
+
+    @staticmethod
+    def __judgeBonus__(upperSum: int, maxSumOfOtherNumHands: int, hand: Hands, handPoints: int) -> int:
+        """ボーナスが未取得の場合に、数字役を選択したときのボーナスを判定する
+
+        Args:
+            upperSum (int): 数字役の合計点
+            maxSumOfOtherNumHands (int): その役以外の未割当ての数字役の最大点の合計
+            hand (Hands): 役
+            handPoints (int): 役の点
+
+        Returns:
+            int: 判定結果(BONUS_*)
+        """
+        # その役を選択することでボーナス点を得られるか
+        if Field.BONUS_BORDER <= upperSum + handPoints:
+            return FieldState.BONUS_REACHED
+        # その役をその点で選択したことでボーナス点を得られなくなったか
+        maxSum: int = upperSum + maxSumOfOtherNumHands
+        if maxSum + handPoints < Field.BONUS_BORDER and Field.BONUS_BORDER <= maxSum + Calculator.getBestPoints(hand):
+            return FieldState.BONUS_LOST
+        return FieldState.BONUS_NONE
+
+    def setHand(self, hand: Hands, points: int, previousPoints: int = 0) -> FieldState:
+        """役に点を割り当てた後の状態を取得する
+
+        Args:
+            hand (Hands): 役
+            points (int): 役の点
+            previousPoints (int, optional): 上書きする場合の役の元の点. Defaults to 0.
+
+        Returns:
+            FieldState: 割り当て後の状態
+        """
+        bit: int = FieldState.__HAND_TO_BIT__[hand]
+        upperSum: int = self.__upperSum__
+        bonus: int = self.__bonus__
+        if bit & FieldState.__NUM_HANDS_MASK__:
+            upperSum += points - previousPoints
+            if bonus == 0 and Field.BONUS_BORDER <= upperSum:
+                bonus = Field.POINT_BONUS
+        total: int = self.__sum__ + points - previousPoints + bonus - self.__bonus__
+        return FieldState(self.__openMask__ & ~bit, upperSum, total, bonus)
+
+    def isOpen(self, hand: Hands) -> bool:
+        """役が未割り当てか
+
+        Args:
+            hand (Hands): 役
+
+        Returns:
+            bool: 未割り当ての場合 True
+        """
+        return 0 != self.__openMask__ & FieldState.__HAND_TO_BIT__[hand]
+
+    def getOpenMask(self) -> int:
+        """未割り当ての役をビットマスク(Handsの定義順)で取得する
+
+        Returns:
+            int: 未割り当ての役のビットマスク
+        """
+        return self.__openMask__
+
+    def getSumOfNumHands(self) -> int:
         """数字役の合計点を取得する
 
         Returns:
             int: 数字役の合計点
         """
-        sums: int = sum([self.__field_points__[hand] for hand in Hands.getNumHands()])
-        return sums
+        return self.__upperSum__
+
+    def getBonus(self) -> int:
+        """ボーナス点を取得する
+
+        Returns:
+            int: ボーナス点
+        """
+        return self.__bonus__
+
+    def getNoneHands(self) -> list[Hands]:
+        """未割り当ての役一覧を取得する(共有のリストのため変更しないこと)
+
+        Returns:
+            list[Hands]: 未割り当ての役
+        """
+        return FieldState.__MASK_TO_HANDS__[self.__openMask__]
 
     def sum(self) -> int:
         """合計点を取得する
@@ -698,49 +1314,40 @@ class Field:
         Returns:
             int: 合計点
         """
-        sums: int = sum(self.__field_points__.values())
-        sums += self.__bonus__
-        return sums
+        return self.__sum__
 
-    def getInfoToSet(self, hand: Hands, dice: Dice) -> tuple[int, int, int]:
-        """役にサイコロを設定したときの情報を取得する
+    def getInfoToSetByIndex(self, hand: Hands, index: int) -> tuple[int, int, int]:
+        """役にサイコロ(インデックス)を設定したときの情報を取得する
 
         Args:
             hand (Hands): 役
-            dice (Dice): サイコロ
+            index (int): サイコロのインデックス
 
         Returns:
             int: 役にサイコロを設定したときの合計点
             int: 役にサイコロを設定したときの取得点
             int: 役にサイコロを設定したときの取得点 - 役の選択によって得られる最高点(損失点)
         """
-        # 現在の点
-        sums: int = self.sum()
-
         # 設定する役の点
-        handPoints: int = Calculator.calculatePoints(hand, dice)
+        handPoints: int = Calculator.calculatePointsByIndex(hand, index)
         # 設定する役の最高点
-        maxHandPoints: int = Calculator.getBestPoints(hand)
+        maxHandPoints: int = FieldState.__HAND_TO_BEST_POINTS__[hand]
 
         # ボーナス点
         bonusPoints: int = 0
         maxBonusPoints: int = 0
         # ボーナスが未取得で、役がボーナスの対象の場合
-        if self.__bonus__ == 0 and hand in Hands.getNumHands():
-            sumOfNumHands: int = self.__sumOfNumHands__()
-            # その役を選択することで得られるボーナス点を計算する
-            if Field.BONUS_BORDER <= sumOfNumHands + handPoints:
+        offsets: list[int] | None = FieldState.__NUM_HAND_TO_BONUS_OFFSETS__.get(hand)
+        if self.__bonusOffset__ != -1 and offsets is not None:
+            # 判定表からボーナスを判定する
+            judge: int = FieldState.__BONUS_TABLE__[self.__bonusOffset__ + offsets[index]]
+            if judge == FieldState.BONUS_REACHED:
+                # その役を選択することでボーナス点を得られる
                 bonusPoints = Field.POINT_BONUS
                 maxBonusPoints = Field.POINT_BONUS
-            else:
-                # 割当て済の数字役の点の合計 + その役以外の未割当ての数字役の最大点の合計 を計算する
-                maxSumOfOtherNumHands: int = sumOfNumHands
-                for tmpHand in Hands.getNumHands():
-                    if tmpHand in self.getNoneHands() and hand is not tmpHand:
-                        maxSumOfOtherNumHands += Calculator.getBestPoints(tmpHand)
+            elif judge == FieldState.BONUS_LOST:
                 # その役をその点で選択したことでボーナス点を得られなくなった場合に損失点として扱う
-                if maxSumOfOtherNumHands + handPoints < Field.BONUS_BORDER and Field.BONUS_BORDER <= maxSumOfOtherNumHands + maxHandPoints:
-                    maxBonusPoints = Field.POINT_BONUS
+                maxBonusPoints = Field.POINT_BONUS
 
         # 取得点
         gainedPoints = handPoints + bonusPoints
@@ -751,27 +1358,10 @@ class Field:
         assert lostPoints <= 0
 
         # 合計点
-        sums += gainedPoints
-        return (sums, gainedPoints, lostPoints)
-
-    def print(self) -> None:
-        """フィールドの状態をログ出力する
-        """
-        self.__logger__.info(f'[Field]')
-        for hand in Hands.getNumHands():
-            value1: int = self.__field_points__[hand]
-            max1: int = Calculator.getBestPoints(hand)
-            self.__logger__.info(f'{hand.name:<15}: {value1:>3}/{max1:>3} <- {self.__field_dice__[hand]}')
+        return (self.__sum__ + gainedPoints, gainedPoints, lostPoints)
 
-        self.__logger__.info(f'{f"(SmallSum":<15}: {self.__sumOfNumHands__():>3})')
-        value2: int = self.__bonus__
-        self.__logger__.info(f'{f"Bonus({Field.BONUS_BORDER}<=SS)":<15}: {value2:>3}/{Field.POINT_BONUS:>3}')
 
-        for hand in Hands.getUnNumHands():
-            value3: int = self.__field_points__[hand]
-            max3: int = Calculator.getBestPoints(hand)
-            self.__logger__.info(f'{hand.name:<15}: {value3:>3}/{max3:>3} <- {self.__field_dice__[hand]}')
-        self.__logger__.info(f'{"Sum":<15}: {self.sum():>3}')
+FieldState.__buildTables__()
 
 
 class HandChoiseMode(Enum):
@@ -779,30 +1369,219 @@ class HandChoiseMode(Enum):
     MaximumGain = 0  # 取得点を最大化するような役を選択する
     MinimumLost = 1  # 最適なサイコロで役を選んだ場合との差分(損失点)が最小になるような役を選択する
     Balance = 2  # 取得点を最大化しつつ損失点を最小化する役を選択する
+    Optimal = 3  # 最終的な合計点の期待値を最大化する役を選択する(Solverが必要)
+
+
+class EvaluationCache:
+    """場の状態とサイコロごとの役選択結果を保持する、サイズ上限付き(LRU)のキャッシュ
+
+    キーは場の状態(未割り当ての役のビットマスク, ボーナス判定に必要な範囲の数字役の合計点)、
+    サイコロのインデックス、役選択モード(役選択時、戻り値)を1つの整数にまとめたもの。
+    ターン・ゲームをまたいで同じインスタンスを使用できる。
+    """
+
+    # 定数定義
+    MAX_SIZE: int = 100000  # 保持する評価結果の最大数
+    NUM_OF_MODES: int = len(HandChoiseMode)  # 役選択モードの数
+
+    def __init__(self, maxSize: int = MAX_SIZE) -> None:
+        """コンストラクタ
+
+        Args:
+            maxSize (int, optional): 保持する評価結果の最大数. Defaults to MAX_SIZE.
+        """
+        assert 0 < maxSize
+
+        # 保持する評価結果の最大数
+        self.__maxSize__: int = maxSize
+        # 評価結果(キー -> (選択した役, 戻り値, 選択した役の取得点)). 先頭ほど長く参照されていない
+        self.__entries__: OrderedDict[int, tuple[Hands, float, int]] = OrderedDict()
+        # 参照時に評価結果があった回数
+        self.__hits__: int = 0
+        # 参照時に評価結果がなかった回数
+        self.__misses__: int = 0
+        # 上限を超えたため評価結果を破棄した回数
+        self.__evictions__: int = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries__)
+
+    @staticmethod
+    def makeStateKey(openMask: int, upperSum: int) -> int:
+        """場の状態のキーを作成する
+
+        Args:
+            openMask (int): 未割り当ての役のビットマスク
+            upperSum (int): 数字役の合計点
+
+        Returns:
+            int: 場の状態のキー
+        """
+        # ボーナスの判定には BONUS_BORDER 以上かどうかのみが影響する
+        return openMask * (Field.BONUS_BORDER + 1) + min(upperSum, Field.BONUS_BORDER)
+
+    @staticmethod
+    def makeKey(stateKey: int, index: int, modeAtHandChoise: HandChoiseMode, modeAtReturnPoint: HandChoiseMode) -> int:
+        """キーを作成する
+
+        Args:
+            stateKey (int): 場の状態のキー(makeStateKey で作成する)
+            index (int): サイコロのインデックス
+            modeAtHandChoise (HandChoiseMode): 選択モード(役選択時)
+            modeAtReturnPoint (HandChoiseMode): 選択モード(戻り値)
+
+        Returns:
+            int: キー
+        """
+        # 呼び出し回数が多いため、Enum.value(プロパティ)ではなく値を直接参照する
+        key: int = stateKey * EvaluationCache.NUM_OF_MODES + modeAtHandChoise._value_
+        key = key * EvaluationCache.NUM_OF_MODES + modeAtReturnPoint._value_
+        return key * Dice.NUM_OF_STATES + index
+
+    def get(self, key: int) -> tuple[Hands, float, int] | None:
+        """評価結果を取得する
+
+        Args:
+            key (int): キー
+
+        Returns:
+            tuple[Hands, float, int] | None: 評価結果(存在しない場合は None)
+        """
+        entry: tuple[Hands, float, int] | None = self.__entries__.get(key)
+        if entry is None:
+            self.__misses__ += 1
+        else:
+            self.__hits__ += 1
+            self.__entries__.move_to_end(key)
+        return entry
+
+    def put(self, key: int, entry: tuple[Hands, float, int]) -> None:
+        """評価結果を保存する(上限を超えた場合は最も長く参照されていない評価結果を破棄する)
+
+        Args:
+            key (int): キー
+            entry (tuple[Hands, float, int]): 評価結果
+        """
+        self.__entries__[key] = entry
+        self.__entries__.move_to_end(key)
+        if self.__maxSize__ < len(self.__entries__):
+            self.__entries__.popitem(last=False)
+            self.__evictions__ += 1
+
+    def clear(self) -> None:
+        """評価結果と統計をすべて破棄する
+        """
+        self.__entries__.clear()
+        self.__hits__ = 0
+        self.__misses__ = 0
+        self.__evictions__ = 0
+
+    def getStatistics(self) -> dict[str, int]:
+        """統計を取得する
+
+        Returns:
+            dict[str, int]: 保持数、最大数、ヒット数、ミス数、破棄数
+        """
+        return {'size': len(self.__entries__), 'maxSize': self.__maxSize__,
+                'hits': self.__hits__, 'misses': self.__misses__, 'evictions': self.__evictions__}
+
+    def __str__(self) -> str:
+        """文字列化する
+
+        Returns:
+            str: 文字列
+        """
+        lookups: int = self.__hits__ + self.__misses__
+        hitRate: float = self.__hits__ / lookups if 0 < lookups else 0
+        return (f'size: {len(self.__entries__)}/{self.__maxSize__} hits: {self.__hits__} misses: {self.__misses__} '
+                f'(hit rate: {hitRate: >6.2%}) evictions: {self.__evictions__}')
 
 
 class Evaluator:
     """場とサイコロを評価する
     """
 
-    def __init__(self, field: Field, logger: logging.Logger, defaultMode: HandChoiseMode) -> None:
+    # 定数定義
+    DECISION_TIME_BUDGET: float = 1.0  # 先読み時の振り直し選択1回あたりの処理時間の目安[s]
+    ANYTIME_TIME_BUDGET: float = 0.01  # サンプリングによる振り直し選択1回あたりの既定の時間予算[s]
+    ANYTIME_INITIAL_SAMPLES: int = 16  # サンプリングの1巡目で振り直し候補ごとに引く出目の数(以降の巡では倍にする)
+    ANYTIME_MAX_SAMPLES: int = 4096  # 振り直し候補ごとに引く出目の数の上限
+    ANYTIME_MIN_SAMPLES_TO_DROP: int = 64  # 打ち切りの判定に必要な出目の数(出現率の低い高得点の出目を引く前に分散を過小評価しないため)
+    ANYTIME_Z: float = 1.96  # 振り直し候補を打ち切る信頼区間の係数(95%)
+
+    # 振り直すサイコロの個数ごとの、出目の組み合わせ(昇順)とその出現数の一覧
+    __REROLL_OUTCOMES__: list[list[tuple[tuple[int, ...], int]]] = []
+    # 振り直し対象外の目(昇順)ごとの、振り直し後のサイコロのインデックスとその出現数の一覧
+    __KEPT_TO_OUTCOMES__: dict[tuple[int, ...], list[tuple[int, int]]] = {}
+    # サイコロのインデックスごとの、残す目が異なる振り直し(ビット, 振り直し対象外の目)の一覧
+    __INDEX_TO_KEEPS__: dict[int, list[tuple[int, tuple[int, ...]]]] = {}
+    # 初手の定石(getOpeningBook の初回の呼び出し時に読み込む)
+    __OPENING_BOOK__: OpeningBook | None = None
+    __isOpeningBookLoaded__: bool = False
+
+    def __init__(self, field: Field | FieldState, logger: logging.Logger, defaultMode: HandChoiseMode, isLookahead: bool = False, solver: Solver | None = None,
+                 cache: EvaluationCache | None = None, instrumentation: Instrumentation | None = None, isOpeningBook: bool = True) -> None:
         """コンストラクタ
 
         Args:
-            field (Field): フィールド
+            field (Field | FieldState): フィールド(または場の状態)
             logger (logging.Logger): ロガー
             defaultMode (HandChoiseMode): デフォルトモード
+            isLookahead (bool, optional): 残りの振り直しをすべて先読みして振り直しを選択するか. Defaults to False.
+            solver (Solver | None, optional): 最適戦略(HandChoiseMode.Optimal 使用時に必要). Defaults to None.
+            cache (EvaluationCache | None, optional): 役選択結果のキャッシュ(ターン・ゲームをまたいで共有する場合に指定する). Defaults to None(このインスタンス専用).
+            instrumentation (Instrumentation | None, optional): 呼び出し回数の集計先. Defaults to None(集計しない).
+            isOpeningBook (bool, optional): 場が空のとき、計算の前に初手の定石を参照するか. Defaults to True.
         """
         # 場
-        self.__field__: Field = copy.deepcopy(field)
+        self.__field__: FieldState = field if isinstance(field, FieldState) else field.snapshot()
         # ロガー
         self.__logger__: logging.Logger = logger
+        # デバッグログを出力するか(出力しない場合はログの文字列を作成しない)
+        self.__isDebug__: bool = logger.isEnabledFor(logging.DEBUG)
         # デフォルト役選択モード
         self.__defaultMode__: HandChoiseMode = defaultMode
-        # デフォルト役選択モード時の評価結果
-        self.__diceToTupleDict__: dict[Dice, tuple[Hands, int]] = {}
+        # 役選択結果のキャッシュ
+        self.__cache__: EvaluationCache = EvaluationCache() if cache is None else cache
+        # 呼び出し回数の集計先(役選択の呼び出し回数はキャッシュの参照回数から求める)
+        self.__instrumentation__: Instrumentation | None = instrumentation
+        # 先読みするか
+        self.__isLookahead__: bool = isLookahead
+        # 先読み時のターン内の評価表((役選択/評価モード, 役選択モード(振り直しなし時), 残りの振り直し回数, サイコロのインデックス) -> (評価値, 振り直しのビット))
+        self.__turnTable__: dict[tuple[HandChoiseMode, HandChoiseMode, int, int], tuple[float, int]] = {}
+        # 最適戦略
+        self.__solver__: Solver | None = solver
+        # 最適戦略で使用する場の状態(未割り当ての役のビットマスク, 数字役の合計点)
+        self.__openMask__: int = self.__field__.getOpenMask()
+        self.__upperSum__: int = self.__field__.getSumOfNumHands()
+        # 役選択結果のキャッシュで使用する場の状態のキー
+        self.__stateKey__: int = EvaluationCache.makeStateKey(self.__openMask__, self.__upperSum__)
+        # 現在の点
+        self.__sum__: int = self.__field__.sum()
+        # 初手の定石を参照するか(場が空の場合のみ)
+        self.__isOpening__: bool = isOpeningBook and self.__openMask__ == FieldState.INITIAL.getOpenMask()
+
+    @classmethod
+    def getOpeningBook(cls) -> OpeningBook | None:
+        """初手の定石を取得する(初回の呼び出し時に、ファイルがあれば読み込む)
 
-    def choiseHand(self, dice: Dice, modeAtHandChoise: HandChoiseMode, modeAtReturnPoint: HandChoiseMode | None = None) -> tuple[Hands, int]:
+        Returns:
+            OpeningBook | None: 初手の定石(ファイルがない場合、点数表や設定が作成時と異なる場合は None)
+        """
+        if not cls.__isOpeningBookLoaded__:
+            # OpeningBook は Evaluator を使用して作成するため、循環参照を避けて使用時に読み込む
+            from OpeningBook import OpeningBook
+            cls.__OPENING_BOOK__ = None
+            if os.path.exists(OpeningBook.FILE_NAME):
+                try:
+                    cls.__OPENING_BOOK__ = OpeningBook.load()
+                except ValueError as e:
+                    # 作成時と異なる定石は誤った選択になるため使用せず、計算する
+                    logging.getLogger(__name__).warning(f'Opening book ignored: {e}')
+            cls.__isOpeningBookLoaded__ = True
+        return cls.__OPENING_BOOK__
+
+    def choiseHand(self, dice: Dice, modeAtHandChoise: HandChoiseMode, modeAtReturnPoint: HandChoiseMode | None = None) -> tuple[Hands, float]:
         """役を選択する
 
         Args:
@@ -814,23 +1593,76 @@ class Evaluator:
             Hands: 選択モード(役選択時)に応じた役
             int: 選択モード(戻り値)に応じた値(取得点 or 損失点(負値) or 取得点 + 損失点)
         """
+        # Solver がない場合の最適戦略は、定石を返さず choiseHandByIndex で失敗させる
+        if self.__isOpening__ and modeAtReturnPoint in [None, modeAtHandChoise] and (modeAtHandChoise != HandChoiseMode.Optimal or self.__solver__ is not None):
+            book: OpeningBook | None = Evaluator.getOpeningBook()
+            entry: tuple[Hands, float] | None = None if book is None else book.getHand(modeAtHandChoise, dice.index())
+            if entry is not None:
+                if self.__instrumentation__ is not None:
+                    self.__instrumentation__.count('openingBook')
+                return entry
+        return self.choiseHandByIndex(dice.index(), modeAtHandChoise, modeAtReturnPoint)
+
+    def choiseHandByIndex(self, index: int, modeAtHandChoise: HandChoiseMode, modeAtReturnPoint: HandChoiseMode | None = None) -> tuple[Hands, float]:
+        """サイコロのインデックスから役を選択する
+
+        Args:
+            index (int): 現在のサイコロのインデックス
+            modeAtHandChoise (HandChoiseMode): 選択モード(役選択時)
+            modeAtReturnPoint (HandChoiseMode): 選択モード(戻り値). Defaults to same of modeAtHandChoise.
+
+        Returns:
+            Hands: 選択モード(役選択時)に応じた役
+            int: 選択モード(戻り値)に応じた値(取得点 or 損失点(負値) or 取得点 + 損失点 or 最終的な合計点の期待値)
+        """
         if modeAtReturnPoint is None:
             modeAtReturnPoint = modeAtHandChoise
 
+        key: int = EvaluationCache.makeKey(self.__stateKey__, index, modeAtHandChoise, modeAtReturnPoint)
+        entry: tuple[Hands, float, int] | None = self.__cache__.get(key)
+        if entry is None:
+            entry = self.__choiseHandByIndex__(index, modeAtHandChoise, modeAtReturnPoint)
+            self.__cache__.put(key, entry)
+        (retHand, retPoints, gainedPoints) = entry
+
+        # 最終的な合計点の期待値は現在の点に依存するため、キャッシュには含めずここで加える
+        if modeAtReturnPoint == HandChoiseMode.Optimal:
+            retPoints = (self.__sum__ + gainedPoints) + retPoints
+
+        return (retHand, retPoints)
+
+    def __choiseHandByIndex__(self, index: int, modeAtHandChoise: HandChoiseMode, modeAtReturnPoint: HandChoiseMode) -> tuple[Hands, float, int]:
+        """サイコロのインデックスから役を選択する(現在の点に依存しない部分)
+
+        Args:
+            index (int): 現在のサイコロのインデックス
+            modeAtHandChoise (HandChoiseMode): 選択モード(役選択時)
+            modeAtReturnPoint (HandChoiseMode): 選択モード(戻り値)
+
+        Returns:
+            Hands: 選択モード(役選択時)に応じた役
+            float: 選択モード(戻り値)に応じた値(HandChoiseMode.Optimal の場合は残りのターンで得られる点の期待値)
+            int: 選択した役の取得点(ボーナスを含む)
+        """
         # 選択する役
         retHand: Hands = Hands.Ace
         # 返す値
-        retPoints: int = 0
+        retPoints: float = 0
+        # 選択した役の取得点
+        retGainedPoints: int = 0
 
         # 最大点
-        maxPoints: int = -100
+        maxPoints: float = -100
 
-        for hand in self.__field__.getNoneHands():
+        hands: list[Hands] = self.__field__.getNoneHands()
+        if self.__instrumentation__ is not None:
+            self.__instrumentation__.count('scoring', len(hands))
+        for hand in hands:
             # 現在の役を設定することによる取得点、最高点との差分(損失点)を求める(ボーナスを含む)
-            (_, gainedPoints, lostPoints) = self.__field__.getInfoToSet(hand, dice)
+            (_, gainedPoints, lostPoints) = self.__field__.getInfoToSetByIndex(hand, index)
 
             # 比較対象を選択する
-            comparedPoints: int = 0
+            comparedPoints: float = 0
             match modeAtHandChoise:
                 case HandChoiseMode.MaximumGain:
                     # 取得点で比較する
@@ -841,11 +1673,15 @@ class Evaluator:
                 case HandChoiseMode.Balance:
                     # 損益点で比較する
                     comparedPoints = gainedPoints + lostPoints
+                case HandChoiseMode.Optimal:
+                    # 最終的な合計点の期待値で比較する(現在の点は役によらないため除く)
+                    comparedPoints = gainedPoints + self.__getFuturePoints__(hand, gainedPoints)
 
             # 比較対象が大きいとき、手を選択する
             if maxPoints < comparedPoints:
                 retHand = hand
                 maxPoints = comparedPoints
+                retGainedPoints = gainedPoints
 
                 # 手を選択したときの点を取得する
                 match modeAtReturnPoint:
@@ -855,10 +1691,87 @@ class Evaluator:
                         retPoints = lostPoints
                     case HandChoiseMode.Balance:
                         retPoints = gainedPoints + lostPoints
+                    case HandChoiseMode.Optimal:
+                        retPoints = self.__getFuturePoints__(hand, gainedPoints)
             elif maxPoints == comparedPoints:
                 pass  # TODO: どの役を選ぶのが適切か
 
-        return (retHand, retPoints)
+        return (retHand, retPoints, retGainedPoints)
+
+    def getCache(self) -> EvaluationCache:
+        """役選択結果のキャッシュを取得する
+
+        Returns:
+            EvaluationCache: 役選択結果のキャッシュ
+        """
+        return self.__cache__
+
+    def __getFuturePoints__(self, hand: Hands, gainedPoints: int) -> float:
+        """役を選択した後の残りのターンで得られる点の期待値を取得する
+
+        Args:
+            hand (Hands): 選択する役
+            gainedPoints (int): 役を選択したときの取得点(ボーナスを含む)
+
+        Returns:
+            float: 残りのターンで得られる点の期待値
+        """
+        assert self.__solver__ is not None, 'HandChoiseMode.Optimal requires a Solver'
+        return self.__solver__.getValueAfter(self.__openMask__, self.__upperSum__, hand, gainedPoints)
+
+    @classmethod
+    def __buildRerollOutcomes__(cls) -> None:
+        """振り直すサイコロの個数ごとに、出目の組み合わせとその出現数の一覧を作成する
+        """
+        pipRange: range = range(Die.MIN_OF_PIP, Die.MAX_OF_PIP+1)
+        cls.__REROLL_OUTCOMES__ = []
+        for rerollCount in range(Dice.NUM_OF_DICE+1):
+            outcomes: list[tuple[tuple[int, ...], int]] = []
+            for outcome in itertools.combinations_with_replacement(pipRange, rerollCount):
+                # 多項係数: rerollCount! / (各目の個数! の積)
+                count: int = math.factorial(rerollCount)
+                for pip in pipRange:
+                    count //= math.factorial(outcome.count(pip))
+                outcomes.append((outcome, count))
+            assert sum(count for (_, count) in outcomes) == pow(Die.MAX_OF_PIP, rerollCount)
+            cls.__REROLL_OUTCOMES__.append(outcomes)
+
+    @classmethod
+    def getOutcomes(cls, keptPips: tuple[int, ...]) -> list[tuple[int, int]]:
+        """振り直し後のサイコロのインデックスとその出現数の一覧を取得する
+
+        Args:
+            keptPips (tuple[int, ...]): 振り直し対象外の目(昇順)
+
+        Returns:
+            list[tuple[int, int]]: 振り直し後のサイコロのインデックスとその出現数の一覧
+        """
+        if keptPips not in cls.__KEPT_TO_OUTCOMES__:
+            rerollCount: int = Dice.NUM_OF_DICE - len(keptPips)
+            cls.__KEPT_TO_OUTCOMES__[keptPips] = [
+                (Dice.indexOfPips(tuple(sorted(keptPips + outcome))), count) for (outcome, count) in cls.__REROLL_OUTCOMES__[rerollCount]
+            ]
+        return cls.__KEPT_TO_OUTCOMES__[keptPips]
+
+    @classmethod
+    def getKeeps(cls, index: int) -> list[tuple[int, tuple[int, ...]]]:
+        """残す目が異なる振り直しの一覧を取得する
+
+        Args:
+            index (int): サイコロのインデックス
+
+        Returns:
+            list[tuple[int, tuple[int, ...]]]: 振り直しのビット(残す目が同じ中で最小)と振り直し対象外の目の一覧
+        """
+        if index not in cls.__INDEX_TO_KEEPS__:
+            pips: tuple[int, ...] = Dice.pipsOfIndex(index)
+            keeps: dict[tuple[int, ...], int] = {}
+            for bit in range(pow(2, Dice.NUM_OF_DICE)):
+                keptPips: tuple[int, ...] = tuple(pips[idx] for idx in range(Dice.NUM_OF_DICE) if not Reroll.__bitCheck__(bit, idx))
+                if keptPips not in keeps:
+                    keeps[keptPips] = bit
+            cls.__INDEX_TO_KEEPS__[index] = [(bit, keptPips) for (keptPips, bit) in keeps.items()]
+        return cls.__INDEX_TO_KEEPS__[index]
 
     def evaluateReroll(self, dice: Dice, reroll: Reroll, mode: HandChoiseMode, modeBySelf: HandChoiseMode) -> tuple[float, float]:
         """振り直し時、各サイコロの出目での評価値の平均値を求める
@@ -873,83 +1786,375 @@ class Evaluator:
             float: 振り直し時の評価値の平均値
             float: 計算時間
         """
-        evaluatedPointsList: list[int] = []  # 振り直し時の全パターンの評価値リスト
+        (expected, evaluatedTime, maxEvaluated) = self.__evaluateReroll__(dice, reroll, mode, modeBySelf)
+        if self.__isDebug__:
+            self.__logger__.debug(f'{f"MaxEvaluated":<11}: {maxEvaluated}')
+        return (expected, evaluatedTime)
+
+    def __evaluateReroll__(self, dice: Dice, reroll: Reroll, mode: HandChoiseMode, modeBySelf: HandChoiseMode) -> tuple[float, float, str]:
+        """振り直し時、各サイコロの出目での評価値の平均値を求める(ログは出力しない)
+
+        Args:
+            dice (Dice): 振ったサイコロ
+            reroll (Reroll): 振り直し対象
+            mode (HandChoiseMode): 役選択/評価モード
+            modeBySelf (HandChoiseMode): 役選択モード(振り直しなし時)
+
+        Returns:
+            float: 振り直し時の評価値の平均値
+            float: 計算時間
+            str: 最大評価時の評価値、手、サイコロ(デバッグログを出力しない場合は空文字列)
+        """
+        weightedPoints: float = 0  # 振り直し時の全パターンの評価値の(出現数による)重み付き合計
 
-        maxEvaluatedDice: Dice = dice  # 最大評価値でのサイコロ
+        maxEvaluatedIndex: int = dice.index()  # 最大評価値でのサイコロ
         maxEvaluatedHand: Hands = Hands.Ace  # 最大評価値での手
-        maxEvaluatedPoints: int = -100  # 最大評価値での評価値
+        maxEvaluatedPoints: float = -100  # 最大評価値での評価値
 
         startTime: float = time.time()
 
-        pips: list[int] = dice.pips()  # 現在の目
-        # 振り直し対象なら1-6、対象外なら現在の目
-        rng: list[range | list[int]] = [range(Die.MIN_OF_PIP, Die.MAX_OF_PIP+1) if reroll.bitCheck(idx) else [pips[idx]] for idx in range(Dice.NUM_OF_DICE)]
-        for pip0 in rng[0]:
-            for pip1 in rng[1]:
-                for pip2 in rng[2]:
-                    for pip3 in rng[3]:
-                        for pip4 in rng[4]:
-                            tmpPips: list[int] = [pip0, pip1, pip2, pip3, pip4]
-                            tmpDice = Dice(tmpPips)
-                            if dice == tmpDice:  # 振り直しなしの場合
-                                (tmpHand, evaluatedPoints) = self.choiseHand(tmpDice, modeBySelf, mode)
-                            elif self.__defaultMode__ == mode:  # 計算済のモードの場合
-                                if tmpDice in self.__diceToTupleDict__:  # 計算済の場合
-                                    (tmpHand, evaluatedPoints) = self.__diceToTupleDict__[tmpDice]
-                                else:  # 未計算の場合
-                                    (tmpHand, evaluatedPoints) = self.choiseHand(tmpDice, mode)
-                                    self.__diceToTupleDict__[tmpDice] = (tmpHand, evaluatedPoints)
-                            else:
-                                (tmpHand, evaluatedPoints) = self.choiseHand(tmpDice, mode)
-
-                            # self.__logger__.debug(f'{f"Evaluated({tmpDice})":<11}: {evaluatedPoints: >3} <- {tmpHand:<16}')
-
-                            # ログ出力用に最大評価時のサイコロ、手、最大評価値を保存する
-                            if maxEvaluatedPoints < evaluatedPoints:
-                                maxEvaluatedDice = tmpDice
-                                maxEvaluatedHand = tmpHand
-                                maxEvaluatedPoints = evaluatedPoints
-
-                            evaluatedPointsList.append(evaluatedPoints)
-
-        self.__logger__.debug(f'{f"MaxEvaluated":<11}: {maxEvaluatedPoints: >3} <- {maxEvaluatedHand:<16}({maxEvaluatedDice})')
-
-        expected: float = sum(evaluatedPointsList) / len(evaluatedPointsList)
+        index: int = dice.index()  # 現在の目のインデックス
+        # 振り直し対象外の目
+        keptPips: tuple[int, ...] = dice.getKeptPips(reroll)
+        rerollCount: int = Dice.NUM_OF_DICE - len(keptPips)
+        outcomes: list[tuple[int, int]] = Evaluator.getOutcomes(keptPips)
+        if self.__instrumentation__ is not None:
+            self.__instrumentation__.count('evaluateReroll')
+            self.__instrumentation__.count('outcomes', len(outcomes))
+        # 振り直すサイコロの目の組み合わせごとに評価する(並び順の違いは出現数で重み付けする)
+        for (tmpIndex, count) in outcomes:
+            if index == tmpIndex:  # 振り直しなしの場合
+                (tmpHand, evaluatedPoints) = self.choiseHandByIndex(tmpIndex, modeBySelf, mode)
+            else:  # 評価結果はキャッシュから取得する
+                (tmpHand, evaluatedPoints) = self.choiseHandByIndex(tmpIndex, mode)
+
+            # ログ出力用に最大評価時のサイコロ、手、最大評価値を保存する
+            if maxEvaluatedPoints < evaluatedPoints:
+                maxEvaluatedIndex = tmpIndex
+                maxEvaluatedHand = tmpHand
+                maxEvaluatedPoints = evaluatedPoints
+
+            weightedPoints += count * evaluatedPoints
+
+        maxEvaluated: str = ''
+        if self.__isDebug__:
+            maxEvaluated = f'{maxEvaluatedPoints: >3} <- {maxEvaluatedHand:<16}({list(Dice.pipsOfIndex(maxEvaluatedIndex))})'
+
+        expected: float = weightedPoints / pow(Die.MAX_OF_PIP, rerollCount)
         endTime: float = time.time()
 
-        return (expected, endTime - startTime)
+        return (expected, endTime - startTime, maxEvaluated)
+
+    def __getTerminalPoints__(self, sourceIndex: int, index: int, mode: HandChoiseMode, modeBySelf: HandChoiseMode) -> float:
+        """先読み時、振り直しを終えたサイコロの評価値を取得する
+
+        Args:
+            sourceIndex (int): 振り直し前のサイコロのインデックス
+            index (int): 振り直し後のサイコロのインデックス
+            mode (HandChoiseMode): 役選択/評価モード
+            modeBySelf (HandChoiseMode): 役選択モード(振り直しなし時)
+
+        Returns:
+            float: 評価値
+        """
+        # 振り直しなしの場合は evaluateReroll と同様に振り直しなし時の役選択モードで役を選択する
+        modeAtHandChoise: HandChoiseMode = modeBySelf if sourceIndex == index else mode
+        (_, evaluatedPoints) = self.choiseHandByIndex(index, modeAtHandChoise, mode)
+        return evaluatedPoints
+
+    def __lookahead__(self, index: int, rerollCount: int, mode: HandChoiseMode, modeBySelf: HandChoiseMode) -> tuple[float, int]:
+        """残りの振り直しをすべて先読みして、サイコロの評価値と最適な振り直しを求める
+
+        Args:
+            index (int): 現在のサイコロのインデックス
+            rerollCount (int): 残りの振り直し回数
+            mode (HandChoiseMode): 役選択/評価モード
+            modeBySelf (HandChoiseMode): 役選択モード(振り直しなし時)
+
+        Returns:
+            float: 最適な振り直しをしたときの評価値の期待値
+            int: 最適な振り直しのビット
+        """
+        key: tuple[HandChoiseMode, HandChoiseMode, int, int] = (mode, modeBySelf, rerollCount, index)
+        if key in self.__turnTable__:
+            return self.__turnTable__[key]
+
+        retBit: int = 0
+        maxEvaluatedPoints: float = -100
+        for (bit, keptPips) in Evaluator.getKeeps(index):
+            weightedPoints: float = 0
+            for (tmpIndex, count) in Evaluator.getOutcomes(keptPips):
+                if rerollCount == 1:
+                    weightedPoints += count * self.__getTerminalPoints__(index, tmpIndex, mode, modeBySelf)
+                else:
+                    (evaluatedPoints, _) = self.__lookahead__(tmpIndex, rerollCount - 1, mode, modeBySelf)
+                    weightedPoints += count * evaluatedPoints
+            expected: float = weightedPoints / pow(Die.MAX_OF_PIP, Dice.NUM_OF_DICE - len(keptPips))
+
+            if maxEvaluatedPoints < expected:
+                maxEvaluatedPoints = expected
+                retBit = bit
+
+        self.__turnTable__[key] = (maxEvaluatedPoints, retBit)
+        return self.__turnTable__[key]
+
+    def __getBookReroll__(self, dice: Dice, mode: HandChoiseMode, modeBySelf: HandChoiseMode, rerollCount: int) -> int | None:
+        """初手の定石から振り直しを取得する
+
+        Args:
+            dice (Dice): 現在のサイコロ
+            mode (HandChoiseMode): 役選択/評価モード
+            modeBySelf (HandChoiseMode): 役選択モード(振り直しなし時)
+            rerollCount (int): 今回を含む残りの振り直し回数
 
-    def choiseReroll(self, dice: Dice, mode: HandChoiseMode, modeBySelf: HandChoiseMode) -> Reroll:
+        Returns:
+            int | None: 振り直しのビット(場が空でない場合、定石がない場合、Solver なしで最適戦略を指定した場合は None)
+        """
+        if not self.__isOpening__:
+            return None
+        # Solver がない場合の最適戦略は、定石を返さず呼び出し元で失敗させる
+        if HandChoiseMode.Optimal in [mode, modeBySelf] and self.__solver__ is None:
+            return None
+        book: OpeningBook | None = Evaluator.getOpeningBook()
+        bit: int | None = None if book is None else book.getReroll(self.__isLookahead__, mode, modeBySelf, rerollCount, dice.index())
+        if bit is not None:
+            if self.__instrumentation__ is not None:
+                self.__instrumentation__.count('openingBook')
+            if self.__isDebug__:
+                self.__logger__.debug(f'{f"Book({rerollCount})":<11}: {str(Reroll(bit)):<16}')
+        return bit
+
+    def choiseReroll(self, dice: Dice, mode: HandChoiseMode, modeBySelf: HandChoiseMode, rerollCount: int = 1) -> Reroll:
         """振り直すサイコロを選択する
 
         Args:
             dice (Dice): 現在のサイコロ
             mode (HandChoiseMode): 役選択/評価モード
             modeBySelf (HandChoiseMode): 役選択モード(振り直しなし時)
+            rerollCount (int, optional): 今回を含む残りの振り直し回数(先読み時のみ使用). Defaults to 1.
 
         Returns:
             Reroll: 振り直し対象
         """
+        bookBit: int | None = self.__getBookReroll__(dice, mode, modeBySelf, rerollCount)
+        if bookBit is not None:
+            return Reroll(bookBit)
+
+        if mode == HandChoiseMode.Optimal:
+            assert self.__solver__ is not None, 'HandChoiseMode.Optimal requires a Solver'
+            (bit, evaluatedPoints) = self.__solver__.choiseReroll(self.__openMask__, self.__upperSum__, dice.index(), rerollCount)
+            if self.__isDebug__:
+                self.__logger__.debug(f'{f"Optimal({rerollCount})":<11}: {str(Reroll(bit)):<16} Expected: {evaluatedPoints: >7.4f}')
+            return Reroll(bit)
+
+        if self.__isLookahead__:
+            startTime: float = time.time()
+            (evaluatedPoints, bit) = self.__lookahead__(dice.index(), rerollCount, mode, modeBySelf)
+            elapsedTime: float = time.time() - startTime
+
+            if self.__isDebug__:
+                self.__logger__.debug(f'{f"Lookahead({rerollCount})":<11}: {str(Reroll(bit)):<16} Expected: {evaluatedPoints: >7.4f} time: {elapsedTime: >7.4f}')
+            if Evaluator.DECISION_TIME_BUDGET < elapsedTime:
+                self.__logger__.warning(f'{f"Lookahead({rerollCount})":<11}: time {elapsedTime: >7.4f} exceeds budget {Evaluator.DECISION_TIME_BUDGET: >7.4f}')
+            return Reroll(bit)
+
         # 振り直し対象
         retReroll: Reroll = Reroll()
         # 最大評価値
         maxEvaluatedPoints: float = -100
+        # 振り直し対象外の目(昇順)ごとの評価値
+        keptPipsToPoints: dict[tuple[int, ...], float] = {}
+        # デバッグログ(振り直し候補ごとの評価をまとめて1回のログとして出力する)
+        lines: list[str] = []
         for bit in range(pow(2, Dice.NUM_OF_DICE)):
             reroll: Reroll = Reroll(bit)
 
+            # 残す目が同じ振り直しは評価値も同じなので、最初の振り直しだけを評価する
+            keptPips: tuple[int, ...] = dice.getKeptPips(reroll)
+            if keptPips in keptPipsToPoints:
+                continue
+
             # 振り直しを評価する
-            self.__logger__.debug(f'{f"Reroll({bit: >2})":<11}: {str(reroll):<16}')
-            (evaluatedPoints, time) = self.evaluateReroll(dice, reroll, mode, modeBySelf)
+            (evaluatedPoints, evaluatedTime, maxEvaluated) = self.__evaluateReroll__(dice, reroll, mode, modeBySelf)
+            keptPipsToPoints[keptPips] = evaluatedPoints
 
-            self.__logger__.debug(f'{f"Reroll({bit: >2})":<11}: Ave.Expected: {evaluatedPoints: >7.4f} time: {time: >7.4f}')
+            if self.__isDebug__:
+                lines.append(f'{f"Reroll({bit: >2})":<11}: {str(reroll):<16} Ave.Expected: {evaluatedPoints: >7.4f} time: {evaluatedTime: >7.4f}'
+                             f' MaxEvaluated: {maxEvaluated}')
 
             # 評価値の高い振り直しを選択する
             if maxEvaluatedPoints < evaluatedPoints:
                 maxEvaluatedPoints = evaluatedPoints
                 retReroll = reroll
 
+        if self.__isDebug__:
+            self.__logger__.debug('\n'.join([f'{"Rerolls":<11}: {len(lines)} candidates'] + lines))
+
         return retReroll
 
+    def __getOutcomePoints__(self, index: int, tmpIndex: int, rerollCount: int, mode: HandChoiseMode, modeBySelf: HandChoiseMode) -> float:
+        """振り直し後のサイコロの評価値を取得する(choiseReroll と同じ評価値)
+
+        Args:
+            index (int): 振り直し前のサイコロのインデックス
+            tmpIndex (int): 振り直し後のサイコロのインデックス
+            rerollCount (int): 今回を含む残りの振り直し回数
+            mode (HandChoiseMode): 役選択/評価モード
+            modeBySelf (HandChoiseMode): 役選択モード(振り直しなし時)
+
+        Returns:
+            float: 評価値
+        """
+        if self.__isLookahead__ and 1 < rerollCount:
+            (evaluatedPoints, _) = self.__lookahead__(tmpIndex, rerollCount - 1, mode, modeBySelf)
+            return evaluatedPoints
+        return self.__getTerminalPoints__(index, tmpIndex, mode, modeBySelf)
+
+    @staticmethod
+    def __getConfidence__(stats: list[list[float]], best: int) -> float:
+        """選択した振り直しが最良である確率の下限を求める(他の候補ごとの正規近似の確率を Bonferroni の不等式でまとめる)
+
+        Args:
+            stats (list[list[float]]): 振り直し候補ごとの[サンプル数, 評価値の合計, 評価値の2乗の合計]
+            best (int): 選択した振り直し候補
+
+        Returns:
+            float: 0 - 1
+        """
+        def getMeanAndVariance(n: float, total: float, squares: float) -> tuple[float, float]:
+            # 平均と平均の分散(サンプル数が2未満の場合は分散を無限大とする)
+            if n < 2:
+                return (total / n if 0 < n else 0, math.inf)
+            mean: float = total / n
+            return (mean, max(squares - total * mean, 0) / (n - 1) / n)
+
+        (bestMean, bestVariance) = getMeanAndVariance(*stats[best])
+        missProbability: float = 0
+        for (candidate, stat) in enumerate(stats):
+            if candidate == best:
+                continue
+            (mean, variance) = getMeanAndVariance(*stat)
+            deviation: float = math.sqrt(bestVariance + variance)
+            if deviation == 0:
+                missProbability += 0 if mean < bestMean else 0.5
+            elif math.isinf(deviation):
+                missProbability += 0.5
+            else:
+                # 1 - Φ((bestMean - mean) / deviation)
+                missProbability += 0.5 * math.erfc((bestMean - mean) / deviation / math.sqrt(2))
+        return max(1 - missProbability, 0)
+
+    def choiseRerollAnytime(self, dice: Dice, mode: HandChoiseMode, modeBySelf: HandChoiseMode, rerollCount: int = 1,
+                            timeBudget: float | None = ANYTIME_TIME_BUDGET, sampleBudget: int | None = None,
+                            generator: random.Random | None = None) -> tuple[Reroll, float]:
+        """振り直し後の出目をサンプリングして、時間予算内で振り直すサイコロを選択する
+
+        残す目が異なる振り直し候補ごとに出目を引き、評価値の平均の信頼区間が最良の候補より明らかに低い候補から打ち切る(逐次除去)。
+        残った候補には巡ごとに倍の出目を候補の順に1つずつ引き、候補が1つになるか、時間予算・サンプル数の予算・候補ごとの上限に達したら、平均が最大の候補を返す。
+        時間予算は出目を引く単位で判定するため、引いた出目1組の評価時間(先読み時は残りの振り直しの評価を含む)だけ超える場合がある。
+        すべての候補の出目を1つ以上引く前に予算が尽きた場合は、choiseReroll で正確に選択する(時間予算を超える)。
+
+        Args:
+            dice (Dice): 現在のサイコロ
+            mode (HandChoiseMode): 役選択/評価モード
+            modeBySelf (HandChoiseMode): 役選択モード(振り直しなし時)
+            rerollCount (int, optional): 今回を含む残りの振り直し回数(先読み時のみ使用). Defaults to 1.
+            timeBudget (float | None, optional): 時間予算[s](None の場合は制限しない). Defaults to ANYTIME_TIME_BUDGET.
+            sampleBudget (int | None, optional): 全候補で引く出目の数の予算(None の場合は制限しない). Defaults to None.
+            generator (random.Random | None, optional): 出目を引く乱数生成器. Defaults to None(random モジュール).
+
+        Returns:
+            Reroll: 振り直し対象
+            float: 選択した振り直しが最良である確率の推定値(下限. 正確に選択した場合は 1)
+        """
+        # 初手の定石と最適戦略は表を参照するだけなので、サンプリングしない
+        bookBit: int | None = self.__getBookReroll__(dice, mode, modeBySelf, rerollCount)
+        if bookBit is not None:
+            return (Reroll(bookBit), 1.0)
+        if mode == HandChoiseMode.Optimal:
+            return (self.choiseReroll(dice, mode, modeBySelf, rerollCount), 1.0)
+
+        startTime: float = time.perf_counter()
+        deadline: float = math.inf if timeBudget is None else startTime + timeBudget
+        sampler: random.Random = random.Random() if generator is None else generator
+
+        index: int = dice.index()
+        keeps: list[tuple[int, tuple[int, ...]]] = Evaluator.getKeeps(index)
+        # 候補ごとの振り直し後のサイコロのインデックスと累積出現数
+        outcomes: list[tuple[list[int], list[int]]] = []
+        for (_, keptPips) in keeps:
+            tmpOutcomes: list[tuple[int, int]] = Evaluator.getOutcomes(keptPips)
+            outcomes.append(([tmpIndex for (tmpIndex, _) in tmpOutcomes], list(itertools.accumulate(count for (_, count) in tmpOutcomes))))
+        # 候補ごとの[サンプル数, 評価値の合計, 評価値の2乗の合計]
+        stats: list[list[float]] = [[0, 0, 0] for _ in keeps]
+        # 振り直し後のサイコロのインデックスごとの評価値(候補の間で共有する)
+        indexToPoints: dict[int, float] = {}
+
+        survivors: list[int] = list(range(len(keeps)))
+        numOfSamples: int = Evaluator.ANYTIME_INITIAL_SAMPLES
+        totalSamples: int = 0
+        isExhausted: bool = False
+        while not isExhausted:
+            # 予算が巡の途中で尽きても候補の間でサンプル数の差が1以内になるよう、候補を順に1つずつ引く
+            counts: list[int] = [min(numOfSamples, Evaluator.ANYTIME_MAX_SAMPLES - int(stats[candidate][0])) for candidate in survivors]
+            for draw in range(max(counts)):
+                for (candidate, count) in zip(survivors, counts):
+                    if count <= draw:
+                        continue
+                    if deadline <= time.perf_counter() or (sampleBudget is not None and sampleBudget <= totalSamples):
+                        isExhausted = True
+                        break
+                    (indexes, cumulativeCounts) = outcomes[candidate]
+                    tmpIndex: int = sampler.choices(indexes, cum_weights=cumulativeCounts)[0]
+                    if tmpIndex not in indexToPoints:
+                        indexToPoints[tmpIndex] = self.__getOutcomePoints__(index, tmpIndex, rerollCount, mode, modeBySelf)
+                    evaluatedPoints: float = indexToPoints[tmpIndex]
+                    stat: list[float] = stats[candidate]
+                    stat[0] += 1
+                    stat[1] += evaluatedPoints
+                    stat[2] += evaluatedPoints * evaluatedPoints
+                    totalSamples += 1
+                if isExhausted:
+                    break
+
+            # 信頼区間の上限が、平均が最大の候補の信頼区間の下限より低い候補を打ち切る
+            bounds: dict[int, tuple[float, float]] = {}
+            for candidate in survivors:
+                (n, total, squares) = stats[candidate]
+                if n < Evaluator.ANYTIME_MIN_SAMPLES_TO_DROP:
+                    bounds[candidate] = (-math.inf, math.inf)
+                    continue
+                mean: float = total / n
+                halfWidth: float = Evaluator.ANYTIME_Z * math.sqrt(max(squares - total * mean, 0) / (n - 1) / n)
+                bounds[candidate] = (mean - halfWidth, mean + halfWidth)
+            leader: int = max(survivors, key=lambda candidate: stats[candidate][1] / stats[candidate][0] if 0 < stats[candidate][0] else -math.inf)
+            survivors = [candidate for candidate in survivors if bounds[leader][0] <= bounds[candidate][1]]
+
+            numOfSamples *= 2
+            if len(survivors) == 1 or all(Evaluator.ANYTIME_MAX_SAMPLES <= stats[candidate][0] for candidate in survivors):
+                break
+
+        # すべての候補の出目を引く前に予算が尽きた場合は、出目を引いた候補に偏らないよう正確に評価して選択する
+        if any(stat[0] == 0 for stat in stats):
+            reroll: Reroll = self.choiseReroll(dice, mode, modeBySelf, rerollCount)
+            if self.__isDebug__:
+                self.__logger__.debug(f'{f"Anytime({rerollCount})":<11}: {str(reroll):<16} exact (samples: {totalSamples}/{len(keeps)} candidates) '
+                                      f'time: {time.perf_counter() - startTime: >7.4f}')
+            return (reroll, 1.0)
+
+        # 平均が最大の候補を選択する
+        best: int = max(range(len(keeps)), key=lambda candidate: stats[candidate][1] / stats[candidate][0] if 0 < stats[candidate][0] else -math.inf)
+        confidence: float = Evaluator.__getConfidence__(stats, best)
+        elapsedTime: float = time.perf_counter() - startTime
+        if self.__isDebug__:
+            self.__logger__.debug(f'{f"Anytime({rerollCount})":<11}: {str(Reroll(keeps[best][0])):<16} '
+                                  f'Ave.Expected: {stats[best][1] / max(stats[best][0], 1): >7.4f} confidence: {confidence: >6.2%} '
+                                  f'samples: {totalSamples} survivors: {len(survivors)}/{len(keeps)} time: {elapsedTime: >7.4f}')
+        return (Reroll(keeps[best][0]), confidence)
+
+
+Evaluator.__buildRerollOutcomes__()
+
 
 def main() -> None:
     pass
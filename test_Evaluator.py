@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import logging
+import random
+import unittest
+from collections import Counter
+
+from Yahtzee import Dice, Evaluator, Field, HandChoiseMode, Hands, Reroll
+
+# 確認する局面(割り当て済の役とサイコロ, 現在のサイコロ). 割り当てる役の数を変えて乱数で作成した
+POSITIONS: list[tuple[list[tuple[Hands, list[int]]], list[int]]] = [
+    ([], [1, 3, 4, 4, 5]),
+    ([(Hands.FourDice, [2, 3, 3, 4, 5]), (Hands.Choise, [1, 2, 2, 3, 5])], [3, 5, 5, 5, 6]),
+    ([(Hands.Tri, [1, 3, 4, 5, 6]), (Hands.Five, [3, 3, 4, 5, 6]), (Hands.Duce, [2, 4, 4, 5, 5]), (Hands.SStraight, [1, 1, 1, 3, 5])], [4, 6, 6, 6, 6]),
+    ([(Hands.Ace, [1, 2, 3, 5, 6]), (Hands.SStraight, [2, 2, 2, 4, 5]), (Hands.FourDice, [1, 1, 3, 4, 5]), (Hands.Six, [1, 3, 3, 5, 6]), (Hands.Four, [1, 2, 3, 5, 5]),
+      (Hands.FullHouse, [3, 4, 5, 5, 5])], [1, 3, 4, 5, 5]),
+    ([(Hands.Four, [1, 1, 3, 4, 6]), (Hands.Five, [1, 1, 2, 2, 6]), (Hands.Tri, [4, 5, 6, 6, 6]), (Hands.Yahtzee, [2, 2, 3, 5, 5]), (Hands.SStraight, [3, 4, 5, 5, 6]),
+      (Hands.Ace, [4, 4, 6, 6, 6]), (Hands.BStraight, [1, 1, 3, 3, 5])], [2, 3, 4, 5, 6]),
+    ([(Hands.Four, [1, 1, 2, 4, 6]), (Hands.Ace, [1, 2, 5, 5, 6]), (Hands.Five, [1, 1, 1, 5, 6]), (Hands.Duce, [1, 2, 5, 5, 6]), (Hands.Yahtzee, [1, 1, 1, 3, 4]),
+      (Hands.Tri, [1, 2, 2, 5, 6]), (Hands.FullHouse, [1, 1, 2, 4, 6]), (Hands.Choise, [1, 4, 5, 5, 6])], [1, 1, 1, 2, 3]),
+    ([(Hands.BStraight, [1, 2, 4, 5, 6]), (Hands.Five, [3, 3, 4, 5, 6]), (Hands.Six, [1, 2, 2, 6, 6]), (Hands.Choise, [2, 2, 3, 5, 6]), (Hands.Tri, [1, 3, 4, 5, 6]),
+      (Hands.Ace, [1, 2, 4, 4, 6]), (Hands.Yahtzee, [3, 3, 5, 5, 6]), (Hands.Four, [2, 3, 4, 5, 6]), (Hands.FullHouse, [1, 1, 4, 6, 6])], [1, 3, 3, 5, 6]),
+    ([(Hands.Tri, [3, 4, 4, 6, 6]), (Hands.Four, [1, 1, 2, 5, 6]), (Hands.FourDice, [2, 2, 2, 3, 6]), (Hands.Six, [4, 4, 5, 6, 6]), (Hands.Five, [1, 4, 4, 5, 6]),
+      (Hands.FullHouse, [1, 2, 4, 6, 6]), (Hands.Yahtzee, [1, 2, 3, 4, 6]), (Hands.SStraight, [4, 4, 5, 5, 5]), (Hands.Duce, [1, 1, 3, 3, 4]), (Hands.Choise, [1, 2, 4, 4, 5])],
+     [1, 1, 2, 6, 6]),
+]
+# 確認する(振り直し時の役選択/評価モード, 役選択モード)
+MODE_PAIRS: list[tuple[HandChoiseMode, HandChoiseMode]] = [
+    (HandChoiseMode.MaximumGain, HandChoiseMode.MaximumGain),
+    (HandChoiseMode.MinimumLost, HandChoiseMode.MinimumLost),
+    (HandChoiseMode.Balance, HandChoiseMode.Balance),
+    (HandChoiseMode.MaximumGain, HandChoiseMode.Balance),
+]
+# 局面・モードの組み合わせごとの(残すサイコロの目, 役, 役選択時の評価値). 高速化前の実装(baseline)の選択結果
+EXPECTED: list[list[tuple[list[int], Hands, int]]] = [
+    [([3, 4, 5], Hands.Choise, 17), ([3, 4, 5], Hands.Ace, -4), ([3, 4, 5], Hands.Choise, 4), ([3, 4, 5], Hands.Choise, 4)],
+    [([5, 5, 5], Hands.Five, 15), ([3, 5], Hands.Ace, -5), ([5, 5, 5], Hands.Five, 5), ([5, 5, 5], Hands.Five, 5)],
+    [([6, 6, 6, 6], Hands.Choise, 28), ([4, 6, 6, 6, 6], Hands.Choise, -2), ([6, 6, 6, 6], Hands.Choise, 26), ([6, 6, 6, 6], Hands.Choise, 26)],
+    [([4, 5, 5], Hands.Choise, 18), ([], Hands.Duce, -10), ([4, 5, 5], Hands.Choise, 6), ([4, 5, 5], Hands.Choise, 6)],
+    [([4, 5, 6], Hands.Choise, 20), ([2], Hands.Duce, -8), ([4, 5, 6], Hands.Choise, 10), ([4, 5, 6], Hands.Choise, 10)],
+    [([], Hands.Six, 0), ([1, 2, 3], Hands.SStraight, -15), ([1, 2, 3], Hands.SStraight, -15), ([], Hands.SStraight, -15)],
+    [([3, 5, 6], Hands.Duce, 0), ([3, 5, 6], Hands.Duce, -10), ([3, 5, 6], Hands.Duce, -10), ([3, 5, 6], Hands.Duce, -10)],
+    [([1, 1], Hands.Ace, 2), ([1, 1], Hands.Ace, -3), ([1, 1], Hands.Ace, -1), ([1, 1], Hands.Ace, -1)],
+]
+
+
+class TestEvaluator(unittest.TestCase):
+    """Evaluator の振り直しと役の選択結果が、高速化前の実装の選択結果と一致することを確認する
+    """
+
+    def test_choiseRerollAndHand(self) -> None:
+        """固定した局面とモードの組み合わせで、残すサイコロ・役・評価値が一致する(初手の定石は使用しない)
+        """
+        logger: logging.Logger = logging.getLogger(__name__)
+        for ((filled, pips), expectedRow) in zip(POSITIONS, EXPECTED):
+            for ((mode, modeBySelf), expected) in zip(MODE_PAIRS, expectedRow):
+                field: Field = Field(logger)
+                for (hand, handPips) in filled:
+                    field.setDice(hand, Dice(handPips))
+                evaluator: Evaluator = Evaluator(field, logger, mode, False, isOpeningBook=False)
+                dice: Dice = Dice(pips)
+
+                rerollIndexes: list[int] = evaluator.choiseReroll(dice, mode, modeBySelf, 1).toList()
+                kept: list[int] = [pip for (index, pip) in enumerate(dice.pips()) if index not in rerollIndexes]
+                (hand, value) = evaluator.choiseHand(dice, modeBySelf)
+                self.assertEqual((kept, hand, value), expected, f'dice: {pips} filled: {[hand.name for (hand, _) in filled]} modes: {mode.name}/{modeBySelf.name}')
+
+    def test_optimalWithoutSolver(self) -> None:
+        """Solver なしで最適戦略を指定した場合、初手の定石があっても最初の呼び出しで失敗する
+        """
+        logger: logging.Logger = logging.getLogger(__name__)
+        evaluator: Evaluator = Evaluator(Field(logger), logger, HandChoiseMode.Optimal)
+        dice: Dice = Dice(POSITIONS[0][1])
+        with self.assertRaises(AssertionError):
+            evaluator.choiseHand(dice, HandChoiseMode.Optimal)
+        with self.assertRaises(AssertionError):
+            evaluator.choiseReroll(dice, HandChoiseMode.Optimal, HandChoiseMode.Optimal, 1)
+        with self.assertRaises(AssertionError):
+            evaluator.choiseRerollAnytime(dice, HandChoiseMode.Optimal, HandChoiseMode.Optimal, 1)
+
+
+class RecordingRandom(random.Random):
+    """出目を引いた振り直し後のサイコロのインデックスの一覧(候補ごとに異なる)を記録する乱数生成器
+    """
+
+    def __init__(self, seed: int) -> None:
+        """コンストラクタ
+
+        Args:
+            seed (int): シード
+        """
+        super().__init__(seed)
+        # 出目を引くごとの、振り直し後のサイコロのインデックスの一覧
+        self.populations: list[tuple[int, ...]] = []
+
+    def choices(self, population, weights=None, *, cum_weights=None, k=1):  # type: ignore[override]
+        """引いた候補を記録して、random.Random.choices で出目を引く
+        """
+        self.populations.append(tuple(population))
+        return super().choices(population, weights, cum_weights=cum_weights, k=k)
+
+
+class TestChoiseRerollAnytime(unittest.TestCase):
+    """Evaluator.choiseRerollAnytime が、小さい予算で先頭の候補に偏らないことを確認する
+    """
+
+    # 定数定義
+    SAMPLE_BUDGETS: list[int] = [40, 100]  # 確認するサンプル数の予算(すべての候補に ANYTIME_INITIAL_SAMPLES ずつ引く前に尽きる)
+
+    def __makeEvaluator__(self, filled: list[tuple[Hands, list[int]]]) -> Evaluator:
+        """割り当て済の役から Evaluator を作成する(初手の定石は使用しない)
+
+        Args:
+            filled (list[tuple[Hands, list[int]]]): 割り当て済の役とサイコロ
+
+        Returns:
+            Evaluator: Evaluator
+        """
+        logger: logging.Logger = logging.getLogger(__name__)
+        field: Field = Field(logger)
+        for (hand, handPips) in filled:
+            field.setDice(hand, Dice(handPips))
+        return Evaluator(field, logger, HandChoiseMode.MaximumGain, False, isOpeningBook=False)
+
+    def test_samplesAreSpread(self) -> None:
+        """予算が1巡目の途中で尽きても、すべての候補の出目を引き、候補の間のサンプル数の差が1以内になる
+        """
+        for (number, (filled, pips)) in enumerate(POSITIONS):
+            dice: Dice = Dice(pips)
+            keeps: list[tuple[int, tuple[int, ...]]] = Evaluator.getKeeps(dice.index())
+            # 候補ごとの振り直し後のサイコロのインデックスの一覧
+            populations: list[tuple[int, ...]] = [tuple(tmpIndex for (tmpIndex, _) in Evaluator.getOutcomes(keptPips)) for (_, keptPips) in keeps]
+            for sampleBudget in TestChoiseRerollAnytime.SAMPLE_BUDGETS:
+                if Evaluator.ANYTIME_INITIAL_SAMPLES * len(keeps) <= sampleBudget:
+                    continue
+                generator: RecordingRandom = RecordingRandom(number)
+                self.__makeEvaluator__(filled).choiseRerollAnytime(dice, HandChoiseMode.MaximumGain, HandChoiseMode.MaximumGain, 1, None, sampleBudget, generator)
+                counts: Counter = Counter(generator.populations)
+                samples: list[int] = [counts[population] for population in populations]
+                self.assertEqual(sum(samples), sampleBudget)
+                self.assertLessEqual(max(samples) - min(samples), 1, f'dice: {pips} budget: {sampleBudget} samples: {samples}')
+
+    def test_budgetBelowCandidates(self) -> None:
+        """すべての候補の出目を引く前に予算が尽きた場合は、choiseReroll と同じ振り直しを選択する
+        """
+        for (number, (filled, pips)) in enumerate(POSITIONS):
+            dice: Dice = Dice(pips)
+            evaluator: Evaluator = self.__makeEvaluator__(filled)
+            exact: Reroll = evaluator.choiseReroll(dice, HandChoiseMode.MaximumGain, HandChoiseMode.MaximumGain, 1)
+            for sampleBudget in [0, len(Evaluator.getKeeps(dice.index())) - 1]:
+                (reroll, confidence) = evaluator.choiseRerollAnytime(dice, HandChoiseMode.MaximumGain, HandChoiseMode.MaximumGain, 1, None, sampleBudget,
+                                                                     random.Random(number))
+                self.assertEqual((reroll.toBit(), confidence), (exact.toBit(), 1.0), f'dice: {pips} budget: {sampleBudget}')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import random
+import unittest
+
+from Yahtzee import Calculator, Dice, Field, FieldState, Hands
+
+# 役ごとの、サイコロのインデックスに対応する役の点
+HAND_TO_POINTS: dict[Hands, list[int]] = {hand: [Calculator.calculatePointsByIndex(hand, index) for index in range(Dice.NUM_OF_STATES)] for hand in Hands}
+
+
+def getInfoToSetByLoop(openMask: int, upperSum: int, sum: int, bonus: int, hand: Hands) -> list[tuple[int, int, int]]:
+    """判定表を使用しない getInfoToSetByIndex(未割り当ての数字役をループして判定する、判定表導入前の計算)
+
+    Args:
+        openMask (int): 未割り当ての役のビットマスク
+        upperSum (int): 数字役の合計点
+        sum (int): 合計点(ボーナス点を含む)
+        bonus (int): ボーナス点
+        hand (Hands): 役
+
+    Returns:
+        list[tuple[int, int, int]]: サイコロのインデックスごとの(合計点, 取得点, 損失点)
+    """
+    maxHandPoints: int = Calculator.getBestPoints(hand)
+    isBonusTarget: bool = bonus == 0 and hand in Hands.getNumHands()
+    # 割当て済の数字役の点の合計 + その役以外の未割当ての数字役の最大点の合計
+    maxSumOfOtherNumHands: int = upperSum
+    for (column, numHand) in enumerate(Hands):
+        if numHand in Hands.getNumHands() and numHand != hand and openMask & (1 << column):
+            maxSumOfOtherNumHands += Calculator.getBestPoints(numHand)
+
+    results: list[tuple[int, int, int]] = []
+    for handPoints in HAND_TO_POINTS[hand]:
+        bonusPoints: int = 0
+        maxBonusPoints: int = 0
+        if isBonusTarget:
+            if Field.BONUS_BORDER <= upperSum + handPoints:
+                bonusPoints = Field.POINT_BONUS
+                maxBonusPoints = Field.POINT_BONUS
+            elif maxSumOfOtherNumHands + handPoints < Field.BONUS_BORDER and Field.BONUS_BORDER <= maxSumOfOtherNumHands + maxHandPoints:
+                maxBonusPoints = Field.POINT_BONUS
+        gainedPoints: int = handPoints + bonusPoints
+        results.append((sum + gainedPoints, gainedPoints, gainedPoints - (maxHandPoints + maxBonusPoints)))
+    return results
+
+
+class TestFieldState(unittest.TestCase):
+    """FieldState のボーナスの判定表が、判定表導入前の計算と一致することを確認する
+    """
+
+    # 定数定義
+    MAX_OF_UPPER_SUM: int = 80  # 確認する数字役の合計点の上限(ボーナス取得済の状態を含む)
+    NUM_OF_SAMPLES: int = 500  # 確認する場の状態の数
+    SEED: int = 0  # 場の状態を選ぶシード
+
+    def test_getInfoToSetByIndex(self) -> None:
+        """乱数で選んだ数字役のビットマスク・非数字役の有無・数字役の合計点で、すべての役・サイコロの取得点と損失点が一致する
+        """
+        rng: random.Random = random.Random(TestFieldState.SEED)
+        numHandsMask: int = sum(1 << column for (column, hand) in enumerate(Hands) if hand in Hands.getNumHands())
+        unNumHandsMask: int = pow(2, len(Hands)) - 1 - numHandsMask
+        for _ in range(TestFieldState.NUM_OF_SAMPLES):
+            # 数字役のビットマスクは numHandsMask の部分集合から選ぶ
+            numMask: int = rng.randrange(numHandsMask + 1) & numHandsMask
+            lowerMask: int = rng.choice([0, unNumHandsMask])
+            upperSum: int = rng.randrange(TestFieldState.MAX_OF_UPPER_SUM)
+            bonus: int = Field.POINT_BONUS if Field.BONUS_BORDER <= upperSum else 0
+            openMask: int = numMask | lowerMask
+            state: FieldState = FieldState(openMask, upperSum, upperSum + bonus, bonus)
+            for hand in Hands:
+                actual: list[tuple[int, int, int]] = [state.getInfoToSetByIndex(hand, index) for index in range(Dice.NUM_OF_STATES)]
+                expected: list[tuple[int, int, int]] = getInfoToSetByLoop(openMask, upperSum, upperSum + bonus, bonus, hand)
+                self.assertEqual(actual, expected, f'openMask: {openMask:#x} upperSum: {upperSum} hand: {hand.name}')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import os
+import random
+import struct
+import tempfile
+import unittest
+
+from GameRecord import GameRecord, GameRecordReader, GameRecordWriter
+from Yahtzee import Dice, HandChoiseMode, Hands, Reroll
+
+# 定数定義
+MAX_ROLL_COUNT: int = 3  # 1ターンでサイコロを振る最大回数
+GAME_COUNTS: list[int] = [3, 1, 2, 5, 4]  # 書き込むゲーム番号(並列実行時と同じく、終了した順に書き込む)
+
+
+def makeRecord(gameCount: int, rng: random.Random) -> GameRecord:
+    """乱数でゲームの記録を作成する
+
+    Args:
+        gameCount (int): ゲーム番号
+        rng (random.Random): 乱数生成器
+
+    Returns:
+        GameRecord: ゲームの記録
+    """
+    record: GameRecord = GameRecord(gameCount, rng.getrandbits(64), MAX_ROLL_COUNT)
+    for hand in rng.sample(list(Hands), len(Hands)):
+        indexes: list[int] = [rng.randrange(Dice.NUM_OF_STATES) for _ in range(MAX_ROLL_COUNT)]
+        bits: list[int] = [rng.randrange(pow(2, Reroll.NUM_OF_DICE)) for _ in range(MAX_ROLL_COUNT - 1)]
+        record.addTurn(indexes, bits, hand)
+    record.setPoints(rng.randrange(376))
+    return record
+
+
+def toTuple(record: GameRecord) -> tuple:
+    """比較用に、ゲームの記録の内容をタプルに変換する
+
+    Args:
+        record (GameRecord): ゲームの記録
+
+    Returns:
+        tuple: (ゲーム番号, シード, 合計点, ターンごとの記録)
+    """
+    return (record.getGameCount(), record.getSeed(), record.getPoints(), record.getTurns())
+
+
+class TestGameRecord(unittest.TestCase):
+    """GameRecordWriter で書き込んだ記録を GameRecordReader で読み込めることを確認する
+    """
+
+    def setUp(self) -> None:
+        self.__directory__: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.__path__: str = os.path.join(self.__directory__.name, 'games.yzgr')
+        rng: random.Random = random.Random(0)
+        self.__records__: list[GameRecord] = [makeRecord(gameCount, rng) for gameCount in GAME_COUNTS]
+
+    def tearDown(self) -> None:
+        self.__directory__.cleanup()
+
+    def __write__(self) -> None:
+        """記録を書き込む
+        """
+        with GameRecordWriter(self.__path__, MAX_ROLL_COUNT, HandChoiseMode.MaximumGain, HandChoiseMode.Balance, True) as writer:
+            for record in self.__records__:
+                writer.write(record)
+
+    def __getGameOffset__(self, number: int) -> int:
+        """書き込み順の番号から、ゲームの記録の位置を求める
+
+        Args:
+            number (int): 書き込み順の番号
+
+        Returns:
+            int: 位置
+        """
+        return struct.calcsize(GameRecordWriter.HEADER_FORMAT) + GameRecordWriter.getGameSize(MAX_ROLL_COUNT) * number
+
+    def test_roundTrip(self) -> None:
+        """書き込んだ戦略とゲームを、書き込み順に読み込める
+        """
+        self.__write__()
+        reader: GameRecordReader = GameRecordReader(self.__path__)
+        self.assertEqual(reader.getMaxRollCount(), MAX_ROLL_COUNT)
+        self.assertEqual(reader.getRerollMode(), HandChoiseMode.MaximumGain)
+        self.assertEqual(reader.getChoiseMode(), HandChoiseMode.Balance)
+        self.assertTrue(reader.isLookahead())
+        self.assertEqual(len(reader), len(GAME_COUNTS))
+        self.assertEqual([toTuple(record) for record in reader], [toTuple(record) for record in self.__records__])
+
+    def test_index(self) -> None:
+        """トレーラのインデックスから、ゲーム番号ごとの位置とゲームを取得できる
+        """
+        self.__write__()
+        reader: GameRecordReader = GameRecordReader(self.__path__)
+        index: dict[int, int] = reader.getIndex()
+        self.assertEqual(index, {gameCount: self.__getGameOffset__(number) for (number, gameCount) in enumerate(GAME_COUNTS)})
+        for record in self.__records__:
+            self.assertEqual(toTuple(reader.getGame(record.getGameCount(), index)), toTuple(record))
+
+    def test_unclosed(self) -> None:
+        """インデックスとトレーラがない場合も、先頭からすべてのゲームとインデックスを求められる
+        """
+        self.__write__()
+        # close 前に終了した場合と同じく、インデックスとトレーラを除く
+        os.truncate(self.__path__, self.__getGameOffset__(len(GAME_COUNTS)))
+        reader: GameRecordReader = GameRecordReader(self.__path__)
+        self.assertEqual(len(reader), len(GAME_COUNTS))
+        self.assertEqual([toTuple(record) for record in reader], [toTuple(record) for record in self.__records__])
+        self.assertEqual(reader.getIndex(), {gameCount: self.__getGameOffset__(number) for (number, gameCount) in enumerate(GAME_COUNTS)})
+
+    def test_truncated(self) -> None:
+        """ゲームの途中で切れている場合、最後まで書き込まれたゲームのみを読み込む
+        """
+        self.__write__()
+        os.truncate(self.__path__, self.__getGameOffset__(2) + GameRecordWriter.getGameSize(MAX_ROLL_COUNT) // 2)
+        reader: GameRecordReader = GameRecordReader(self.__path__)
+        self.assertEqual(len(reader), 2)
+        self.assertEqual([toTuple(record) for record in reader], [toTuple(record) for record in self.__records__[:2]])
+        self.assertEqual(reader.getIndex(), {GAME_COUNTS[0]: self.__getGameOffset__(0), GAME_COUNTS[1]: self.__getGameOffset__(1)})
+
+    def test_invalidHeader(self) -> None:
+        """ヘッダが切れている、または識別子が異なる場合は ValueError になる
+        """
+        self.__write__()
+        os.truncate(self.__path__, struct.calcsize(GameRecordWriter.HEADER_FORMAT) - 1)
+        with self.assertRaises(ValueError):
+            GameRecordReader(self.__path__)
+
+        with open(self.__path__, 'wb') as f:
+            f.write(b'XXXX' + b'\0' * struct.calcsize(GameRecordWriter.HEADER_FORMAT))
+        with self.assertRaises(ValueError):
+            GameRecordReader(self.__path__)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import logging
+import random
+import re
+import unittest
+
+import numpy as np
+
+from GameRecord import GameRecord
+from ScoreStatistics import ScoreStatistics
+from Yahtzee import Calculator, Dice, Field, Hands
+
+# 定数定義
+MAX_ROLL_COUNT: int = 3  # 1ターンでサイコロを振る最大回数
+NUM_OF_POINTS: int = 1001  # 確認する合計点の数
+NUM_OF_GAMES: int = 200  # 確認するゲームの記録の数
+QUANTILES: list[float] = [0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1]  # 確認する分位
+
+
+def makeRecords(count: int, rng: random.Random) -> tuple[list[GameRecord], list[dict[Hands, int]], list[bool]]:
+    """乱数のサイコロを役に割り当てたゲームの記録を作成する
+
+    Args:
+        count (int): ゲーム数
+        rng (random.Random): 乱数生成器
+
+    Returns:
+        list[GameRecord]: ゲームの記録
+        list[dict[Hands, int]]: ゲームごとの役ごとの取得点
+        list[bool]: ゲームごとのボーナス点を得たか
+    """
+    logger: logging.Logger = logging.getLogger(__name__)
+    records: list[GameRecord] = []
+    handPoints: list[dict[Hands, int]] = []
+    bonuses: list[bool] = []
+    for gameCount in range(1, count + 1):
+        field: Field = Field(logger)
+        record: GameRecord = GameRecord(gameCount, gameCount, MAX_ROLL_COUNT)
+        points: dict[Hands, int] = {}
+        for hand in rng.sample(list(Hands), len(Hands)):
+            # 数字役はボーナス点を得るゲームもできるよう、その目を多めに出す
+            pips: list[int] = [hand.value if hand in Hands.getNumHands() and rng.random() < 0.6 else rng.randint(1, 6) for _ in range(Dice.NUM_OF_DICE)]
+            dice: Dice = Dice(pips)
+            field.setDice(hand, dice)
+            record.addTurn([dice.index()] * MAX_ROLL_COUNT, [0] * (MAX_ROLL_COUNT - 1), hand)
+            points[hand] = Calculator.calculatePoints(hand, dice)
+        record.setPoints(field.sum())
+        records.append(record)
+        handPoints.append(points)
+        bonuses.append(Field.BONUS_BORDER <= field.getSumOfNumHands())
+    return (records, handPoints, bonuses)
+
+
+class TestScoreStatistics(unittest.TestCase):
+    """ScoreStatistics の統計が、すべての合計点から numpy で求めた値と一致することを確認する
+    """
+
+    def setUp(self) -> None:
+        rng: random.Random = random.Random(0)
+        self.__points__: list[int] = [min(max(round(rng.gauss(190, 40)), 0), ScoreStatistics.MAX_POINTS) for _ in range(NUM_OF_POINTS)]
+
+    def __assertSame__(self, actual: ScoreStatistics, expected: ScoreStatistics) -> None:
+        """2つの統計が一致することを確認する(平均と標準偏差は丸め誤差を許容する)
+
+        Args:
+            actual (ScoreStatistics): 統計
+            expected (ScoreStatistics): 期待する統計
+        """
+        self.assertEqual(actual.count(), expected.count())
+        self.assertAlmostEqual(actual.mean(), expected.mean(), places=9)
+        self.assertAlmostEqual(actual.std(), expected.std(), places=9)
+        self.assertEqual((actual.min(), actual.max()), (expected.min(), expected.max()))
+        self.assertEqual([actual.quantile(q) for q in QUANTILES], [expected.quantile(q) for q in QUANTILES])
+        self.assertEqual(actual.getBonusRate(), expected.getBonusRate())
+        self.assertEqual(actual.getHandLines(), expected.getHandLines())
+
+    def test_add(self) -> None:
+        """平均・標準偏差・最小点・最大点・分位点が numpy と一致する
+        """
+        statistics: ScoreStatistics = ScoreStatistics()
+        for points in self.__points__:
+            statistics.add(points)
+        values: np.ndarray = np.array(self.__points__)
+        self.assertEqual(statistics.count(), NUM_OF_POINTS)
+        self.assertAlmostEqual(statistics.mean(), float(np.mean(values)), places=9)
+        self.assertAlmostEqual(statistics.std(), float(np.std(values)), places=9)
+        self.assertEqual((statistics.min(), statistics.max()), (int(np.min(values)), int(np.max(values))))
+        for q in QUANTILES:
+            self.assertAlmostEqual(statistics.quantile(q), float(np.quantile(values, q)), places=9, msg=f'q: {q}')
+        self.assertAlmostEqual(statistics.median(), float(np.median(values)), places=9)
+
+    def test_quantileOfEvenCount(self) -> None:
+        """ゲーム数が偶数の場合も、分位点が numpy と一致する(線形補間する)
+        """
+        statistics: ScoreStatistics = ScoreStatistics()
+        for points in self.__points__[:-1]:
+            statistics.add(points)
+        for q in QUANTILES:
+            self.assertAlmostEqual(statistics.quantile(q), float(np.quantile(self.__points__[:-1], q)), places=9, msg=f'q: {q}')
+
+    def test_addRecord(self) -> None:
+        """ボーナス点を得た割合と、役ごとの平均点・0 点の割合が、記録から求めた値と一致する
+        """
+        (records, handPoints, bonuses) = makeRecords(NUM_OF_GAMES, random.Random(0))
+        statistics: ScoreStatistics = ScoreStatistics()
+        for record in records:
+            statistics.addRecord(record)
+
+        self.assertTrue(0 < sum(bonuses) < NUM_OF_GAMES)
+        self.assertEqual(statistics.getBonusRate(), sum(bonuses) / NUM_OF_GAMES)
+        self.assertAlmostEqual(statistics.mean(), float(np.mean([record.getPoints() for record in records])), places=9)
+        for (hand, line) in zip(Hands, statistics.getHandLines()):
+            match: re.Match | None = re.search(r'Ave\. +([\d.]+) Zero: +([\d.]+)%', line)
+            assert match is not None
+            points: list[int] = [gamePoints[hand] for gamePoints in handPoints]
+            self.assertAlmostEqual(float(match.group(1)), sum(points) / NUM_OF_GAMES, places=3, msg=hand.name)
+            self.assertAlmostEqual(float(match.group(2)), points.count(0) / NUM_OF_GAMES * 100, places=2, msg=hand.name)
+
+    def test_merge(self) -> None:
+        """前半と後半を別に集計して合算した統計が、まとめて集計した統計と一致する
+        """
+        (records, _, _) = makeRecords(NUM_OF_GAMES, random.Random(1))
+        whole: ScoreStatistics = ScoreStatistics()
+        first: ScoreStatistics = ScoreStatistics()
+        second: ScoreStatistics = ScoreStatistics()
+        for (number, record) in enumerate(records):
+            whole.addRecord(record)
+            (first if number < NUM_OF_GAMES // 3 else second).addRecord(record)
+        first.merge(second)
+        self.__assertSame__(first, whole)
+
+        # 空の統計との合算
+        empty: ScoreStatistics = ScoreStatistics()
+        empty.merge(whole)
+        self.__assertSame__(empty, whole)
+        whole.merge(ScoreStatistics())
+        self.__assertSame__(whole, empty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import logging
+import os
+import struct
+import tempfile
+import unittest
+
+import numpy as np
+
+from Solver import Solver
+from StrategyTable import StrategyTable
+
+
+class TestStrategyTable(unittest.TestCase):
+    """StrategyTable の書き込み・読み込みと、壊れたファイルの検出を確認する
+    """
+
+    def setUp(self) -> None:
+        self.__directory__: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.__path__: str = os.path.join(self.__directory__.name, 'table.yzt')
+        # 次元数・dtype の異なる項目
+        self.__arrays__: dict[str, np.ndarray] = {
+            'values': np.arange(3 * 5, dtype=np.float64).reshape(3, 5) / 7,
+            'rerolls': np.arange(2 * 3 * 4 * 5, dtype=np.uint8).reshape(2, 3, 4, 5),
+            'hands': np.array([-1, 0, 11], dtype=np.int8),
+        }
+        StrategyTable.write(self.__path__, self.__arrays__)
+
+    def tearDown(self) -> None:
+        self.__directory__.cleanup()
+
+    def __corrupt__(self, offset: int) -> None:
+        """ファイルの1バイトを反転する
+
+        Args:
+            offset (int): 位置
+        """
+        with open(self.__path__, 'r+b') as f:
+            f.seek(offset)
+            byte: int = f.read(1)[0]
+            f.seek(offset)
+            f.write(bytes([byte ^ 0xff]))
+
+    def __getDataOffset__(self) -> int:
+        """最後の項目のデータの位置を取得する
+
+        Returns:
+            int: 位置
+        """
+        return os.path.getsize(self.__path__) - self.__arrays__['hands'].nbytes
+
+    def test_roundTrip(self) -> None:
+        """書き込んだ配列を、同じ形状・dtype・値で読み込める
+        """
+        table: StrategyTable = StrategyTable(self.__path__, True)
+        self.assertEqual(table.names(), list(self.__arrays__.keys()))
+        for (name, array) in self.__arrays__.items():
+            self.assertEqual(table.get(name).shape, array.shape, name)
+            self.assertEqual(table.get(name).dtype, array.dtype, name)
+            np.testing.assert_array_equal(table.get(name), array, name)
+
+    def test_corruptedData(self) -> None:
+        """データが壊れている場合、検証すると ValueError になる(検証しない場合は開ける)
+        """
+        self.__corrupt__(self.__getDataOffset__())
+        StrategyTable(self.__path__)
+        with self.assertRaises(ValueError):
+            StrategyTable(self.__path__, True)
+        with self.assertRaises(ValueError):
+            StrategyTable(self.__path__).verify()
+
+    def test_corruptedEntries(self) -> None:
+        """項目一覧が壊れている場合、開くと ValueError になる
+        """
+        self.__corrupt__(struct.calcsize(StrategyTable.HEADER_FORMAT))
+        with self.assertRaises(ValueError):
+            StrategyTable(self.__path__)
+
+    def test_truncated(self) -> None:
+        """データが途中で切れている場合、開くと ValueError になる
+        """
+        os.truncate(self.__path__, self.__getDataOffset__())
+        with self.assertRaises(ValueError):
+            StrategyTable(self.__path__)
+
+    def test_solverLoadOrBuild(self) -> None:
+        """Solver.loadOrBuild は、データが壊れた状態ごとの値を読み込まない
+        """
+        StrategyTable.write(self.__path__, {'values': np.zeros((Solver.NUM_OF_MASKS, Solver.NUM_OF_UPPERS))})
+        self.__corrupt__(os.path.getsize(self.__path__) - 1)
+        with self.assertRaises(ValueError):
+            Solver.loadOrBuild(logging.getLogger(__name__), self.__path__)
+
+
+if __name__ == '__main__':
+    unittest.main()